@@ -19,20 +19,10 @@ import time
 
 def get_fuel_data(tank):
     # get fuel tank quantities
-    if tank == 0:
-        percentage = fsdata.instr['lvl_main_left'] / (128 * 65536)
-        quantity = round(fsdata.instr['cap_main_left'] * percentage)
-    if tank == 1:
-        percentage = fsdata.instr['lvl_main_right'] / (128 * 65536)
-        quantity = round(fsdata.instr['cap_main_right'] * percentage)
-    if tank == 2:
-        percentage = fsdata.instr['lvl_tip_left'] / (128 * 65536)
-        quantity = round(fsdata.instr['cap_tip_left'] * percentage)
-    if tank == 3:
-        percentage = fsdata.instr['lvl_tip_right'] / (128 * 65536)
-        quantity = round(fsdata.instr['cap_tip_right'] * percentage)
-    
-    return str(quantity)
+    i = fsdata.fuel.find(['main left', 'main right', 'tip left', 'tip right'][tank])
+    if i is None:
+        return str(0)
+    return str(round(fsdata.fuel.quantity[i]))
 
 class fuelControllerBonanza(object):
     def __init__(self):
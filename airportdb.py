@@ -0,0 +1,179 @@
+# airport database built from the MakeRunways output files.
+# runways.xml is read with iterparse, one airport element at a time, and each element is cleared
+# once its airport and runways have been extracted, so the whole document is never held in memory.
+# Gates come from g5.csv and runway ends from r5.csv. The tables are stored as one .npy file per
+# column in a folder, with a meta.json recording the schema version and the modification times of
+# the source files. The database is rebuilt whenever the schema changes or a source file is newer.
+# Columns are memory mapped when loaded, so loading takes milliseconds and pages are only read
+# from disk when a query touches them.
+import csv
+import json
+import logging
+import os
+import shutil
+import xml.etree.ElementTree as et
+
+import numpy as np
+
+log = logging.getLogger("airportdb")
+
+# bump when the tables or columns change, so existing databases are rebuilt
+SCHEMA_VERSION = 2
+META_FILE = 'meta.json'
+
+GATE_COLUMNS = ['ICAO', 'GateName', 'GateNumber', 'Latitude', 'Longitude', 'Radius', 'HeadingTrue', 'GateType', 'AirlineCodeList']
+GATE_NUMERIC = ['Latitude', 'Longitude', 'Radius', 'HeadingTrue']
+RUNWAY_END_COLUMNS = ['ICAO', 'Rwy', 'Latitude', 'Longitude', 'Altitude', 'HeadingMag', 'Length', 'ILSfreqFlags', 'Width', 'MagVar', 'CentreLatitude', 'CentreLongitude', 'ThresholdOffset', 'Status']
+RUNWAY_END_NUMERIC = ['Latitude', 'Longitude', 'Altitude', 'HeadingMag', 'Length', 'Width', 'MagVar', 'CentreLatitude', 'CentreLongitude', 'ThresholdOffset']
+
+
+def source_times(sources):
+    return {os.path.basename(path): os.path.getmtime(path) for path in sources if os.path.exists(path)}
+
+
+def is_current(path, sources, schema=SCHEMA_VERSION):
+    # True if the database in path was built with this schema from the current source files
+    try:
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return meta.get('schema') == schema and meta.get('sources') == source_times(sources)
+
+
+def text(node, tag, default=''):
+    value = node.findtext(tag)
+    if value is None:
+        return default
+    return value.strip()
+
+
+def number(node, tag):
+    try:
+        return float(node.findtext(tag))
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def read_runways_xml(path):
+    # returns the airport and runway tables as dicts of column lists
+    airports = {c: [] for c in ['id', 'name', 'country', 'state', 'city', 'latitude', 'longitude', 'altitude', 'magvar']}
+    runways = {c: [] for c in ['icao', 'runway', 'heading', 'length', 'latitude', 'longitude', 'threshold_offset', 'ils_freq', 'ils_heading', 'ils_id', 'ils_slope']}
+    root = None
+    icao = None
+    for event, node in et.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            if root is None:
+                root = node
+            elif node.tag == 'ICAO':
+                icao = node.attrib.get('id', '')
+            continue
+        if node.tag == 'Runway':
+            runways['icao'].append(icao)
+            runways['runway'].append(node.attrib.get('id', ''))
+            runways['heading'].append(number(node, 'Hdg'))
+            runways['length'].append(number(node, 'Len'))
+            runways['latitude'].append(number(node, 'Lat'))
+            runways['longitude'].append(number(node, 'Lon'))
+            runways['threshold_offset'].append(number(node, 'ThresholdOffset'))
+            runways['ils_freq'].append(number(node, 'ILSFreq'))
+            runways['ils_heading'].append(number(node, 'ILSHdg'))
+            runways['ils_id'].append(text(node, 'ILSid'))
+            runways['ils_slope'].append(number(node, 'ILSslope'))
+            node.clear()
+        elif node.tag == 'ICAO':
+            airports['id'].append(icao)
+            airports['name'].append(text(node, 'ICAOName'))
+            airports['country'].append(text(node, 'Country'))
+            airports['state'].append(text(node, 'State'))
+            airports['city'].append(text(node, 'City'))
+            airports['latitude'].append(number(node, 'Latitude'))
+            airports['longitude'].append(number(node, 'Longitude'))
+            airports['altitude'].append(number(node, 'Altitude'))
+            airports['magvar'].append(number(node, 'MagVar'))
+            # drop this airport and everything parsed so far
+            root.clear()
+    return airports, runways
+
+
+def read_csv_table(path, columns, numeric):
+    # MakeRunways csv files have no header. Short rows are padded, so optional trailing fields may be missing.
+    table = {c: [] for c in columns}
+    with open(path, newline='', encoding='UTF-8', errors='replace') as f:
+        for row in csv.reader(f):
+            if len(row) < len(columns) - 1:
+                continue
+            row = row + [''] * (len(columns) - len(row))
+            for key, value in zip(columns, row):
+                value = value.strip()
+                if key in numeric:
+                    try:
+                        value = float(value)
+                    except ValueError:
+                        value = np.nan
+                table[key].append(value)
+    return table
+
+
+def column(values):
+    # strings become fixed width unicode columns, everything else float64. Arrays are stored as they are.
+    if isinstance(values, np.ndarray):
+        return values
+    if values and isinstance(values[0], str):
+        return np.array(values, dtype=str)
+    return np.array(values, dtype=np.float64)
+
+
+def build(path, runways_xml=None, gates_csv=None, runways_csv=None):
+    # any source file which is missing is left out of the database
+    sources = []
+    tables = {}
+    if runways_xml is not None and os.path.exists(runways_xml):
+        log.debug(F"importing {runways_xml}")
+        tables['airports'], tables['runways'] = read_runways_xml(runways_xml)
+        sources.append(runways_xml)
+    if gates_csv is not None and os.path.exists(gates_csv):
+        log.debug(F"importing {gates_csv}")
+        tables['gates'] = read_csv_table(gates_csv, GATE_COLUMNS, GATE_NUMERIC)
+        sources.append(gates_csv)
+    if runways_csv is not None and os.path.exists(runways_csv):
+        log.debug(F"importing {runways_csv}")
+        tables['runway_ends'] = read_csv_table(runways_csv, RUNWAY_END_COLUMNS, RUNWAY_END_NUMERIC)
+        sources.append(runways_csv)
+    save(path, tables, sources)
+
+
+def save(path, tables, sources, schema=SCHEMA_VERSION):
+    # tables is {table: {column: list of values}}. Other offline databases are stored the same way.
+    # write to a temporary folder and swap it in, so an interrupted build leaves no half written database
+    temp = path + '.tmp'
+    shutil.rmtree(temp, ignore_errors=True)
+    os.makedirs(temp)
+    meta = {'schema': schema, 'sources': source_times(sources), 'tables': {}}
+    for name, table in tables.items():
+        meta['tables'][name] = list(table.keys())
+        for key, values in table.items():
+            np.save(os.path.join(temp, F"{name}.{key}.npy"), column(values))
+        log.debug(F"{len(next(iter(table.values())))} rows in {name}")
+    with open(os.path.join(temp, META_FILE), 'w') as f:
+        json.dump(meta, f)
+    shutil.rmtree(path, ignore_errors=True)
+    os.replace(temp, path)
+
+
+def load(path):
+    # returns {table: {column: array}}. The arrays are read only views of the memory mapped column files.
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    tables = {}
+    for name, columns in meta['tables'].items():
+        tables[name] = {key: load_column(os.path.join(path, F"{name}.{key}.npy")) for key in columns}
+    return tables
+
+
+def load_column(path):
+    try:
+        return np.load(path, mmap_mode='r')
+    except ValueError:
+        # empty columns can't be mapped
+        return np.load(path)
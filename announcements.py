@@ -0,0 +1,108 @@
+# announcement rules for instrument changes.
+# Rules are read from announcements.ini. Each section is one rule describing which field to watch,
+# which messages to speak and for which aircraft. The rules are compiled into a table keyed by field,
+# so each instrument read only compares the watched fields and only evaluates rules whose field changed.
+# Users can add rules or mute existing ones with a copy of announcements.ini in the config folder.
+import logging
+import os
+from configobj import ConfigObj
+
+log = logging.getLogger("announcements")
+
+
+class Rule:
+    def __init__(self, name, section):
+        self.name = name
+        self.field = section.get('field', name)
+        self.enabled = section.get('enabled', 'true').lower() != 'false'
+        self.priority = int(section.get('priority', 0))
+        self.aircraft = split_list(section.get('aircraft', ''))
+        self.exclude_aircraft = split_list(section.get('exclude_aircraft', ''))
+        self.min_engines = int(section.get('min_engines', 0))
+        # names of runtime switches, such as autopilot announcements, which must be on for this rule
+        self.requires = split_list(section.get('requires', ''))
+        # a rule either maps values to messages, picks a message by on/off, or has one message for any change
+        self.on = section.get('on')
+        self.off = section.get('off')
+        self.message = section.get('message')
+        self.values = {}
+        if 'values' in section:
+            for key, message in section['values'].items():
+                self.values[int(key)] = message
+
+    def applies_to(self, aircraft, num_engines):
+        if self.aircraft and not any(a in aircraft for a in self.aircraft):
+            return False
+        if any(a in aircraft for a in self.exclude_aircraft):
+            return False
+        return num_engines >= self.min_engines
+
+    def evaluate(self, old, new):
+        if self.values:
+            template = self.values.get(new)
+        elif self.on is not None or self.off is not None:
+            template = self.on if new else self.off
+        else:
+            template = self.message
+        if not template:
+            return None
+        return template.format(value=new, old=old)
+
+
+class RuleSet:
+    def __init__(self, *paths):
+        # later files override rules of the same name in earlier ones
+        rules = ConfigObj(encoding='UTF8', list_values=False)
+        for path in paths:
+            if os.path.exists(path):
+                log.debug(F"loading announcement rules from {path}")
+                overrides = ConfigObj(path, encoding='UTF8', list_values=False)
+                # a section replaces the whole rule of that name, so keys it leaves out are not inherited
+                for name in overrides.sections:
+                    if name in rules:
+                        del rules[name]
+                    rules[name] = overrides[name].dict()
+        self.rules = []
+        for name in rules.sections:
+            try:
+                self.rules.append(Rule(name, rules[name]))
+            except Exception as e:
+                log.exception(F"error in announcement rule {name}")
+        self.index = {}
+        # (aircraft, num_engines) the index was built for
+        self.selected = None
+
+    def select(self, aircraft, num_engines):
+        # build the field to rules table for the current aircraft
+        self.index = {}
+        self.selected = (aircraft, num_engines)
+        for rule in self.rules:
+            if rule.enabled and rule.applies_to(aircraft, num_engines):
+                self.index.setdefault(rule.field, []).append(rule)
+        log.debug(F"{len(self.index)} fields watched for {aircraft}")
+
+    def evaluate(self, old, new, switches):
+        # returns the messages for all fields that changed, highest priority first.
+        # switches holds the state of runtime switches named by rule requires lists.
+        triggered = []
+        for field, rules in self.index.items():
+            if field not in new or field not in old:
+                continue
+            if old[field] == new[field]:
+                continue
+            for rule in rules:
+                if not all(switches.get(s, False) for s in rule.requires):
+                    continue
+                try:
+                    message = rule.evaluate(old[field], new[field])
+                except Exception as e:
+                    log.exception(F"error in announcement rule {rule.name}")
+                    continue
+                if message:
+                    triggered.append((rule.priority, message))
+        triggered.sort(key=lambda t: -t[0])
+        return [message for priority, message in triggered]
+
+
+def split_list(value):
+    return [v.strip() for v in value.split(',') if v.strip()]
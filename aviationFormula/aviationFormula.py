@@ -1,44 +1,97 @@
-# uncompyle6 version 3.3.3
-# Python bytecode 2.7 (62211)
-# Decompiled from: Python 3.7.3 (v3.7.3:ef4ec6ed12, Mar 25 2019, 21:26:53) [MSC v.1916 32 bit (Intel)]
-# Embedded file name: C:\Users\jfayr\flight\aviationFormula\aviationFormula.py
-# Compiled at: 2019-05-19 12:59:54
-from math import sin, asin, cos, acos, tan, atan2, sqrt, radians, degrees, pi
+# navigation formulas. Every function takes scalars or NumPy arrays, which are broadcast against
+# each other, so one call can work out distances or bearings to a whole table of points.
+# Latitudes and longitudes are in degrees. As in the original module, great circle and rhumb line
+# distances are angles in radians (multiply by NM_PER_RADIAN or KM_PER_RADIAN) and bearings are
+# true, in radians. vincentyDistance works on the WGS-84 ellipsoid and returns metres.
+import math
+
+import numpy as np
+from numpy import sin, cos, tan, arcsin, arccos, arctan, arctan2, sqrt, radians, degrees, pi
+
+NM_PER_RADIAN = 10800 / pi
+# mean earth radius used by TFM for km distances
+KM_PER_RADIAN = 6367.0
+
+__all__ = ['NM_PER_RADIAN', 'KM_PER_RADIAN', 'normalizeLon', 'gcDistance', 'gcDistanceNm', 'gcDistanceKm', 'gcIntermediatePoint', 'calcBearing', 'gcDestination', 'crossTrackDistance', 'alongTrackDistance', 'gcIntersection', 'rhumbDistance', 'rhumbBearing', 'rhumbDestination', 'vincentyDistance']
+
+WGS84_A = 6378137.0
+WGS84_F = 1 / 298.257223563
+WGS84_B = WGS84_A * (1 - WGS84_F)
+
+
+def _scalar(value):
+    # np.where gives 0-d arrays for scalar inputs
+    value = np.asarray(value)
+    if value.ndim == 0:
+        return value[()]
+    return value
+
+
+# single points given as Python numbers take the math versions, which are several times faster than
+# NumPy on one value and return plain floats. np.float64 is a float, so it qualifies too.
+_NUMBER = (float, int)
+
+
+def normalizeLon(lon):
+    # degrees into -180 to 180
+    return (lon + 540) % 360 - 180
+
 
 def gcDistance(lat1, lon1, lat2, lon2):
+    if isinstance(lat1, _NUMBER) and isinstance(lon1, _NUMBER) and isinstance(lat2, _NUMBER) and isinstance(lon2, _NUMBER):
+        lat1 = math.radians(lat1)
+        lat2 = math.radians(lat2)
+        sLat = math.sin((lat1 - lat2) / 2)
+        sLon = math.sin(math.radians(lon1 - lon2) / 2)
+        a = sLat * sLat + math.cos(lat1) * math.cos(lat2) * sLon * sLon
+        return 2 * math.asin(math.sqrt(min(a, 1.0)))
     lat1 = radians(lat1)
     lon1 = radians(lon1)
     lat2 = radians(lat2)
     lon2 = radians(lon2)
-    return 2 * asin(sqrt(sin((lat1 - lat2) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon1 - lon2) / 2) ** 2))
+    a = sin((lat1 - lat2) / 2) ** 2 + cos(lat1) * cos(lat2) * sin((lon1 - lon2) / 2) ** 2
+    # rounding can take a just past 1 for antipodal points
+    return 2 * arcsin(sqrt(np.minimum(a, 1.0)))
 
 
 def gcDistanceNm(lat1, lon1, lat2, lon2):
-    return 10800 / pi * gcDistance(lat1, lon1, lat2, lon2)
+    return NM_PER_RADIAN * gcDistance(lat1, lon1, lat2, lon2)
+
+
+def gcDistanceKm(lat1, lon1, lat2, lon2):
+    return KM_PER_RADIAN * gcDistance(lat1, lon1, lat2, lon2)
 
 
 def gcIntermediatePoint(lat1, lon1, lat2, lon2, *args):
-    lat1 = radians(lat1)
-    lat2 = radians(lat2)
-    lon1 = radians(lon1)
-    lon2 = radians(lon2)
+    # the point fraction f (default 0.5) of the way along the great circle from point 1 to point 2
     if len(args):
         f = args[0]
     else:
         f = 0.5
     d = gcDistance(lat1, lon1, lat2, lon2)
+    lat1 = radians(lat1)
+    lat2 = radians(lat2)
+    lon1 = radians(lon1)
+    lon2 = radians(lon2)
     A = sin((1 - f) * d) / sin(d)
     B = sin(f * d) / sin(d)
     x = A * cos(lat1) * cos(lon1) + B * cos(lat2) * cos(lon2)
     y = A * cos(lat1) * sin(lon1) + B * cos(lat2) * sin(lon2)
     z = A * sin(lat1) + B * sin(lat2)
-    lat = atan2(z, sqrt(x ** 2 + y ** 2))
-    lon = atan2(y, x)
+    lat = arctan2(z, sqrt(x ** 2 + y ** 2))
+    lon = arctan2(y, x)
     return [
      degrees(lat), degrees(lon)]
 
 
 def calcBearing(lat1, lon1, lat2, lon2):
+    # initial great circle bearing from point 1 to point 2, -pi to pi
+    if isinstance(lat1, _NUMBER) and isinstance(lon1, _NUMBER) and isinstance(lat2, _NUMBER) and isinstance(lon2, _NUMBER):
+        lat1 = math.radians(lat1)
+        lat2 = math.radians(lat2)
+        dLon = math.radians(lon2 - lon1)
+        cosLat2 = math.cos(lat2)
+        return math.atan2(math.sin(dLon) * cosLat2, math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * cosLat2 * math.cos(dLon))
     lat1 = radians(lat1)
     lat2 = radians(lat2)
     lon1 = radians(lon1)
@@ -46,4 +99,128 @@ def calcBearing(lat1, lon1, lat2, lon2):
     dLon = lon2 - lon1
     y = sin(dLon) * cos(lat2)
     x = cos(lat1) * sin(lat2) - sin(lat1) * cos(lat2) * cos(dLon)
-    return atan2(y, x)
\ No newline at end of file
+    return arctan2(y, x)
+
+
+def gcDestination(lat, lon, bearing, distance):
+    # the point distance radians along the great circle leaving lat, lon on bearing
+    lat1 = radians(lat)
+    lon1 = radians(lon)
+    lat2 = arcsin(sin(lat1) * cos(distance) + cos(lat1) * sin(distance) * cos(bearing))
+    lon2 = lon1 + arctan2(sin(bearing) * sin(distance) * cos(lat1), cos(distance) - sin(lat1) * sin(lat2))
+    return [
+     degrees(lat2), normalizeLon(degrees(lon2))]
+
+
+def crossTrackDistance(lat1, lon1, lat2, lon2, lat3, lon3):
+    # distance of point 3 from the great circle path from point 1 to point 2, positive right of the path
+    d13 = gcDistance(lat1, lon1, lat3, lon3)
+    b13 = calcBearing(lat1, lon1, lat3, lon3)
+    b12 = calcBearing(lat1, lon1, lat2, lon2)
+    return arcsin(sin(d13) * sin(b13 - b12))
+
+
+def alongTrackDistance(lat1, lon1, lat2, lon2, lat3, lon3):
+    # distance from point 1 to the point on the path to point 2 nearest point 3, negative if that is behind point 1
+    d13 = gcDistance(lat1, lon1, lat3, lon3)
+    b13 = calcBearing(lat1, lon1, lat3, lon3)
+    b12 = calcBearing(lat1, lon1, lat2, lon2)
+    xt = arcsin(sin(d13) * sin(b13 - b12))
+    return arccos(np.clip(cos(d13) / cos(xt), -1, 1)) * np.sign(cos(b12 - b13))
+
+
+def gcIntersection(lat1, lon1, bearing1, lat2, lon2, bearing2):
+    # where the path leaving point 1 on bearing1 meets the path leaving point 2 on bearing2, such as
+    # intercepting a radial. nan where the paths don't meet ahead of both points.
+    phi1 = radians(lat1)
+    phi2 = radians(lat2)
+    lam1 = radians(lon1)
+    lam2 = radians(lon2)
+    d12 = gcDistance(lat1, lon1, lat2, lon2)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ta = arccos(np.clip((sin(phi2) - sin(phi1) * cos(d12)) / (sin(d12) * cos(phi1)), -1, 1))
+        tb = arccos(np.clip((sin(phi1) - sin(phi2) * cos(d12)) / (sin(d12) * cos(phi2)), -1, 1))
+    east = sin(lam2 - lam1) > 0
+    b12 = np.where(east, ta, 2 * pi - ta)
+    b21 = np.where(east, 2 * pi - tb, tb)
+    a1 = bearing1 - b12
+    a2 = b21 - bearing2
+    a3 = arccos(-cos(a1) * cos(a2) + sin(a1) * sin(a2) * cos(d12))
+    d13 = arctan2(sin(d12) * sin(a1) * sin(a2), cos(a2) + cos(a1) * cos(a3))
+    lat3 = arcsin(sin(phi1) * cos(d13) + cos(phi1) * sin(d13) * cos(bearing1))
+    lon3 = lam1 + arctan2(sin(bearing1) * sin(d13) * cos(phi1), cos(d13) - sin(phi1) * sin(lat3))
+    invalid = (d12 == 0) | (sin(a1) * sin(a2) <= 0)
+    return [
+     _scalar(np.where(invalid, np.nan, degrees(lat3))), _scalar(np.where(invalid, np.nan, normalizeLon(degrees(lon3))))]
+
+
+def _rhumb(phi1, phi2):
+    # stretched latitude difference of the Mercator projection, and the ratio of true to stretched latitude difference
+    dpsi = np.log(tan(pi / 4 + phi2 / 2) / tan(pi / 4 + phi1 / 2))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        q = np.where(np.abs(dpsi) > 1e-12, (phi2 - phi1) / dpsi, cos(phi1))
+    return dpsi, q
+
+
+def rhumbDistance(lat1, lon1, lat2, lon2):
+    phi1 = radians(lat1)
+    phi2 = radians(lat2)
+    dlon = (radians(lon2) - radians(lon1) + pi) % (2 * pi) - pi
+    dpsi, q = _rhumb(phi1, phi2)
+    return sqrt((phi2 - phi1) ** 2 + (q * dlon) ** 2)
+
+
+def rhumbBearing(lat1, lon1, lat2, lon2):
+    # constant bearing from point 1 to point 2, -pi to pi
+    phi1 = radians(lat1)
+    phi2 = radians(lat2)
+    dlon = (radians(lon2) - radians(lon1) + pi) % (2 * pi) - pi
+    dpsi, q = _rhumb(phi1, phi2)
+    return arctan2(dlon, dpsi)
+
+
+def rhumbDestination(lat, lon, bearing, distance):
+    # the point distance radians along the rhumb line leaving lat, lon on bearing
+    phi1 = radians(lat)
+    phi2 = np.clip(phi1 + distance * cos(bearing), -pi / 2, pi / 2)
+    dpsi, q = _rhumb(phi1, phi2)
+    lon2 = radians(lon) + distance * sin(bearing) / q
+    return [
+     degrees(phi2), normalizeLon(degrees(lon2))]
+
+
+def vincentyDistance(lat1, lon1, lat2, lon2, iterations=200, tolerance=1e-12):
+    # metres between the points on the WGS-84 ellipsoid, by Vincenty's inverse formula.
+    # All points are iterated together. nan where it doesn't converge, which only happens for nearly antipodal points.
+    f = WGS84_F
+    L = radians(np.asarray(lon2, dtype=np.float64) - lon1)
+    U1 = arctan((1 - f) * tan(radians(lat1)))
+    U2 = arctan((1 - f) * tan(radians(lat2)))
+    sinU1, cosU1 = sin(U1), cos(U1)
+    sinU2, cosU2 = sin(U2), cos(U2)
+    L, sinU1, cosU1, sinU2, cosU2 = np.broadcast_arrays(L, sinU1, cosU1, sinU2, cosU2)
+    lam = L.copy()
+    converged = np.zeros(lam.shape, dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for i in range(iterations):
+            sinLam = sin(lam)
+            cosLam = cos(lam)
+            sinSigma = sqrt((cosU2 * sinLam) ** 2 + (cosU1 * sinU2 - sinU1 * cosU2 * cosLam) ** 2)
+            cosSigma = sinU1 * sinU2 + cosU1 * cosU2 * cosLam
+            sigma = arctan2(sinSigma, cosSigma)
+            sinAlpha = np.where(sinSigma == 0, 0.0, cosU1 * cosU2 * sinLam / sinSigma)
+            cos2Alpha = 1 - sinAlpha ** 2
+            # points on the equator
+            cos2SigmaM = np.where(cos2Alpha == 0, 0.0, cosSigma - 2 * sinU1 * sinU2 / cos2Alpha)
+            C = f / 16 * cos2Alpha * (4 + f * (4 - 3 * cos2Alpha))
+            previous = lam
+            lam = L + (1 - C) * f * sinAlpha * (sigma + C * sinSigma * (cos2SigmaM + C * cosSigma * (-1 + 2 * cos2SigmaM ** 2)))
+            converged = np.abs(lam - previous) <= tolerance
+            if converged.all():
+                break
+        u2 = cos2Alpha * (WGS84_A ** 2 - WGS84_B ** 2) / WGS84_B ** 2
+        A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+        B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+        deltaSigma = B * sinSigma * (cos2SigmaM + B / 4 * (cosSigma * (-1 + 2 * cos2SigmaM ** 2) - B / 6 * cos2SigmaM * (-3 + 4 * sinSigma ** 2) * (-3 + 4 * cos2SigmaM ** 2)))
+        s = WGS84_B * A * (sigma - deltaSigma)
+    return _scalar(np.where(converged, s, np.nan))
@@ -0,0 +1,55 @@
+# timings of the navigation formulas, for one point and for a table of points.
+# Run with python -m aviationFormula.benchmark. The scalar math versions are the formulas the
+# module used before it took arrays, kept here to compare against.
+import math
+import timeit
+
+import numpy as np
+
+from aviationFormula.aviationFormula import *
+
+
+def scalarDistance(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    return 2 * math.asin(math.sqrt(math.sin((lat1 - lat2) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon1 - lon2) / 2) ** 2))
+
+
+def scalarBearing(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    dLon = lon2 - lon1
+    return math.atan2(math.sin(dLon) * math.cos(lat2), math.cos(lat1) * math.sin(lat2) - math.sin(lat1) * math.cos(lat2) * math.cos(dLon))
+
+
+def report(name, seconds, count):
+    print(F"{name:40} {seconds / count * 1e6:10.2f} us per point")
+
+
+def main(points=10000, repeat=5):
+    rng = np.random.default_rng(1)
+    lats = rng.uniform(-80, 80, points)
+    lons = rng.uniform(-180, 180, points)
+    lat, lon = 51.47, -0.46
+    pairs = list(zip(lats.tolist(), lons.tolist()))
+    timings = [
+        ('math gcDistance loop', lambda: [scalarDistance(lat, lon, a, b) for a, b in pairs], points),
+        ('math calcBearing loop', lambda: [scalarBearing(lat, lon, a, b) for a, b in pairs], points),
+        ('gcDistance one point', lambda: gcDistance(lat, lon, pairs[0][0], pairs[0][1]), 1),
+        ('calcBearing one point', lambda: calcBearing(lat, lon, pairs[0][0], pairs[0][1]), 1),
+        ('gcDistance array', lambda: gcDistance(lat, lon, lats, lons), points),
+        ('calcBearing array', lambda: calcBearing(lat, lon, lats, lons), points),
+        ('gcDestination array', lambda: gcDestination(lat, lon, 1.0, lats / 1000), points),
+        ('crossTrackDistance array', lambda: crossTrackDistance(lat, lon, 40.64, -73.78, lats, lons), points),
+        ('alongTrackDistance array', lambda: alongTrackDistance(lat, lon, 40.64, -73.78, lats, lons), points),
+        ('gcIntersection array', lambda: gcIntersection(lat, lon, 1.0, lats, lons, 4.0), points),
+        ('rhumbDistance array', lambda: rhumbDistance(lat, lon, lats, lons), points),
+        ('vincentyDistance one point', lambda: vincentyDistance(lat, lon, lats[0], lons[0]), 1),
+        ('vincentyDistance array', lambda: vincentyDistance(lat, lon, lats, lons), points),
+    ]
+    for name, function, count in timings:
+        number = max(1, 1000 // count) if count == 1 else 1
+        seconds = min(timeit.repeat(function, number=number, repeat=repeat)) / number
+        report(name, seconds, count)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# threshold crossing detection for altitude, GPWS and speed callouts.
+# GPWS radio altitude is sampled a few times a second. Rather than waiting for a sample to land
+# close to a callout altitude, we track the descent rate and schedule each callout for the
+# moment the aircraft is predicted to cross it, less the time it takes the sound to start.
+from bisect import bisect_right
+
+# minimum descent rate in feet per second before callouts are made (about 50 feet per minute)
+MIN_DESCENT_RATE = 50 / 60
+
+
+class CrossingDetector:
+    # reports thresholds crossed between two samples, in either direction, however far apart
+    # the samples are. Each update costs a binary search over the sorted thresholds.
+    # Each threshold is armed separately for each direction. Reporting a crossing disarms the
+    # threshold both ways. Downward crossings are armed again once the value has gone hysteresis
+    # above it and upward crossings once it has gone hysteresis below, so hovering around a
+    # threshold doesn't repeat it.
+    def __init__(self, thresholds, hysteresis=0):
+        self.thresholds = sorted(thresholds)
+        self.hysteresis = hysteresis
+        # number of thresholds at or below the last value
+        self.index = None
+        # thresholds waiting to be armed again, for each direction
+        self.disarmed_up = set()
+        self.disarmed_down = set()
+
+    def update(self, value):
+        # returns a list of (threshold, direction) in the order they were crossed. direction is 1 for up, -1 for down.
+        index = bisect_right(self.thresholds, value)
+        if self.index is None:
+            self.index = index
+            return []
+        if self.disarmed_down:
+            self.disarmed_down = {t for t in self.disarmed_down if value < t + self.hysteresis}
+        if self.disarmed_up:
+            self.disarmed_up = {t for t in self.disarmed_up if value > t - self.hysteresis}
+        if index == self.index:
+            return []
+        if index > self.index:
+            direction = 1
+            crossed = self.thresholds[self.index:index]
+            disarmed = self.disarmed_up
+        else:
+            direction = -1
+            crossed = self.thresholds[index:self.index][::-1]
+            disarmed = self.disarmed_down
+        self.index = index
+        reported = [t for t in crossed if t not in disarmed]
+        self.disarmed_up.update(reported)
+        self.disarmed_down.update(reported)
+        return [(t, direction) for t in reported]
+
+
+class AlphaBetaFilter:
+    # tracks a value and its rate of change from noisy samples.
+    def __init__(self, alpha=0.6, beta=0.2):
+        self.alpha = alpha
+        self.beta = beta
+        self.value = None
+        self.rate = 0.0
+        self.timestamp = None
+
+    def update(self, value, timestamp):
+        if self.timestamp is None:
+            self.value = value
+            self.timestamp = timestamp
+            return self.value, self.rate
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return self.value, self.rate
+        predicted = self.value + self.rate * dt
+        residual = value - predicted
+        self.value = predicted + self.alpha * residual
+        self.rate = self.rate + self.beta * residual / dt
+        self.timestamp = timestamp
+        return self.value, self.rate
+
+
+class CalloutPredictor:
+    # decides when each radio altitude callout should be played.
+    def __init__(self, thresholds, latency=0.15, rearm=100):
+        # seconds between starting playback and the callout being heard
+        self.latency = latency
+        # a callout is armed again once the aircraft climbs this far above it, such as after a go around
+        self.rearm = rearm
+        self.detector = CrossingDetector(thresholds, hysteresis=rearm)
+        self.thresholds = self.detector.thresholds
+        self.called = set()
+        self.filter = AlphaBetaFilter()
+
+    def update(self, altitude, timestamp, interval):
+        # returns a list of (threshold, delay) pairs. delay is the number of seconds from now
+        # the callout should be started. interval is the expected time until the next sample.
+        value, rate = self.filter.update(altitude, timestamp)
+        due = []
+        missed = None
+        if self.called:
+            self.called = {t for t in self.called if altitude < t + self.rearm}
+        for t, direction in self.detector.update(altitude):
+            if direction < 0 and t not in self.called:
+                # crossed between two samples, too quickly to be predicted
+                self.called.add(t)
+                missed = t
+        # if several callouts were skipped at once, only the lowest is still worth hearing
+        if missed is not None:
+            due.append((missed, 0.0))
+        # every callout we will reach before the next sample is due, predicted from the filtered altitude and rate
+        i = bisect_right(self.thresholds, value)
+        while i > 0 and rate < -MIN_DESCENT_RATE:
+            i -= 1
+            t = self.thresholds[i]
+            time_to_cross = (value - t) / -rate
+            if time_to_cross - self.latency >= interval:
+                break
+            if t not in self.called:
+                self.called.add(t)
+                due.append((t, max(0.0, time_to_cross - self.latency)))
+        return due
@@ -118,6 +118,8 @@ class hotkeys(wx.Panel, baseDialog.BaseWXDialog):
     self.mute_simconnect_key = wx.TextCtrl(self, -1)
     self.toggle_ils_label = wx.StaticText(self, wx.ID_ANY, "Toggle ILS announcements: ")
     self.toggle_ils_key = wx.TextCtrl(self, -1)
+    self.ils_tones_label = wx.StaticText(self, wx.ID_ANY, "ILS tone mode: ")
+    self.ils_tones_key = wx.TextCtrl(self, -1)
     self.autopilot_label = wx.StaticText(self, wx.ID_ANY, "Toggle autopilot announcements: ")
     self.autopilot_key = wx.TextCtrl(self, -1)
     self.wind_label = wx.StaticText(self, wx.ID_ANY, "Wind information: ")
@@ -215,6 +217,8 @@ class hotkeys(wx.Panel, baseDialog.BaseWXDialog):
                  (self.toggle_gpws_key, expandOption),
                  (self.toggle_ils_label, noOptions),
                  (self.toggle_ils_key, expandOption),
+                 (self.ils_tones_label, noOptions),
+                 (self.ils_tones_key, expandOption),
                  (self.toggle_flaps_label, noOptions),
                  (self.toggle_flaps_key, expandOption),
                  (self.autopilot_label, noOptions),
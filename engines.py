@@ -0,0 +1,120 @@
+# engine model.
+# FSUIPC keeps the values for each engine in blocks with a fixed stride between engines, so the
+# four engines of each block are read in one go and mapped onto NumPy structured arrays, one
+# record per engine. Start sequence milestones are then checked for every engine at once.
+import numpy as np
+
+MAX_ENGINES = 4
+
+# (offset, bytes) of the engine blocks, read as the engine_*, turbine_*, starter_* and fuel_valve_*
+# entries of fsdata.InstrOffsets
+
+# 0x088C, one 0x98 byte record per engine
+ENGINE_BLOCK = (0x088c, 0x98 * MAX_ENGINES)
+ENGINE_RECORD = np.dtype({
+    'names': ['Combustion', 'ITT', 'fuel_flow'],
+    'formats': ['<u2', '<u4', '<f8'],
+    'offsets': [0x08, 0x64, 0x8c],
+    'itemsize': 0x98,
+})
+
+# turbine engine data, one 0x100 byte record per engine from 0x2000
+TURBINE_BLOCK = (0x2000, 0x100 * MAX_ENGINES)
+TURBINE_RECORD = np.dtype({
+    'names': ['N1', 'N2', 'FuelFlow'],
+    'formats': ['<f8', '<f8', '<f8'],
+    'offsets': [0x10, 0x18, 0x60],
+    'itemsize': 0x100,
+})
+
+# starter and generator switches, one 0xC0 byte record per engine from 0x38C0, engine 4 first
+SWITCH_BLOCK = (0x38c0, 0xc0 * MAX_ENGINES)
+SWITCH_RECORD = np.dtype({
+    'names': ['Starter', 'Generator'],
+    'formats': ['<u4', '<u4'],
+    'offsets': [0x00, 0x7c],
+    'itemsize': 0xc0,
+})
+
+# fuel valves, 4 bytes per engine from 0x3590
+FUEL_VALVE_BLOCK = (0x3590, 4 * MAX_ENGINES)
+
+# fsdata.instr keys each field is also published under, so announcement rules can watch them
+INSTR_KEYS = {
+    'Combustion': 'Eng{}Combustion',
+    'ITT': 'Eng{}ITT',
+    'fuel_flow': 'eng{}_fuel_flow',
+    'N1': 'Eng{}N1',
+    'N2': 'Eng{}N2',
+    'FuelFlow': 'Eng{}FuelFlow',
+    'Starter': 'Eng{}Starter',
+    'Generator': 'Eng{}Generator',
+    'FuelValve': 'Eng{}FuelValve',
+}
+
+# start sequence milestones, in the order they are announced: (field, threshold, message)
+MILESTONES = [
+    ('N2', 5, 'number {}, 5 percent N2'),
+    ('N1', 5, 'number {}, 5 percent N1'),
+    ('FuelFlow', 10, 'Number {} fuel flow'),
+]
+
+
+class Engines:
+    # the values of all engines, one array entry per engine, decoded from the raw engine blocks
+    def __init__(self, engine_block, turbine_block, switch_block, fuel_valve_block, count=MAX_ENGINES):
+        # count is the number of engines the aircraft has
+        self.count = min(max(int(count), 0), MAX_ENGINES)
+        engine = np.frombuffer(engine_block, dtype=ENGINE_RECORD, count=MAX_ENGINES)
+        turbine = np.frombuffer(turbine_block, dtype=TURBINE_RECORD, count=MAX_ENGINES)
+        switches = np.frombuffer(switch_block, dtype=SWITCH_RECORD, count=MAX_ENGINES)[::-1]
+        self.fields = {
+            'Combustion': engine['Combustion'].astype(np.int64),
+            # degrees C * 16384
+            'ITT': np.round(engine['ITT'] / 16384).astype(np.int64),
+            # pounds per hour
+            'fuel_flow': engine['fuel_flow'].copy(),
+            'N1': turbine['N1'].copy(),
+            'N2': turbine['N2'].copy(),
+            'FuelFlow': turbine['FuelFlow'].copy(),
+            'Starter': switches['Starter'].astype(np.int64),
+            'Generator': switches['Generator'].astype(np.int64),
+            'FuelValve': np.frombuffer(fuel_valve_block, dtype='<u4', count=MAX_ENGINES).astype(np.int64),
+        }
+
+    def __getitem__(self, name):
+        # the field for the engines the aircraft has
+        return self.fields[name][:self.count]
+
+    def publish(self, instr):
+        # store every field under its per engine instr key, such as Eng1N1
+        for name, key in INSTR_KEYS.items():
+            for i, value in enumerate(self.fields[name].tolist()):
+                instr[key.format(i + 1)] = value
+
+    @property
+    def total_fuel_flow(self):
+        return float(self['fuel_flow'].sum())
+
+
+class StartMonitor:
+    # announces the start sequence milestones of each engine once per start.
+    # An engine's milestones are armed again once it has been shut down, so a restart is announced too.
+    def __init__(self):
+        # engines x milestones already announced
+        self.announced = np.zeros((MAX_ENGINES, len(MILESTONES)), dtype=bool)
+
+    def update(self, engines):
+        # returns the messages for milestones reached since the last update, in engine order
+        starter = engines.fields['Starter'] != 0
+        reached = np.column_stack([engines.fields[field] > threshold for field, threshold, message in MILESTONES])
+        reached &= starter[:, None]
+        reached[engines.count:] = False
+        new = reached & ~self.announced
+        self.announced |= new
+        stopped = (engines.fields['N2'] < 1) & (engines.fields['FuelFlow'] <= 0) & ~starter
+        self.announced[stopped] = False
+        messages = []
+        for engine, milestone in zip(*np.nonzero(new)):
+            messages.append(MILESTONES[milestone][2].format(engine + 1))
+        return messages
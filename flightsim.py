@@ -6,45 +6,34 @@ import sys
 import threading
 import concurrent.futures
 import time
-from dataclasses import dataclass
-from io import BytesIO 
 from collections import namedtuple
 from operator import itemgetter
-import struct
 from math import degrees, floor
 
 import numpy as np
-import pandas as pd
-import xml.etree.ElementTree as et 
 import pyglet
-import requests
 import wx
 from aviationFormula.aviationFormula import *
-from babel import Locale
-from babel.dates import get_timezone, get_timezone_name
 from pubsub import pub
 import fsdata
+import fuel
+import engines
+import sonification
+import callouts
+import announcements
+import tcas
+import geoindex
+import geocache
 import application
 import config
+import paths
 import pyuipc
+import startup
 from logger import logger
 
 log = logging.getLogger("tfm")
 l = threading.Lock()
         
-# Data class for fuel tanks
-# We don't strictly need to use a dataclass here, it was a bit of an experiment
-@dataclass
-class tank:
-    present: bool = False
-    key: int = 0
-    name: str = ""
-    capacity: int = 0
-    percent: float = 0.0
-    weight: float = 0.0
-    quantity: float = 0.0
-
-
 # Main Class of tfm.
 class TFM(threading.Thread):
     # Setup the tfm object.
@@ -70,6 +59,7 @@ class TFM(threading.Thread):
                 self.pyuipcSIMC = pyuipc.prepare_data(list(fsdata.SimCOffsets.values()))
                 log.debug("preparing attitude mode offsets")
                 self.pyuipcAttitude = pyuipc.prepare_data(list(fsdata.AttitudeOffsets.values()))
+                self.pyuipcILS = pyuipc.prepare_data(list(fsdata.ILSOffsets.values()))
                 self.pyuipcBonanza = pyuipc.prepare_data(list(fsdata.BonanzaOffsets.values()))
                 self.pyuipcCherokee = pyuipc.prepare_data(list(fsdata.CherokeeOffsets.values()))
                 self.pyuipcC172 = pyuipc.prepare_data(list(fsdata.C172Offsets.values()))
@@ -83,69 +73,49 @@ class TFM(threading.Thread):
             except Exception as e:
                 log.error('error initializing fsuipc: ' + str(e))
                 time.sleep(20)
-        # load runway and gate csv files into pandas data frames
-        
-        r_names = ['ICAO', 'Rwy', 'Latitude', 'Longitude', 'Altitude', 'HeadingMag', 'Length', 'ILSfreqFlags', 'Width', 'MagVar', 'CentreLatitude', 'CentreLongitude', 'ThresholdOffset', 'Status']
-        r_types = {
-            'ICAO': 'object',
-            'Rwy': 'object',
-            'Latitude': 'float64',
-            'Longitude': 'float64',
-            'Altitude': 'float64',
-            'HeadingMag': 'float64',
-            'Length': 'float64',
-            'ILSfreqFlags': 'object',
-            'Width': 'float64',
-            'MagVar': 'int64',
-            'CentreLatitude': 'float64',
-            'CentreLongitude': 'float64',
-            'ThresholdOffset': 'float64',
-            'Status': 'object'
-        }
-        
-        if os.path.exists('data/r5.csv'):
-            log.debug("loading runway database")
-            self.r_data = pd.read_csv('data/r5.csv', names=r_names, index_col=False)
-            self.r_data['ICAO'] = self.r_data['ICAO'].astype("object")
-            self.r_data['Rwy'] = self.r_data['Rwy'].astype("object")
-            self.runways_available = True
-        else:
-            log.debug("r5.csv file not found in data directory. Functionality of online ground traffic will be limited.")
-            self.runways_available = False
-        if os.path.exists('data/g5.csv'):
-            log.debug("loading airport gates database")
-            g_names = ['ICAO', 'GateName', 'GateNumber', 'Latitude', 'Longitude', 'Radius', 'HeadingTrue', 'GateType', 'AirlineCodeList']
-            self.g_data = pd.read_csv('data/g5.csv', names=g_names)
-            self.g_data['GateName'] = self.g_data['GateName'].astype('object')
-            self.gates_available = True
-        else:
-            log.debug("g5.csv file not found in data directory. Functionality of online ground traffic will be limited")
-            self.gates_available = False
-        if os.path.exists('data/airports.dat'):
-            log.debug ("found airport database.")
-            self.a_data = pd.read_pickle('data/airports.dat')
-            self.airports_available = True
-        elif os.path.exists('data/runways.xml'):
-            log.debug ("no airport database, but found runways.xml. Building database")
-            self.build_airport_database()
-            self.a_data = pd.read_pickle('data/airports.dat')
-            self.airports_available = True
-        else:
-            log.debug("no airport data found")
-            self.airports_available = False
-            wx.MessageBox("Airport data not available. Reading of ground traffic will not function. See instructions in the tfm.html file.", "error", wx.OK | wx.ICON_ERROR)
-        
+        startup.mark("FSUIPC connected")
+        # airport, gate and runway data and the modules only needed by flight following are loaded
+        # in the background, so polling and speech start straight away
+        self.airportDataLoaded = threading.Event()
+        self.airports_available = False
+        self.runways_available = False
+        self.gates_available = False
+        # offline closest city lookups. None until loaded, flight following uses GeoNames until then
+        self.geocoder = None
+        # offline timezone lookups. None until loaded, flight following uses GeoNames until then
+        self.timezones = None
+        # offline water body lookups, and the body of water the aircraft was last over. None over land
+        self.water = None
+        self.waterBody = None
+        self.waterChecked = False
+        # web lookups for flight following, cached by tile across restarts
+        self.geoCache = None
+        if self.FFEnabled and self.geoCacheEnabled:
+            try:
+                self.geoCache = geocache.GeoCache('data/geocache.db', self.geoCacheDays * 86400)
+            except Exception as e:
+                log.exception("error opening flight following cache")
+        # flight following reports in progress. Only the newest is announced
+        self.ffPool = concurrent.futures.ThreadPoolExecutor(max_workers=3, thread_name_prefix="flight following")
+        self.ffLock = threading.Lock()
+        self.ffRequest = 0
+        # (function, args) to be called on the polling thread, such as finished flight following reports
+        self.calls = queue.Queue()
+        # route prefetches run one at a time on their own thread, so they never hold up a report
+        self.prefetchPool = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self.prefetching = []
+        self.http = None
+        # when the last scheduled flight following report was given, used to predict where the next ones will be
+        self.ffScheduled = time.time()
+        threading.Thread(target=self.deferred_startup, name="deferred startup", daemon=True).start()
         self.cached_airport = None
         # variables to track states of various aircraft instruments
         self.oldAircraftName = None
-        self.flag_a2a = None
-        self.old_a2a_bat = None
-        self.old_a2a_ttl = None
-        self.old_a2a_ttr = None
-        self.old_a2a_tt = None
-        self.old_a2a_fsel = None
-        self.old_a2a_window = None
-        self.old_a2a_fan = None
+        # rules for switches, radios and other instruments announced when they change.
+        # A copy of announcements.ini in the config folder overrides the bundled rules.
+        self.announcementRules = announcements.RuleSet(
+            os.path.join(paths.app_path(), 'announcements.ini'),
+            os.path.join(paths.config_path(), 'announcements.ini'))
         self.tfh = None
         self.adjust_heat = False
         self.defrost_level = None
@@ -166,109 +136,50 @@ class TFM(threading.Thread):
         self.HasLoc = False
         self.oldHPA = 0
         self.groundSpeed =False
-        self.Eng1FuelFlow = False
-        self.Eng2FuelFlow = False
-        self.Eng3FuelFlow = False
-        self.Eng4FuelFlow = False
-        self.Eng1N1 = False
-        self.Eng1N2 = False
-        self.Eng2N1 = False
-        self.Eng2N2 = False
-        self.Eng3N1 = False
-        self.Eng3N2 = False
-        self.Eng4N1 = False
-        self.Eng4N2 = False
+        # engine start milestones already announced
+        self.engineStart = engines.StartMonitor()
         self.APUStarting = False
         self.APUShutdown = False
         self.APURunning = False
         self.APUGenerator = False
         self.APUOff = True
 
-        # variables for GPWS announcements.
-        self.calloutsHigh = [2500, 1000, 500, 400, 300, 200, 100]
-        self.calloutsLow = [50, 40, 30, 20, 10]
-        # dictionary to track if callouts have been announced
-        self.calloutState = {
-            2500: False,
-            1000: False,
-            500: False,
-            400: False,
-            300: False,
-            200: False,
-            100: False,
-            50: False,
-            40: False,
-            30: False,
-            20: False,
-            10: False}
-        # variables to track all altitude callouts
-        self.altFlag = {}
-        for i in range(1000, 65000, 1000):
-            self.altFlag[i] = False
+        # GPWS callouts. Sounds are decoded up front so they start as soon as they are scheduled.
+        self.calloutInterval = 0.1
+        self.calloutPredictor = callouts.CalloutPredictor([2500, 1000, 500, 400, 300, 200, 100, 50, 40, 30, 20, 10], latency=self.calloutLatency)
+        self.calloutSounds = {}
+        for i in self.calloutPredictor.thresholds:
+            self.calloutSounds[i] = pyglet.media.StaticSource(pyglet.media.load(F'sounds\\{str(i)}.wav'))
+        # altitude callouts every 1000 feet, and airspeed callouts on the takeoff roll
+        self.altitudeCrossings = callouts.CrossingDetector(range(1000, 65000, 1000), hysteresis=100)
+        self.speedCrossings = callouts.CrossingDetector(self.speedCallouts, hysteresis=10)
 
         self.trimEnabled = True
         self.MuteSimC = False
         self.CachedMessage = {}
         self.flapsEnabled = True
 
-        # set up tone arrays and player objects for sonification.
-        # arrays for holding tone frequency values
-        self.DownTones = {}
-        self.UpTones = {}
-        # envelopes for tone playback
-        self.decay = pyglet.media.synthesis.LinearDecayEnvelope()
-        self.flat = pyglet.media.synthesis.FlatEnvelope(0.3)
-
-        # grab 200 equal values across a range of numbers for aircraft pitch. Negative number is pitch up.
-        self.PitchUpVals = np.around(np.linspace(-0.1, -20, 200), 1)
-        self.PitchDownVals = np.around(np.linspace(0.1, 20, 200), 1)
-        self.PitchUpFreqs = np.linspace(2, 4, 200)
-        self.PitchDownFreqs = np.linspace(1.5, 0.5, 200)
-        self.BankFreqs = np.linspace(1, 4, 90)
-        self.BankTones = {}
-        countDown = 0
-        countUp = 0
-        for i in np.arange(1.0, 90.0, 1):
-            self.BankTones[i] = self.BankFreqs[countUp]
-            countUp += 1
-
-
-        countDown = 0
-        countUp = 0
-
-        for i in self.PitchDownVals:
-            self.DownTones[i]  = self.PitchDownFreqs[countDown]
-            countDown += 1
-
-        for i in self.PitchUpVals:
-            self.UpTones[i] = self.PitchUpFreqs[countUp]
-            countUp += 1
-
-
-            
+        # tone mappings for sonification. Pitch and bank values map to a multiplier of the base tone frequency.
+        self.PitchDownMap = sonification.ToneMap(0.1, 20, 1.5, 0.5, self.tone_curve)
+        self.PitchUpMap = sonification.ToneMap(0.1, 20, 2, 4, self.tone_curve)
+        self.BankMap = sonification.ToneMap(1, 90, 1, 4, self.tone_curve)
+        self.HeadingMap = sonification.ToneMap(0, 45, 1, 4, self.tone_curve)
+        # glide slope needle up raises the ILS tone an octave, needle down lowers it an octave
+        self.GlideslopeUpMap = sonification.ToneMap(0, 119, 1, 2, self.tone_curve)
+        self.GlideslopeDownMap = sonification.ToneMap(0, 119, 1, 0.5, self.tone_curve)
 
         # track state of various modes
         self.sonifyEnabled = False
         self.manualEnabled = False
         self.directorEnabled = False
+        self.ILSTonesEnabled = False
         self.APEnabled = False
-        # instantiate sound player objects for attitude and flight director modes
-        self.PitchUpPlayer = pyglet.media.Player       ()
-        self.PitchDownPlayer = pyglet.media.Player()
-        self.BankPlayer = pyglet.media.Player()
-        # enable looping
-        self.PitchUpPlayer.loop = True
-        self.PitchDownPlayer.loop = True
-        self.BankPlayer.loop = True
-        # synthesis media sources for sonification modes
-        self.PitchUpSource = pyglet.media.StaticSource(pyglet.media.synthesis.Triangle(duration=10, frequency=440, envelope=self.flat))
-        self.PitchDownSource = pyglet.media.StaticSource(pyglet.media.synthesis.Sine(duration=10, frequency=440, envelope = self.flat))
-        self.BankSource = pyglet.media.StaticSource(pyglet.media.synthesis.Triangle(duration=0.3, frequency=200, envelope=self.decay))
-        # queue the sources onto the players
-        self.PitchUpPlayer.queue(self.PitchUpSource)
-        self.PitchDownPlayer.queue(self.PitchDownSource)
-        self.BankPlayer.queue(self.BankSource)
-        self.BankPlayer.min_distance = 10
+        # streaming tone generator for attitude, flight director and runway guidance modes.
+        # The player runs continuously, the modes only change the tones it generates.
+        self.tones = sonification.ToneGenerator()
+        self.tone_player = pyglet.media.Player()
+        self.tone_player.queue(self.tones)
+        self.tone_player.play()
         # dictionary of aircraft states
         self.ac_state = {
             0x80: 'Initialising',
@@ -311,6 +222,10 @@ class TFM(threading.Thread):
         if self.FFEnabled:
             log.debug("scheduling flight following function")
             pyglet.clock.schedule_interval(self.AnnounceInfo, self.FFInterval * 60)
+            if self.offlineWater and self.waterInterval > 0:
+                pyglet.clock.schedule_interval(self.checkWater, self.waterInterval)
+            if self.geoCache is not None and self.prefetchMinutes > 0:
+                pyglet.clock.schedule_interval(self.prefetchRoute, 60)
         # Periodically poll for instrument updates. If not enabled, just poll sim data to keep hotkey functions happy
         if self.instrEnabled:
             log.debug('scheduling instrumentation')
@@ -323,7 +238,25 @@ class TFM(threading.Thread):
             pyglet.clock.schedule_interval(self.readSimConnectMessages, 1)
         if self.calloutsEnabled:
             log.debug("scheduling GPWS callouts")
-            pyglet.clock.schedule_interval(self.readCallouts, 0.2)
+            pyglet.clock.schedule_interval(self.readCallouts, self.calloutInterval)
+        # follow AI and multiplayer traffic between polls for alerts and instant traffic reports
+        self.airTraffic = tcas.TrafficTracker(self.trafficAlertRange, self.trafficAlertAltitude)
+        self.groundTraffic = tcas.TrafficTracker(self.trafficAlertRange, self.trafficAlertAltitude)
+        if self.trafficInterval > 0:
+            log.debug("scheduling traffic tracking")
+            pyglet.clock.schedule_interval(self.trackTraffic, self.trafficInterval)
+        # smoothed fuel burn for endurance and reserve alerts
+        self.fuelBurn = fuel.BurnEstimator(self.fuelWindow, self.fuelInterval)
+        # minutes of fuel left, and minutes of fuel left at the destination, dropping below the reserve
+        self.enduranceAlert = callouts.CrossingDetector([self.fuelReserve], hysteresis=5)
+        self.destinationAlert = callouts.CrossingDetector([self.fuelReserve], hysteresis=5)
+        # pounds more in one wing than the other
+        self.imbalanceAlert = callouts.CrossingDetector([self.fuelImbalance], hysteresis=self.fuelImbalance / 4)
+        self.destETE = 0
+        if self.fuelInterval > 0:
+            log.debug("scheduling fuel burn tracking")
+            pyglet.clock.schedule_interval(self.trackFuel, self.fuelInterval)
+        startup.mark("polling started")
         # Infinite loop.
         log.debug("starting infinite loop")
         while True:
@@ -332,9 +265,29 @@ class TFM(threading.Thread):
                 pyglet.clock.tick()
                 # dispatch any pending events so audio looping works
                 pyglet.app.platform_event_loop.dispatch_posted_events()
-                time.sleep(0.1)
+                self.run_calls()
+                # sleep until the next scheduled function is due, so fast modes such as attitude get their full rate
+                sleep_time = pyglet.clock.get_sleep_time(True)
+                if sleep_time is None or sleep_time > 0.1:
+                    sleep_time = 0.1
+                time.sleep(sleep_time)
             except Exception as e:
                 log.exception("error in main loop. This is bad!")
+    def call_on_polling_thread(self, function, *args):
+        # for worker threads, so state such as the last announced timezone is only touched by the polling loop
+        self.calls.put((function, args))
+
+    def run_calls(self):
+        while True:
+            try:
+                function, args = self.calls.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                function(*args)
+            except Exception as e:
+                log.exception(F"error in {function.__name__}")
+
     def set_triggered(self, msg):
         if msg:
             self.triggered = True
@@ -357,6 +310,28 @@ class TFM(threading.Thread):
             self.ILSInterval = float(config.app['timing']['ils_interval'])
             self.use_metric = config.app['config']['use_metric']
             self.voice_rate = int(config.app['config']['voice_rate'])
+            self.tone_curve = config.app['sonification']['tone_curve']
+            self.ILSSpeechThreshold = config.app['sonification']['ils_speech_threshold'] / 100
+            self.calloutLatency = config.app['gpws']['audio_latency']
+            self.speedCallouts = [int(i) for i in config.app['gpws']['speed_callouts']]
+            self.trafficInterval = config.app['traffic']['poll_interval']
+            self.trafficAlerts = config.app['traffic']['alerts']
+            self.trafficAlertRange = config.app['traffic']['alert_range']
+            self.trafficAlertAltitude = config.app['traffic']['alert_altitude']
+            self.trafficGroundStates = config.app['traffic']['ground_state_changes']
+            self.fuelInterval = config.app['fuel']['sample_interval']
+            self.fuelWindow = config.app['fuel']['burn_window']
+            self.fuelAlerts = config.app['fuel']['alerts']
+            self.fuelReserve = config.app['fuel']['reserve_minutes']
+            self.fuelImbalance = config.app['fuel']['imbalance']
+            self.offlineCities = config.app['flight_following']['offline_cities']
+            self.offlineTimezones = config.app['flight_following']['offline_timezones']
+            self.offlineWater = config.app['flight_following']['offline_water']
+            self.waterInterval = config.app['flight_following']['water_interval']
+            self.geoCacheEnabled = config.app['flight_following']['cache']
+            self.geoCacheDays = config.app['flight_following']['cache_days']
+            self.geonamesTimeout = config.app['flight_following']['timeout']
+            self.prefetchMinutes = config.app['flight_following']['prefetch_minutes']
             if config.app['config']['flight_following']:
                 self.FFEnabled = True
             else:
@@ -484,76 +459,64 @@ class TFM(threading.Thread):
 
     def sonifyFlightDirector(self, dt):
         try:
-            pitch = round(fsdata.instr['ApFlightDirectorPitch'], 1)
-            bank = round(fsdata.instr['ApFlightDirectorBank'], 0)
-            if pitch > 0 and pitch < 20:
-                self.PitchUpPlayer.pause()
-                self.PitchDownPlayer.play()
-                self.PitchDownPlayer.pitch = self.DownTones[pitch]
-            elif pitch < 0 and pitch > -20:
-                self.PitchDownPlayer.pause()
-                self.PitchUpPlayer.play() 
-                self.PitchUpPlayer.pitch = self.UpTones[pitch]
-            elif pitch == 0:
-                self.PitchUpPlayer.pause()
-                self.PitchDownPlayer.pause()
-            if bank < 0 and bank > -90:
-                self.BankPlayer.position =(5, 0, 0)
-                self.BankPlayer.play()
-                self.BankPlayer.pitch = self.BankTones[abs(bank)]
-
-            if bank > 0 and bank < 90:
-                self.BankPlayer.position =(-5, 0, 0)
-                self.BankPlayer.play()
-                self.BankPlayer.pitch = self.BankTones[bank]
-
-
-            if bank == 0:
-                self.BankPlayer.pause()
+            # the flight director values are part of the fast attitude group, so we don't wait for the 1 second instrument read
+            self.getPyuipcData(3)
+            pitch = round(self.attitude['FlightDirectorPitch'], 1)
+            bank = round(self.attitude['FlightDirectorBank'], 0)
+            self.sonifyAttitude(pitch, bank)
         except Exception as e:
             log.exception(F'Error in flight director. Pitch: {pitch}, Bank: {bank}' + str(e))
 
-
-
-        
     def sonifyPitch(self, dt):
         try:
             self.getPyuipcData(3)
             pitch = round(self.attitude['Pitch'], 1)
             bank = round(self.attitude['Bank'])
-            if pitch > 0 and pitch < 20:
-                self.PitchUpPlayer.pause()
-                self.PitchDownPlayer.play()
-                self.PitchDownPlayer.pitch = self.DownTones[pitch]
-            elif pitch < 0 and pitch > -20:
-                self.PitchDownPlayer.pause()
-                self.PitchUpPlayer.play() 
-                self.PitchUpPlayer.pitch = self.UpTones[pitch]
-            elif pitch == 0:
-                self.PitchUpPlayer.pause()
-                self.PitchDownPlayer.pause()
-            if bank < 0 and bank > -90:
-                self.BankPlayer.position =(5, 0, 0)
-                self.BankPlayer.play()
-                self.BankPlayer.pitch = self.BankTones[abs(bank)]
-            if bank > 0 and bank < 90:
-                self.BankPlayer.position =(-5, 0, 0)
-                self.BankPlayer.play()
-                self.BankPlayer.pitch = self.BankTones[bank]
-
-            if bank == 0:
-                self.BankPlayer.pause()
-            pyglet.clock.tick()
-            pyglet.app.platform_event_loop.dispatch_posted_events()
+            self.sonifyAttitude(pitch, bank)
         except Exception as e:
             log.exception(F'Error in attitude. Pitch: {pitch}, Bank: {bank}' + str(e))
 
+    def sonifyAttitude(self, pitch, bank):
+        # steer the tone generator from a pitch and bank value. Positive pitch is down, positive bank is left.
+        if pitch > 0:
+            self.tones.pitch_up.stop()
+            self.tones.pitch_down.play(self.PitchDownMap(pitch))
+        elif pitch < 0:
+            self.tones.pitch_down.stop()
+            self.tones.pitch_up.play(self.PitchUpMap(pitch))
+        else:
+            self.tones.pitch_up.stop()
+            self.tones.pitch_down.stop()
+        if bank < 0:
+            self.tones.bank.play(self.BankMap(bank), pan=1.0)
+        elif bank > 0:
+            self.tones.bank.play(self.BankMap(bank), pan=-1.0)
+        else:
+            self.tones.bank.stop()
+
+    def sonifyILS(self, dt):
+        # localiser needle pans the ILS tone, glide slope needle sets its pitch.
+        try:
+            self.getPyuipcData(4)
+            if self.ils['Nav1Signal'] == 0:
+                self.tones.ils.stop()
+                return
+            loc = self.ils['Nav1LocNeedle']
+            gs = self.ils['Nav1GSNeedle']
+            pan = max(-1.0, min(1.0, loc / 127))
+            if gs < 0:
+                self.tones.ils.play(self.GlideslopeUpMap(gs), pan=pan)
+            else:
+                self.tones.ils.play(self.GlideslopeDownMap(gs), pan=pan)
+        except Exception as e:
+            log.exception("error in ILS tone mode")
+
     def runway_guidance_mode(self):
         try:
             if self.runway_guidance:
                 self.runway_guidance = False
                 pyglet.clock.unschedule(self.play_heading_tones)
-                self.BankPlayer.pause()
+                self.tones.bank.stop()
                 self.output("Runway guidance disabled")
                 pub.sendMessage('reset', arg1=True)
                 return
@@ -562,23 +525,6 @@ class TFM(threading.Thread):
                 self.hdg = round(self.headingCorrected)
                 self.output("Runway guidance enabled")
                 self.output(F" current heading: {self.hdg} degrees")
-                self.hdg_right = self.hdg + 45
-                self.hdg_left = self.hdg - 45
-                self.hdg_freqs = np.linspace(1, 4, 45)
-                self.hdg_left_tones = {}
-                self.hdg_right_tones = {}
-                count = 0
-                for i in np.arange(self.hdg, self.hdg_right, 1):
-                    if i > 360:
-                        i = i - 360
-                    self.hdg_right_tones[i] = self.hdg_freqs[count]
-                    count += 1
-                count = 0
-                for i in np.arange(self.hdg, self.hdg_left, -1):
-                    if i < 0:
-                        i = i + 360
-                    self.hdg_left_tones[i] = self.hdg_freqs[count]
-                    count += 1
                 pyglet.clock.schedule_interval(self.play_heading_tones, 0.2)
                 pub.sendMessage('reset', arg1=True)
         except Exception as e:
@@ -588,17 +534,14 @@ class TFM(threading.Thread):
     def play_heading_tones(self, dt=0):
         try:
             self.headingCorrected = round(self.headingCorrected)
-            if self.headingCorrected > self.hdg and  self.headingCorrected < self.hdg_right:
-                self.BankPlayer.position =(5, 0, 0)
-                self.BankPlayer.play()
-                self.BankPlayer.pitch = self.hdg_right_tones[abs(self.headingCorrected)]
-            if self.headingCorrected < self.hdg and self.headingCorrected > self.hdg_left:
-                self.BankPlayer.position =(-5, 0, 0)
-                self.BankPlayer.play()
-                self.BankPlayer.pitch = self.hdg_left_tones[abs(self.headingCorrected)]
-
-            if self.hdg == self.headingCorrected:
-                self.BankPlayer.pause()
+            # deviation from the locked heading, wrapped into -180 to 180. Positive is right.
+            deviation = (self.headingCorrected - self.hdg + 180) % 360 - 180
+            if deviation > 0:
+                self.tones.bank.play(self.HeadingMap(deviation), pan=1.0)
+            elif deviation < 0:
+                self.tones.bank.play(self.HeadingMap(deviation), pan=-1.0)
+            else:
+                self.tones.bank.stop()
         except Exception as e:
             log.exception("error playing heading tones")
     def read_rpm(self):
@@ -702,16 +645,28 @@ class TFM(threading.Thread):
         if self.directorEnabled:
             pyglet.clock.unschedule(self.sonifyFlightDirector)
             self.directorEnabled = False
-            self.PitchUpPlayer.pause()
-            self.PitchDownPlayer.pause()
-            self.BankPlayer.pause()
+            self.tones.silence()
             self.output('flight director mode disabled.')
         else:
-            pyglet.clock.schedule_interval(self.sonifyFlightDirector, 0.2)
+            pyglet.clock.schedule_interval(self.sonifyFlightDirector, 0.04)
             self.directorEnabled = True
             self.output('flight director mode enabled')
         pub.sendMessage('reset', arg1=True)
 
+    def toggleILSTones(self):
+        if self.ILSTonesEnabled:
+            pyglet.clock.unschedule(self.sonifyILS)
+            self.ILSTonesEnabled = False
+            self.tones.ils.stop()
+            self.output('I L S tone mode disabled.')
+        else:
+            # read the needles now, as readILS may run before the first sonifyILS tick
+            self.getPyuipcData(4)
+            pyglet.clock.schedule_interval(self.sonifyILS, 0.05)
+            self.ILSTonesEnabled = True
+            self.output('I L S tone mode enabled')
+        pub.sendMessage('reset', arg1=True)
+
     def toggleAutoPilot(self):
         if not self.APEnabled:
             self.output(F'Autopilot control enabled')
@@ -731,178 +686,30 @@ class TFM(threading.Thread):
             self.output('manual flight mode enabled')
         pub.sendMessage('reset', arg1=True)
     
-    def setup_fuel_tanks(self):
-        log.debug('checking available fuel tanks')    
-        self.tanks = {}
-        key = 1
-        if fsdata.instr['cap_center'] != 0:
-            log.debug('found center tank')
-            self.tanks[key] = tank(name='center')
-            self.tanks[key].capacity = fsdata.instr['cap_center']
-            key += 1
-        if fsdata.instr['cap_center2'] != 0:
-            log.debug("found center 2")
-            self.tanks[key] = tank(name='center2')
-            self.tanks[key].capacity = fsdata.instr['cap_center2']
-            key += 1
-        if fsdata.instr['cap_center3'] != 0:
-            log.debug("found center 3")
-            self.tanks[key] = tank(name='center3')
-            self.tanks[key].capacity = fsdata.instr['cap_center3']
-            key += 1
-        if fsdata.instr['cap_main_left'] != 0:
-            log.debug('found main left')
-            self.tanks[key] = tank(name='main left')
-            self.tanks[key].capacity = fsdata.instr['cap_main_left']
-            key += 1
-        if fsdata.instr['cap_main_right'] != 0:
-            log.debug('found main right')
-            self.tanks[key] = tank(name='main right')
-            self.tanks[key].capacity = fsdata.instr['cap_main_right']
-            key += 1
-        if fsdata.instr['cap_aux_left'] != 0:
-            log.debug("found aux left")
-            self.tanks[key] = tank(name='aux left')
-            self.tanks[key].capacity = fsdata.instr['cap_aux_left']
-            key += 1
-        if fsdata.instr['cap_aux_right'] != 0:
-            log.debug('found aux right')
-            self.tanks[key] = tank(name='aux right')
-            self.tanks[key].capacity = fsdata.instr['cap_aux_right']
-            key += 1
-        if fsdata.instr['cap_tip_left'] != 0:
-            log.debug('found left tip')
-            self.tanks[key] = tank(name='tip left')
-            self.tanks[key].capacity = fsdata.instr['cap_center']
-            key += 1
-        if fsdata.instr['cap_tip_right'] != 0:
-            log.debug('found right tip')
-            self.tanks[key] = tank(name='tip right')
-            self.tanks[key].capacity = fsdata.instr['cap_tip_right']
-            key += 1
-
-
-
     def fuel_report(self):
-        total_fuel_weight = 0
-        total_fuel_quantity = 0
-        if fsdata.instr['cap_center'] != 0:
-            lvl_center = fsdata.instr['lvl_center'] /(128 * 65536)
-            weight_center =(fsdata.instr['cap_center'] * lvl_center) *(fsdata.instr['fuel_weight'] / 256)
-            quantity_center = fsdata.instr['cap_center'] * lvl_center
-            total_fuel_quantity += quantity_center
-            total_fuel_weight += weight_center
-        if fsdata.instr['cap_center2'] != 0:
-            lvl_center2 = fsdata.instr['lvl_center2'] /(128 * 65536)
-            weight_center2 =(fsdata.instr['cap_center2'] * lvl_center2) *(fsdata.instr['fuel_weight'] / 256)
-            quantity_center2 = fsdata.instr['cap_center'] * lvl_center
-            total_fuel_quantity += quantity_center2
-            total_fuel_weight += weight_center2
-        if fsdata.instr['cap_center3'] != 0:
-            lvl_center3 = fsdata.instr['lvl_center3'] /(128 * 65536)
-            weight_center3 =(fsdata.instr['cap_center3'] * lvl_center3) *(fsdata.instr['fuel_weight'] / 256)
-            quantity_center3 = fsdata.instr['cap_center3'] * lvl_center3
-            total_fuel_quantity += quantity_center3
-            total_fuel_weight += weight_center3
-        
-        if fsdata.instr['cap_main_left'] != 0:
-            lvl_main_left = fsdata.instr['lvl_main_left'] /(128 * 65536)
-            weight_main_left =(fsdata.instr['cap_main_left'] * lvl_main_left) *(fsdata.instr['fuel_weight'] / 256)
-            quantity_main_left = fsdata.instr['cap_main_left'] * lvl_main_left
-            total_fuel_quantity += quantity_main_left
-            total_fuel_weight += weight_main_left
-        if fsdata.instr['cap_main_right'] != 0:
-            lvl_main_right = fsdata.instr['lvl_main_right'] /(128 * 65536)
-            weight_main_right =(fsdata.instr['cap_main_right'] * lvl_main_right) *(fsdata.instr['fuel_weight'] / 256)
-            quantity_main_right = fsdata.instr['cap_main_right'] * lvl_main_right
-            total_fuel_quantity += quantity_main_right
-            total_fuel_weight += weight_main_right
-        if fsdata.instr['cap_aux_left'] != 0:
-            lvl_aux_left = fsdata.instr['lvl_aux_left'] /(128 * 65536)
-            weight_aux_left =(fsdata.instr['cap_aux_left'] * lvl_aux_left) *(fsdata.instr['fuel_weight'] / 256)
-            quantity_aux_left = fsdata.instr['cap_aux_left'] * lvl_aux_left
-            total_fuel_quantity += quantity_aux_left
-            total_fuel_weight += weight_aux_left
-        if fsdata.instr['cap_aux_right'] != 0:
-            lvl_aux_right = fsdata.instr['lvl_aux_right'] /(128 * 65536)
-            weight_aux_right =(fsdata.instr['cap_aux_right'] * lvl_aux_right) *(fsdata.instr['fuel_weight'] / 256)
-            quantity_aux_right = fsdata.instr['cap_aux_right'] * lvl_aux_right
-            total_fuel_quantity += quantity_aux_right
-            total_fuel_weight += weight_aux_right
-        if fsdata.instr['cap_tip_left'] != 0:
-            lvl_tip_left = fsdata.instr['lvl_tip_left'] /(128 * 65536)
-            weight_tip_left =(fsdata.instr['cap_tip_left'] * lvl_tip_left) *(fsdata.instr['fuel_weight'] / 256)
-            quantity_tip_left = fsdata.instr['cap_tip_left'] * lvl_tip_left
-            total_fuel_quantity += quantity_tip_left
-            total_fuel_weight += weight_tip_left
-        if fsdata.instr['cap_tip_right'] != 0:
-            lvl_tip_right = fsdata.instr['lvl_tip_right'] /(128 * 65536)
-            weight_tip_right =(fsdata.instr['cap_tip_right'] * lvl_tip_right) *(fsdata.instr['fuel_weight'] / 256)
-            quantity_tip_right = fsdata.instr['cap_tip_right'] * lvl_tip_right
-            total_fuel_quantity += quantity_tip_right
-            total_fuel_weight += weight_tip_right
-        self.output(F'total fuel: {round(total_fuel_weight)} pounds. ')
-        self.output(F'{round(total_fuel_quantity)} gallons. ')
-        total_fuel_flow = fsdata.instr['eng1_fuel_flow'] + fsdata.instr['eng2_fuel_flow'] + fsdata.instr['eng3_fuel_flow'] + fsdata.instr['eng4_fuel_flow']
-        self.output(F'Total fuel flow: {round(total_fuel_flow)} P P H')
+        tanks = fsdata.fuel
+        self.output(F'total fuel: {round(tanks.total_weight)} pounds. ')
+        self.output(F'{round(tanks.total_quantity)} gallons. ')
+        self.output(F'Total fuel flow: {round(fsdata.engines.total_fuel_flow)} P P H')
+        burn = self.fuelBurn
+        if burn.burn:
+            self.output(F'Burning {round(burn.burn)} pounds per hour. ')
+        if burn.endurance is not None:
+            self.output(F'Endurance: {self.secondsToText(int(burn.endurance * 3600))}')
+            if burn.range:
+                self.output(F'range {round(burn.range)} miles. ')
+        if burn.at_destination is not None:
+            self.output(F'{round(burn.at_destination)} pounds at destination. ')
         pub.sendMessage('reset', arg1=True)
     def fuel_flow_report(self):
-        num_engines = fsdata.instr['num_engines']
         self.output("Fuel flow: ")
-        self.output(F'Engine 1: {round(fsdata.instr["eng1_fuel_flow"])}.')
-        if num_engines >= 2:
-            self.output(F'Engine 2: {round(fsdata.instr["eng2_fuel_flow"])}.')
-        if num_engines >= 3:
-            self.output(F'Engine 3: {round(fsdata.instr["eng3_fuel_flow"])}.')
-        if num_engines >= 4:
-            self.output(F'Engine 4: {round(fsdata.instr["eng4_fuel_flow"])}.')
+        for i, flow in enumerate(fsdata.engines['fuel_flow']):
+            self.output(F'Engine {i + 1}: {round(flow)}.')
         pub.sendMessage('reset', arg1=True)
-    def read_fuel_tank(self, key):
-        if self.tanks[key].name == 'center':
-            percentage = fsdata.instr['lvl_center'] /(128 * 65536)
-            weight = round((fsdata.instr['cap_center'] * percentage) *(fsdata.instr['fuel_weight'] / 256))
-            quantity = round(fsdata.instr['cap_center'] * percentage)
-            self.output(F'{round(percentage * 100)} percent. {weight} pounds. {quantity} gallons')
-        elif self.tanks[key].name == 'center2':
-            percentage = fsdata.instr['lvl_center2'] /(128 * 65536)
-            weight = round((fsdata.instr['cap_center2'] * percentage) *(fsdata.instr['fuel_weight'] / 256))
-            quantity = round(fsdata.instr['cap_center2'] * percentage)
-            self.output(F'{round(percentage * 100)} percent. {weight} pounds. {quantity} gallons')
-        elif self.tanks[key].name == 'center3':
-            percentage = fsdata.instr['lvl_center3'] /(128 * 65536)
-            weight = round((fsdata.instr['cap_center3'] * percentage) *(fsdata.instr['fuel_weight'] / 256))
-            quantity = round(fsdata.instr['cap_center3'] * percentage)
-            self.output(F'{round(percentage * 100)} percent. {weight} pounds. {quantity} gallons')
-        elif self.tanks[key].name == 'main left':
-            percentage = fsdata.instr['lvl_main_left'] /(128 * 65536)
-            weight = round((fsdata.instr['cap_main_left'] * percentage) *(fsdata.instr['fuel_weight'] / 256))
-            quantity = round(fsdata.instr['cap_main_left'] * percentage)
-            self.output(F'{round(percentage * 100)} percent. {weight} pounds. {quantity} gallons')
-        elif self.tanks[key].name == 'main right':
-            percentage = fsdata.instr['lvl_main_right'] /(128 * 65536)
-            weight = round((fsdata.instr['cap_main_right'] * percentage) *(fsdata.instr['fuel_weight'] / 256))
-            quantity = round(fsdata.instr['cap_main_right'] * percentage)
-            self.output(F'{round(percentage * 100)} percent. {weight} pounds. {quantity} gallons')
-        elif self.tanks[key].name == 'aux left':
-            percentage = fsdata.instr['lvl_aux_left'] /(128 * 65536)
-            weight = round((fsdata.instr['cap_aux_left'] * percentage) *(fsdata.instr['fuel_weight'] / 256))
-            quantity = round(fsdata.instr['cap_aux_left'] * percentage)
-            self.output(F'{round(percentage * 100)} percent. {weight} pounds. {quantity} gallons')
-        elif self.tanks[key].name == 'aux right':
-            percentage = fsdata.instr['lvl_aux_right'] /(128 * 65536)
-            weight = round((fsdata.instr['cap_aux_right'] * percentage) *(fsdata.instr['fuel_weight'] / 256))
-            quantity = round(fsdata.instr['cap_aux_right'] * percentage)
-            self.output(F'{round(percentage * 100)} percent. {weight} pounds. {quantity} gallons')
-        elif self.tanks[key].name == 'tip left':
-            percentage = fsdata.instr['lvl_tip_left'] /(128 * 65536)
-            weight = round((fsdata.instr['cap_tip_left'] * percentage) *(fsdata.instr['fuel_weight'] / 256))
-            quantity = round(fsdata.instr['cap_tip_left'] * percentage)
-            self.output(F'{round(percentage * 100)} percent. {weight} pounds. {quantity} gallons')
-        elif self.tanks[key].name == 'tip right':
-            percentage = fsdata.instr['lvl_tip_right'] /(128 * 65536)
-            weight = round((fsdata.instr['cap_tip_right'] * percentage) *(fsdata.instr['fuel_weight'] / 256))
-            quantity = round(fsdata.instr['cap_tip_right'] * percentage)
-            self.output(F'{round(percentage * 100)} percent. {weight} pounds. {quantity} gallons')
+    def read_fuel_tank(self, i):
+        # i is the position of the tank in fsdata.fuel
+        tanks = fsdata.fuel
+        self.output(F'{round(tanks.level[i] * 100)} percent. {round(tanks.weight[i])} pounds. {round(tanks.quantity[i])} gallons')
         
     def update_payload_data(self, msg=None):
         # populate dictionary with payload values from a2a aircraft
@@ -940,102 +747,22 @@ class TFM(threading.Thread):
         self.output(F"Simulation rate: {fsdata.instr['SimulationRate']}")
         pub.sendMessage('reset', arg1=True)
 
-    def read_eng1(self):
-        self.output("Engine 1: ")
-        self.output (F"N1: {round(fsdata.instr['Eng1N1'])}. ")
-        self.output (F"N2: {round(fsdata.instr['Eng1N2'])}. ")
-        pub.sendMessage('reset', arg1=True)
-    def read_eng2(self):
-        self.output("Engine 2: ")
-        self.output (F"N1: {round(fsdata.instr['Eng2N1'])}. ")
-        self.output (F"N2: {round(fsdata.instr['Eng2N2'])}. ")
-        pub.sendMessage('reset', arg1=True)
-    def read_eng3(self):
-        if fsdata.instr['num_engines'] >= 3:
-            self.output("Engine 3: ")
-            self.output (F"N1: {round(fsdata.instr['Eng3N1'])}. ")
-            self.output (F"N2: {round(fsdata.instr['Eng3N2'])}. ")
+    def read_engine(self, number):
+        # engine hotkeys are numbered from 1
+        if number <= fsdata.engines.count:
+            self.output(F"Engine {number}: ")
+            self.output (F"N1: {round(fsdata.engines['N1'][number - 1])}. ")
+            self.output (F"N2: {round(fsdata.engines['N2'][number - 1])}. ")
         else:
             self.output ("Not available. ")
         pub.sendMessage('reset', arg1=True)
-    def read_eng4(self):
-        if fsdata.instr['num_engines'] >= 3:
-            self.output("Engine 4: ")
-            self.output (F"N1: {round(fsdata.instr['Eng4N1'])}. ")
-            self.output (F"N2: {round(fsdata.instr['Eng4N2'])}. ")
-        else:
-            self.output ("not available. ")
-        pub.sendMessage('reset', arg1=True)
-
-    def fuel_t1(self):
-        try:
-            self.output(F'{self.tanks[1].name}: ')
-            self.read_fuel_tank(1)
-        except KeyError:
-            self.output(F"not available. ")
-        pub.sendMessage('reset', arg1=True)
-    def fuel_t2(self):
-        try:
-            self.output(F'{self.tanks[2].name}: ')
-            self.read_fuel_tank(2)
-        except KeyError:
-            self.output(F"not available. ")
-        pub.sendMessage('reset', arg1=True)
-    def fuel_t3(self):
-        try:
-            self.output(F'{self.tanks[3].name}: ')
-            self.read_fuel_tank(3)
-        except KeyError:
-            self.output(F"not available. ")
-        pub.sendMessage('reset', arg1=True)
-    def fuel_t4(self):
-        try:
-            self.output(F'{self.tanks[4].name}: ')
-            self.read_fuel_tank(4)
-        except KeyError:
-            self.output(F"not available. ")
-        pub.sendMessage('reset', arg1=True)
-    def fuel_t5(self):
-        try:
-            self.output(F'{self.tanks[5].name}: ')
-            self.read_fuel_tank(5)
-        except KeyError:
-            self.output(F"not available. ")
-        pub.sendMessage('reset', arg1=True)
-    def fuel_t6(self):
-        try:
-            self.output(F'{self.tanks[6].name}: ')
-            self.read_fuel_tank(6)
-        except KeyError:
-            self.output(F"not available. ")
-        pub.sendMessage('reset', arg1=True)
-    def fuel_t7(self):
-        try:
-            self.output(F'{self.tanks[7].name}: ')
-            self.read_fuel_tank(7)
-        except KeyError:
-            self.output(F"not available. ")
-        pub.sendMessage('reset', arg1=True)
-    def fuel_t8(self):
-        try:
-            self.output(F'{self.tanks[8].name}: ')
-            self.read_fuel_tank(8)
-        except KeyError:
-            self.output(F"not available. ")
-        pub.sendMessage('reset', arg1=True)
-    def fuel_t9(self):
-        try:
-            self.output(F'{self.tanks[9].name}: ')
-            self.read_fuel_tank(9)
-        except KeyError:
-            self.output(F"not available. ")
-        pub.sendMessage('reset', arg1=True)
 
-    def fuel_t10(self):
-        try:
-            self.output(F'{self.tanks[10].name}: ')
-            self.read_fuel_tank(10)
-        except KeyError:
+    def fuel_tank(self, number):
+        # tank hotkeys are numbered from 1, in the order of the tanks the aircraft has
+        if 1 <= number <= len(fsdata.fuel):
+            self.output(F'{fsdata.fuel.names[number - 1]}: ')
+            self.read_fuel_tank(number - 1)
+        else:
             self.output(F"not available. ")
         pub.sendMessage('reset', arg1=True)
 
@@ -1046,13 +773,11 @@ class TFM(threading.Thread):
     def toggleAttitudeMode(self):
         if self.sonifyEnabled:
             pyglet.clock.unschedule(self.sonifyPitch)
-            self.PitchUpPlayer.pause()
-            self.PitchDownPlayer.pause()
-            self.BankPlayer.pause()
+            self.tones.silence()
             self.sonifyEnabled = False
             self.output('attitude mode disabled.')
         else:
-            pyglet.clock.schedule_interval(self.sonifyPitch, 0.05)
+            pyglet.clock.schedule_interval(self.sonifyPitch, 0.02)
             self.sonifyEnabled = True
             self.output('attitude mode enabled')
         pub.sendMessage('reset', arg1=True)
@@ -1064,23 +789,16 @@ class TFM(threading.Thread):
     def readCallouts(self, dt=0):
         if self.calloutsEnabled:
             result = pyuipc.read(self.pyuipcRadioAlt)
-            radio_alt = round(result[0] / 65536 * 3.28084)
-            vspeed = fsdata.instr['VerticalSpeed']
-            callout = 0
-            if vspeed < -50:
-                for i in self.calloutsHigh:
-                    if radio_alt <= i + 5 and radio_alt >= i - 5 and self.calloutState[i] == False:
-                        source = pyglet.media.load(F'sounds\\{str(i)}.wav')
-                        source.play()
-                        self.calloutState[i] = True
-                        
-                for i in self.calloutsLow:
-                    if radio_alt <= i + 3 and radio_alt >= i - 3 and self.calloutState[i] == False:
-                        source = pyglet.media.load(F'sounds\\{str(i)}.wav')
-                        source.play()
-                        self.calloutState[i] = True
-                        
-            
+            radio_alt = result[0] / 65536 * 3.28084
+            for callout, delay in self.calloutPredictor.update(radio_alt, time.monotonic(), self.calloutInterval):
+                if delay > 0:
+                    pyglet.clock.schedule_once(self.playCallout, delay, callout)
+                else:
+                    self.playCallout(0, callout)
+
+    def playCallout(self, dt, callout):
+        self.calloutSounds[callout].play()
+
     # read various instrumentation automatically
     def readInstruments(self, dt=0):
         flapsTransit = False
@@ -1099,7 +817,11 @@ class TFM(threading.Thread):
         if fsdata.instr['AircraftName'] != self.oldAircraftName:
             self.output(f"current aircraft: {fsdata.instr['AircraftName'].decode('UTF-8')}")
             self.oldAircraftName = fsdata.instr['AircraftName']
-            self.setup_fuel_tanks()
+            log.debug(F"fuel tanks: {', '.join(fsdata.fuel.names)}")
+        # the announcement rules in use depend on the aircraft and its engine count
+        aircraft = (fsdata.instr['AircraftName'].decode('UTF-8', errors='ignore'), fsdata.instr['num_engines'])
+        if aircraft != self.announcementRules.selected:
+            self.announcementRules.select(*aircraft)
         # detect if aircraft is on ground or airborne.
         if self.oldInstr['OnGround'] != fsdata.instr['OnGround']:
             if fsdata.instr['OnGround'] == False:
@@ -1111,13 +833,9 @@ class TFM(threading.Thread):
                 log.debug("unscheduling heading lock")
                 pyglet.clock.unschedule(self.play_heading_tones)
                 self.runway_guidance = False
-        # landing gear
-        if fsdata.instr['Gear'] != self.oldInstr['Gear']:
-            if fsdata.instr['Gear'] == 0:
-                self.output('Gear up.')
-            elif fsdata.instr['Gear'] == 16383:
-                self.output('Gear down.')
-            self.oldInstr['Gear'] = fsdata.instr['Gear']
+        # switches, radios, autopilot settings and other rule based announcements. See announcements.ini
+        for message in self.announcementRules.evaluate(self.oldInstr, fsdata.instr, {'autopilot': self.APEnabled}):
+            self.output(message)
 
         # if flaps position has changed, flaps are in motion. We need to wait until they have stopped moving to read the value.
         if self.flapsEnabled:
@@ -1133,11 +851,6 @@ class TFM(threading.Thread):
                 
                 self.output(F'Flaps {fsdata.instr["Flaps"]:.0f}')
                 self.oldInstr['Flaps'] = fsdata.instr['Flaps']
-            # announce radio frequency changes
-        if fsdata.instr['Com1Freq'] != self.oldInstr['Com1Freq']:
-            self.output(F"com 1, {fsdata.instr['Com1Freq']}")
-        if fsdata.instr['Com2Freq'] != self.oldInstr['Com2Freq']:
-            self.output(F"com 2, {fsdata.instr['Com2Freq']}")
 
         # spoilers
         if self.oldInstr['Spoilers'] != fsdata.instr['Spoilers']:
@@ -1150,44 +863,12 @@ class TFM(threading.Thread):
                     self.output(F'arm spoilers off')
                 else:
                     self.output(F'Spoilers retracted')
-        if self.oldInstr['ApAltitude'] != fsdata.instr['ApAltitude']:
-            self.output(F"Altitude set to {round(fsdata.instr['ApAltitude'])}")
-        if self.APEnabled:
-            if self.oldInstr['ApHeading'] != fsdata.instr['ApHeading']:
-                self.output(F"{fsdata.instr['ApHeading']} degrees")
-            if self.oldInstr['ApAirspeed'] != fsdata.instr['ApAirspeed']:
-                self.output(F"{fsdata.instr['ApAirspeed']}")
-            if self.oldInstr['ApMach'] != fsdata.instr['ApMach']:
-                self.output(F"mach {fsdata.instr['ApMach']:.2f}")
-            if self.oldInstr['ApVerticalSpeed'] != fsdata.instr['ApVerticalSpeed']:
-                self.output(F"{fsdata.instr['ApVerticalSpeed']} feet per minute")
-
-
-
-        # transponder
-        if fsdata.instr['Transponder'] != self.oldInstr['Transponder']:
-            self.output(F'Squawk {fsdata.instr["Transponder"]:x}')
         # next waypoint
         if fsdata.instr['NextWPId'] != self.oldInstr['NextWPId']:
             time.sleep(3)
             self.getPyuipcData()
             self.readWaypoint(0)
             self.oldInstr['NextWPId'] = fsdata.instr['NextWPId']
-        # read autobrakes
-        if fsdata.instr['AutoBrake'] != self.oldInstr['AutoBrake']:
-            if fsdata.instr['AutoBrake'] == 0:
-                brake = 'R T O'
-            elif fsdata.instr['AutoBrake'] == 1:
-                brake = 'off'
-            elif fsdata.instr['AutoBrake'] == 2:
-                brake = 'position 1'
-            elif fsdata.instr['AutoBrake'] == 3:
-                brake = 'position 2'
-            elif fsdata.instr['AutoBrake'] == 4:
-                brake = 'position 3'
-            elif fsdata.instr['AutoBrake'] == 5:
-                brake = 'maximum'
-            self.output(F'Auto brake {brake}')
         # elevator trim
         if fsdata.instr['ElevatorTrim'] != self.oldInstr['ElevatorTrim'] and fsdata.instr['ApMaster'] != 1 and self.trimEnabled:
             if fsdata.instr['ElevatorTrim'] < 0:
@@ -1236,69 +917,6 @@ class TFM(threading.Thread):
                 self.HasGS = True
         else:
             pyglet.clock.unschedule(self.readILS)
-        self.readToggle('PitotHeat', 'Pitot Heat', 'on', 'off')
-        self.readToggle('ParkingBrake', 'Parking brake', 'on', 'off')
-        self.readToggle('AutoFeather', 'Auto Feather', 'Active', 'off')
-        # autopilot mode switches
-        self.readToggle('ApMaster', 'Auto pilot master', 'active', 'off')
-        # auto throttle
-        self.readToggle('AutoThrottleArm', 'Auto Throttle', 'Armed', 'off')
-        # yaw damper
-        self.readToggle('ApYawDamper', 'Yaw Damper', 'active', 'off')
-        # Toga
-        self.readToggle('Toga', 'take off power', 'active', 'off')
-        self.readToggle('ApAltitudeLock', 'altitude lock', 'active', 'off')
-        self.readToggle('ApHeadingLock', 'Heading lock', 'active', 'off')
-        self.readToggle('ApNavLock', 'nav lock', 'active', 'off')
-        self.readToggle('ApFlightDirector', 'Flight Director', 'Active', 'off')
-        self.readToggle('ApNavGPS', 'Nav gps switch', 'set to GPS', 'set to nav')
-        self.readToggle('ApAttitudeHold', 'Attitude hold', 'active', 'off')
-        self.readToggle('ApWingLeveler', 'Wing leveler', 'active', 'off')
-        self.readToggle('ApAutoRudder', 'Auto rudder', 'active', 'off')
-        self.readToggle('ApApproachHold', "approach mode", "active", "off")
-        self.readToggle('ApSpeedHold', 'Airspeed hold', 'active', 'off')
-        self.readToggle('ApMachHold', 'Mach hold', 'Active', 'off')
-        self.readToggle('PropSync', 'Propeller Sync', 'active', 'off')
-        self.readToggle('BatteryMaster', 'Battery Master', 'active', 'off')
-        self.readToggle('Door1', 'Door 1', 'open', 'closed')
-        self.readToggle('Door2', 'Door 2', 'open', 'closed')
-        self.readToggle('Door3', 'Door 3', 'open', 'closed')
-        self.readToggle('Door4', 'Door 4', 'open', 'closed')
-        # These instruments are not necessary for A2A aircraft.
-        if self.flag_a2a == False:
-            self.readToggle('Eng1Starter', 'Number 1 starter', 'engaged', 'off')
-            self.readToggle('Eng2Starter', 'Number 2 starter', 'engaged', 'off')
-            self.readToggle('Eng3Starter', 'Number 3 starter', 'engaged', 'off')
-            self.readToggle('Eng4Starter', 'Number 4 starter', 'engaged', 'off')
-            self.readToggle('Eng1Combustion', 'Number 1 ignition', 'on', 'off')
-            self.readToggle('Eng2Combustion', 'Number 2 ignition', 'on', 'off')
-            self.readToggle('Eng3Combustion', 'Number 3 ignition', 'on', 'off')
-            self.readToggle('Eng4Combustion', 'Number 4 ignition', 'on', 'off')
-            self.readToggle('Eng1Generator', 'Number 1 generator', 'active', 'off')
-            self.readToggle('Eng2Generator', 'Number 2 generator', 'active', 'off')
-            self.readToggle('Eng3Generator', 'Number 3 generator', 'active', 'off')
-            self.readToggle('Eng4Generator', 'Number 4 generator', 'active', 'off')
-            self.readToggle('BeaconLights', 'Beacon light', 'on', 'off')
-        self.readToggle('LandingLights', 'Landing Lights', 'on', 'off')
-        self.readToggle('TaxiLights', 'Taxi Lights', 'on', 'off')
-        self.readToggle('NavigationLights', 'Nav lights', 'on', 'off')
-        self.readToggle('StrobeLights', 'strobe lights', 'on', 'off')
-        self.readToggle('InstrumentLights', 'Instrument lights', 'on', 'off')
-        self.readToggle('APUGenerator', 'A P U Generator', 'active', 'off')
-        self.readToggle('AvionicsMaster', 'Avionics master', 'active', 'off')
-        self.readToggle('Eng1FuelValve', 'number 1 fuel valve', 'open', 'closed')
-        self.readToggle('Eng2FuelValve', 'number 2 fuel valve', 'open', 'closed')
-        self.readToggle('Eng3FuelValve', 'number 3 fuel valve', 'open', 'closed')
-        self.readToggle('Eng4FuelValve', 'number 4 fuel valve', 'open', 'closed')
-        self.readToggle("FuelPump", "Fuel pump", "active", "off")
-        self.readToggle("Eng1Select", "number 1", 'selected', 'unselected')
-        if fsdata.instr['num_engines'] >= 2:
-            self.readToggle("Eng2Select", "number 2", 'selected', 'unselected')
-        if fsdata.instr['num_engines'] >= 3:
-            self.readToggle("Eng3Select", "number 3", 'selected', 'unselected')
-        if fsdata.instr['num_engines'] >= 4:
-            self.readToggle("Eng4Select", "number 4", 'selected', 'unselected')
-
         if self.groundspeedEnabled:
             if fsdata.instr['GroundSpeed'] > 0 and fsdata.instr['OnGround'] and self.groundSpeed == False:
                 log.debug("moving on ground. Scheduling groundspeed callouts")
@@ -1337,238 +955,55 @@ class TFM(threading.Thread):
 
 
         # read engine status on startup.
-        if fsdata.instr['Eng1FuelFlow'] > 10 and fsdata.instr['Eng1Starter'] and self.Eng1FuelFlow == False:
-            self.output('Number 1 fuel flow')
-            self.Eng1FuelFlow = True
-        if fsdata.instr['Eng2FuelFlow'] > 10 and fsdata.instr['Eng2Starter'] and self.Eng2FuelFlow == False:
-            self.output('Number 2 fuel flow')
-            self.Eng2FuelFlow = True
-        if fsdata.instr['Eng3FuelFlow'] > 10 and fsdata.instr['Eng3Starter'] and self.Eng3FuelFlow == False:
-            self.output('Number 3 fuel flow')
-            self.Eng3FuelFlow = True
-        if fsdata.instr['Eng4FuelFlow'] > 10 and fsdata.instr['Eng4Starter'] and self.Eng4FuelFlow == False:
-            self.output('Number 4 fuel flow')
-            self.Eng4FuelFlow = True
-        if fsdata.instr['Eng1N2'] > 5 and self.Eng1N2 == False and fsdata.instr['Eng1Starter']:
-            self.output('number 1, 5 percent N2')
-            self.Eng1N2 = True
-        if fsdata.instr['Eng1N1'] > 5 and self.Eng1N1 == False  and fsdata.instr['Eng1Starter']:
-            self.output('number 1, 5 percent N1')
-            self.Eng1N1 = True
-        if fsdata.instr['Eng2N2'] > 5 and self.Eng2N2 == False  and fsdata.instr['Eng2Starter']:
-            self.output('number 2, 5 percent N2')
-            self.Eng2N2 = True
-        if fsdata.instr['Eng2N1'] > 5 and self.Eng2N1 == False  and fsdata.instr['Eng2Starter']:
-            self.output('number 2, 5 percent N1')
-            self.Eng2N1 = True
-        if fsdata.instr['Eng3N2'] > 5 and self.Eng3N2 == False  and fsdata.instr['Eng3Starter']:
-            self.output('number 3, 5 percent N2')
-            self.Eng3N2 = True
-        if fsdata.instr['Eng3N1'] > 5 and self.Eng3N1 == False  and fsdata.instr['Eng3Starter']:
-            self.output('number 3, 5 percent N1')
-            self.Eng3N1 = True
-        if fsdata.instr['Eng4N2'] > 5 and self.Eng4N2 == False  and fsdata.instr['Eng4Starter']:
-            self.output('number 4, 5 percent N2')
-            self.Eng4N2 = True
-        if fsdata.instr['Eng4N1'] > 5 and self.Eng4N1 == False  and fsdata.instr['Eng4Starter']:
-            self.output('number 4, 5 percent N1')
-            self.Eng4N1 = True
-
-
-
-
-
-        # read altitude every 1000 feet
-        for i in range(1000, 65000, 1000):
-            if fsdata.instr['Altitude'] >= i - 10 and fsdata.instr['Altitude'] <= i + 10 and self.altFlag[i] == False:
-                self.speak(F"{i} feet")
-                self.altFlag[i] = True
-            elif fsdata.instr['Altitude'] >= i + 100:
-                self.altFlag[i] = False
+        for message in self.engineStart.update(fsdata.engines):
+            self.output(message)
+
+        # read altitude every 1000 feet. If several were passed since the last read, only the current one is spoken.
+        crossed = self.altitudeCrossings.update(fsdata.instr['Altitude'])
+        if crossed:
+            self.speak(F"{crossed[-1][0]} feet")
+        # airspeed callouts while accelerating on the ground
+        crossed = self.speedCrossings.update(fsdata.instr['AirspeedIndicated'])
+        if crossed and crossed[-1][1] > 0 and fsdata.instr['OnGround']:
+            self.speak(F"{crossed[-1][0]} knots")
         
-        # read Bonanza instruments
-        if 'Bonanza' in fsdata.instr['AircraftName'].decode():
-            self.read_bonanza()
-            self.read_cabin()
-            self.flag_a2a = True
-        else:
-            self.flag_a2a = False
-        # read cherokee instruments
-        if 'C172' in fsdata.instr['AircraftName'].decode():
-            self.read_c172()
-            self.read_cabin()
-            self.flag_a2a = True
-        else:
-            self.flag_a2a = False
-        
-
-        if 'Cherokee' in fsdata.instr['AircraftName'].decode():
-            self.read_cherokee()
-            self.read_cabin()
-            self.flag_a2a = True
-        else:
-            self.flag_a2a = False
-        
-        
-        if 'C182' in fsdata.instr['AircraftName'].decode():
-            self.read_c182()
-            self.read_cabin()
-            self.flag_a2a = True
-        else:
-            self.flag_a2a = False
-        
-
         # maintain state of instruments so we can check on the next run.
         self.oldInstr = copy.deepcopy(fsdata.instr)
-    def read_bonanza(self):
-        self.readToggle('BatterySwitch', "battery", "active", "off")
-        self.readToggle('AlternatorSwitch', "alternator", "active", "off")
-        self.readToggle('TipTankLeftPump', 'left tip tank pump', 'active', 'off')
-        self.readToggle('TipTankRightPump', 'right tip tank pump', 'active', 'off')
-        self.readToggle('TipTanksAvailable', 'tip tanks', 'installed', 'not installed')
-        if fsdata.instr['TipTanksAvailable']:
-            self.tt = True
-        else:
-            self.tt = False
-
-        # self.readToggle('window', 'window', 'open', 'closed')
-        self.readToggle('fan', 'fan', 'active', 'off')
-        # fuel selector
-        fsel_state = {
-            0: 'off',
-            1: 'left',
-            2: 'right',
-        }
-        if fsdata.instr['FuelSelector'] != self.old_a2a_fsel:
-            fsel = fsdata.instr['FuelSelector']
-            self.output(F"fuel selector {fsel_state[fsel]}")
-            self.old_a2a_fsel = fsdata.instr['FuelSelector']
-        if fsdata.instr['PayloadWeight'] != self.oldInstr['PayloadWeight']:
-            self.output(F"Payload weight now {int(fsdata.instr['PayloadWeight'])} pounds")
-            
-
-    
-    def read_c172(self):
-        self.readToggle('BatterySwitch', "battery", "active", "off")
-        self.readToggle('AlternatorSwitch', "alternator", "active", "off")
-        self.readToggle('FuelCutoff', 'fuel cut off valve', 'open', 'closed')
-        # fuel selector
-        fsel_state = {
-            0: 'left',
-            1: 'both',
-            2: 'right',
-        }
-        if fsdata.instr['FuelSelector'] != self.old_a2a_fsel:
-            fsel = fsdata.instr['FuelSelector']
-            self.output(F"fuel selector {fsel_state[fsel]}")
-            self.old_a2a_fsel = fsdata.instr['FuelSelector']
-        if fsdata.instr['PayloadWeight'] != self.oldInstr['PayloadWeight']:
-            self.output(F"Payload weight now {int(fsdata.instr['PayloadWeight'])} pounds")
-        
-    def read_c182(self):
-        self.readToggle('BatterySwitch', "battery", "active", "off")
-        self.readToggle('AlternatorSwitch', "alternator", "active", "off")
-        self.readToggle('window', 'window', 'open', 'closed')
-        # fuel selector
-        fsel_state = {
-            0: 'off',
-            1: 'left',
-            2: 'both',
-            3: 'Right',
-        }
-        if fsdata.instr['FuelSelector'] != self.old_a2a_fsel:
-            fsel = fsdata.instr['FuelSelector']
-            self.output(F"fuel selector {fsel_state[fsel]}")
-            self.old_a2a_fsel = fsdata.instr['FuelSelector']
-        if fsdata.instr['PayloadWeight'] != self.oldInstr['PayloadWeight']:
-            self.output(F"Payload weight now {int(fsdata.instr['PayloadWeight'])} pounds")
-        
-    def read_cherokee(self):
-        self.readToggle('BatterySwitch', "battery", "active", "off")
-        self.readToggle("ScriptRunning", "Cherokee script", "running", "not running")
-        self.readToggle('window', 'window', 'open', 'closed')
-        # carb heat
-        if fsdata.instr['CarbHeat'] != self.oldInstr['CarbHeat']:
-            self.output(F"carburetor heat {int(fsdata.instr['CarbHeat'])} percent ")
-            self.oldInstr['CarbHeat'] = fsdata.instr['CarbHeat']
-
-        # fuel selector
-        fsel_state = {
-            0: 'off',
-            1: 'left',
-            2: 'right',
-        }
-        if fsdata.instr['FuelSelector'] != self.old_a2a_fsel:
-            fsel = fsdata.instr['FuelSelector']
-            self.output(F"fuel selector {fsel_state[fsel]}")
-            self.old_a2a_fsel = fsdata.instr['FuelSelector']
-        if fsdata.instr['PayloadWeight'] != self.oldInstr['PayloadWeight']:
-            self.output(F"Payload weight now {int(fsdata.instr['PayloadWeight'])} pounds")
-        # primer pump
-        primer_state = {
-            0: "closed",
-            1: "open",
-            2: "pump",
-        }
-        if fsdata.instr['PrimerState'] != self.oldInstr['PrimerState']:
-            primer = fsdata.instr['PrimerState']
-            self.output(F"primer {primer_state[primer]}")
-            self.oldInstr['PrimerState'] = fsdata.instr['PrimerState']
-
-    def read_cabin(self):
-        # read cabin climate info such as heat and defrost
-        if fsdata.instr['CabinHeat'] != self.oldInstr['CabinHeat']:
-            self.output(F"cabin heat at {int(fsdata.instr['CabinHeat'])}")
-            self.oldInstr['CabinHeat'] = fsdata.instr['CabinHeat']
-        if fsdata.instr['defrost'] != self.oldInstr['defrost']:
-            self.output(F"defrost {int(fsdata.instr['defrost'])}")
-            self.oldInstr['defrost'] = fsdata.instr['defrost']
-
     def readEngTemps(self):
+        temps = fsdata.engines['ITT']
         if self.use_metric == False:
-            Eng1Temp = round(9.0/5.0 * fsdata.instr['Eng1ITT'] + 32)
-            Eng2Temp = round(9.0/5.0 * fsdata.instr['Eng2ITT'] + 32)
-            Eng3Temp = round(9.0/5.0 * fsdata.instr['Eng3ITT'] + 32)
-            Eng4Temp = round(9.0/5.0 * fsdata.instr['Eng4ITT'] + 32)
-        else:
-            Eng1Temp = fsdata.instr['Eng1ITT']
-            Eng2Temp = fsdata.instr['Eng2ITT']
-            Eng3Temp = fsdata.instr['Eng3ITT']
-            Eng4Temp = fsdata.instr['Eng4ITT']
-        
+            temps = np.round(9.0/5.0 * temps + 32)
+        return temps.tolist()
+
     def readGroundSpeed(self, dt=0):
         self.sapi_q.put(F"{fsdata.instr['GroundSpeed']} knotts")
 
     def readILS(self, dt=0):
         GSNeedle = fsdata.instr['Nav1GSNeedle']
         LocNeedle = fsdata.instr['Nav1LocNeedle']
-        if GSNeedle > 0 and GSNeedle < 119:
-            GSPercent = GSNeedle / 119 * 100.0
-            self.speak(f'up {GSPercent:.0f} percent G S I')
-        elif GSNeedle < 0 and GSNeedle > -119:
-            GSPercent = abs(GSNeedle) / 119 * 100.0
-            self.speak(f'down {GSPercent:.0f} percent G S I')
-        if LocNeedle > 0 and LocNeedle < 127:
-            LocPercent = GSNeedle / 127 * 100.0
-            self.speak(F'{LocPercent:.0f} percent right')    
-        elif LocNeedle < 0 and LocNeedle > -127:
-            LocPercent = abs(GSNeedle) / 127 * 100.0
-            self.speak(F'{LocPercent:.0f} percent left')    
-
-
-    
-    def readToggle(self, instrument, name, onMessage, offMessage):
-        # There are several aircraft functions that are simply on/off toggles. 
-        # This function allows reading those without a bunch of duplicate code.
-        try:
-            if self.oldInstr[instrument] != fsdata.instr[instrument]:
-                if fsdata.instr[instrument]:
-                    self.output(F'{name} {onMessage}.')
-                else:
-                    self.output(F'{name} {offMessage}')
-                self.oldInstr[instrument] = fsdata.instr[instrument]
-        except Exception as e:
-            log.exception(F"error in instrument toggle. Instrument was {instrument}")
+        speakGS = True
+        speakLoc = True
+        if self.ILSTonesEnabled:
+            # the tones carry small deviations. Only speak a needle when it is close to full scale.
+            GSNeedle = self.ils['Nav1GSNeedle']
+            LocNeedle = self.ils['Nav1LocNeedle']
+            speakGS = abs(GSNeedle) >= 119 * self.ILSSpeechThreshold
+            speakLoc = abs(LocNeedle) >= 127 * self.ILSSpeechThreshold
+        # a pegged needle is the deviation that most needs calling, so full scale gets its own message
+        if speakGS and GSNeedle != 0:
+            direction = 'up' if GSNeedle > 0 else 'down'
+            if abs(GSNeedle) >= 119:
+                self.speak(F'{direction} full scale G S I')
+            else:
+                GSPercent = abs(GSNeedle) / 119 * 100.0
+                self.speak(f'{direction} {GSPercent:.0f} percent G S I')
+        if speakLoc and LocNeedle != 0:
+            side = 'right' if LocNeedle > 0 else 'left'
+            if abs(LocNeedle) >= 127:
+                self.speak(F'full scale {side}')
+            else:
+                LocPercent = abs(LocNeedle) / 127 * 100.0
+                self.speak(F'{LocPercent:.0f} percent {side}')
 
     def secondsToText(self, secs):
         # convert number of seconds into human readable format. Thanks to Stack Overflow for this!
@@ -1685,44 +1120,66 @@ class TFM(threading.Thread):
 
     # Announce Talking Flight Monitor(TFM) info
     def AnnounceInfo(self, dt=0, triggered = 0):
-        msg = ""
         # Get data from simulator
         self.getPyuipcData()
-        # Lookup nearest cities to aircraft position using the Geonames database.
         self.airport="test"
+        if dt:
+            self.ffScheduled = time.time()
+        # the lookups run in parallel on the flight following pool, so the polling loop never waits on
+        # the network. The report is announced when the last of them finishes.
+        lat = fsdata.instr['Lat']
+        lon = fsdata.instr['Long']
+        with self.ffLock:
+            self.ffRequest += 1
+            request = self.ffRequest
+        futures = [self.ffPool.submit(lookup, lat, lon) for lookup in (self.lookup_city, self.lookup_ocean, self.lookup_timezone)]
+        remaining = [len(futures)]
+        def done(future):
+            with self.ffLock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            self.call_on_polling_thread(self.flight_following_report, request, lat, lon, *futures)
+        for future in futures:
+            future.add_done_callback(done)
+
+    def flight_following_report(self, request, lat, lon, city, ocean, tz):
+        # city, ocean and tz are the finished lookups for the position lat, lon. Runs on the polling thread.
+        # imported here to keep them off the startup path. See deferred_startup
+        import requests
+        from babel import Locale
+        from babel.dates import get_timezone, get_timezone_name
+        if request != self.ffRequest:
+            # a newer report has been asked for since, so this one is out of date
+            log.debug(F"dropping flight following report for {lat}, {lon}")
+            return
+        msg = ""
+        # Lookup nearest cities to aircraft position using the Geonames database.
+        distance = 0
         try:
-            response = requests.get('http://api.geonames.org/findNearbyPlaceNameJSON?style=long&lat={}&lng={}&username={}&cities=cities5000&radius=200'.format(fsdata.instr['Lat'],fsdata.instr['Long'], self.geonames_username))
-            response.raise_for_status() # throw an exception if we get an error from Geonames.
-            data =response.json()
-            if len(data['geonames']) >= 1:
-                bearing = calcBearing(fsdata.instr['Lat'], fsdata.instr['Long'], float(data["geonames"][0]["lat"]), float(data["geonames"][0]["lng"]))
-                bearing =(degrees(bearing) +360) % 360
-                if self.use_metric == False:
-                    distance = float(data["geonames"][0]["distance"]) / 1.609
-                    units = 'miles'
-                else:
-                    distance = float(data["geonames"][0]["distance"])
-                    units = 'kilometers'
-                msg = 'Closest city: {} {}. {:.1f} {}. Bearing: {:.0f}. \n'.format(data["geonames"][0]["name"],data["geonames"][0]["adminName1"],distance,units,bearing)
-            else:
-                distance = 0
+            city = city.result()
+            if city is not None:
+                # the aircraft has moved on while the lookups ran, so the distance and bearing are from where it is now
+                distance = float(gcDistanceKm(fsdata.instr['Lat'], fsdata.instr['Long'], city['latitude'], city['longitude']))
+                msg = self.closest_city_message(city['name'], city['admin1'], city['latitude'], city['longitude'], distance)
         except(requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
-            log.error('latitude:{}, longitude:{}'.format(fsdata.instr['Lat'], fsdata.instr['Long']))
+            log.error('latitude:{}, longitude:{}'.format(lat, lon))
             log.exception('error getting nearest city: ' + str(e))
             self.output('cannot find nearest city. Geonames connection error. Check error log.')
-        except requests.exceptions.HTTPError as e:
-            log.error('latitude:{}, longitude:{}'.format(fsdata.instr['Lat'], fsdata.instr['Long']))
+        except (requests.exceptions.HTTPError, geocache.GeoNamesError) as e:
+            log.error('latitude:{}, longitude:{}'.format(lat, lon))
             log.exception('error getting nearest city. Error while connecting to Geonames.' + str(e))
             self.output('cannot find nearest city. Geonames may be busy. Check error log.')
+        except Exception as e:
+            log.exception('error getting nearest city: ' + str(e))
             
         # Check if we are flying over water.
         # If so, announce body of water.
         # We will continue to announce over water until the maximum radius of the search is reached.
         try:
-            response = requests.get('http://api.geonames.org/oceanJSON?lat={}&lng={}&username={}'.format(fsdata.instr['Lat'],fsdata.instr['Long'], self.geonames_username))
-            data = response.json()
-            if 'ocean' in data and distance >= 1:
-                msg = msg + 'currently over {}\n'.format(data['ocean']['name'])
+            ocean = ocean.result()
+            if ocean and distance >= 1:
+                msg = msg + 'currently over {}\n'.format(ocean)
                 self.oceanic = True
         except Exception as e:
             log.error('Error determining oceanic information: ' + str(e))
@@ -1730,11 +1187,9 @@ class TFM(threading.Thread):
             
         # Read time zone information
         try:
-            response = requests.get('http://api.geonames.org/timezoneJSON?lat={}&lng={}&username={}'.format(fsdata.instr['Lat'],fsdata.instr['Long'], self.geonames_username))
-            data = response.json()
-            
-            if 'timezoneId' in data:
-                tz = get_timezone(data['timezoneId'])
+            tzid = tz.result()
+            if tzid:
+                tz = get_timezone(tzid)
                 tzName = get_timezone_name(tz, locale=Locale.parse('en_US'))
                 if tzName != self.oldTz:
                     msg = msg + '{}.\n'.format(tzName)
@@ -1748,12 +1203,110 @@ class TFM(threading.Thread):
         else:
             self.output(msg)
 
-    
+    def prefetchRoute(self, dt=0):
+        # warm the geo cache for the tiles the aircraft will be over at the next scheduled flight following
+        # reports and at the next waypoint. Runs every minute, so predictions are refined as the aircraft gets closer.
+        if fsdata.instr['OnGround'] or fsdata.instr['GroundSpeed'] < 30:
+            return
+        # on a slow link the last batch may still be running. Skip this one rather than queue behind it.
+        if not all(future.done() for future in self.prefetching):
+            return
+        lat = fsdata.instr['Lat']
+        lon = fsdata.instr['Long']
+        km_per_second = fsdata.instr['GroundSpeed'] * 1.852 / 3600
+        horizon = self.prefetchMinutes * 60
+        interval = self.FFInterval * 60
+        now = time.time()
+        # seconds until each scheduled report within the horizon
+        ahead = np.arange(self.ffScheduled + interval, now + horizon, interval) - now
+        ahead = ahead[ahead > 0]
+        # follow the flight plan to the next waypoint when there is one, otherwise the current track
+        bearing = self.headingTrue
+        if fsdata.instr['NextWPId'].strip(b'\x00') and fsdata.instr['NextWPDistance'] > 0:
+            bearing = fsdata.instr['NextWPBaring'] + fsdata.instr['MagneticVariation'] * 360 / 65536
+            waypoint = fsdata.instr['NextWPDistance'] / 1000
+            if waypoint <= km_per_second * horizon:
+                ahead = np.append(ahead, waypoint / km_per_second)
+        if len(ahead) == 0:
+            return
+        lats, lons = geoindex.destination(lat, lon, bearing, ahead * km_per_second)
+        tiles = {geocache.geohash(a, b, self.geoCache.precision): (a, b) for a, b in zip(lats.tolist(), lons.tolist())}
+        self.prefetching = [self.prefetchPool.submit(self.prefetch, *point) for point in tiles.values()]
+
+    def prefetch(self, lat, lon):
+        # the lookups go through the cache, so tiles already fetched cost nothing
+        for lookup in (self.lookup_city, self.lookup_ocean, self.lookup_timezone):
+            try:
+                lookup(lat, lon)
+            except Exception as e:
+                log.debug(F"prefetch of {lat}, {lon} failed: {e}")
+
+    def http_session(self):
+        # one keep-alive session shared by all GeoNames requests, created on first use
+        import requests
+        with self.ffLock:
+            if self.http is None:
+                self.http = requests.Session()
+            return self.http
+
+    def geonames(self, url):
+        # the JSON reply of a GeoNames web service. Error statuses are raised, so they are not cached.
+        response = self.http_session().get(url, timeout=self.geonamesTimeout)
+        response.raise_for_status() # throw an exception if we get an error from Geonames.
+        return geocache.geonames_result(response.json())
+
+    # flight following lookups. Each uses the offline data when it is loaded, otherwise GeoNames,
+    # with the web results kept in the geo cache so the same tiles are not fetched again.
+    def cached_lookup(self, kind, lat, lon, fetch):
+        if self.geoCache is None:
+            return fetch()
+        return self.geoCache.cached(kind, lat, lon, fetch)
+
+    def lookup_city(self, lat, lon):
+        # returns a dict with name, admin1, latitude and longitude, or None if there is no city within 200 km
+        if self.geocoder is not None:
+            return self.geocoder.nearest_city(lat, lon, 200)
+        def fetch():
+            data = self.geonames('http://api.geonames.org/findNearbyPlaceNameJSON?style=long&lat={}&lng={}&username={}&cities=cities5000&radius=200'.format(lat, lon, self.geonames_username))
+            if not data.get('geonames'):
+                return None
+            city = data['geonames'][0]
+            return {'name': city['name'], 'admin1': city['adminName1'], 'latitude': float(city['lat']), 'longitude': float(city['lng'])}
+        return self.cached_lookup('city', lat, lon, fetch)
+
+    def lookup_ocean(self, lat, lon):
+        # name of the sea or ocean below, or None over land
+        if self.water is not None:
+            return self.water.lookup(lat, lon)
+        def fetch():
+            data = self.geonames('http://api.geonames.org/oceanJSON?lat={}&lng={}&username={}'.format(lat, lon, self.geonames_username))
+            return data['ocean']['name'] if 'ocean' in data else None
+        return self.cached_lookup('ocean', lat, lon, fetch)
+
+    def lookup_timezone(self, lat, lon):
+        # tz database name such as Europe/London, or None
+        if self.timezones is not None:
+            return self.timezones.lookup(lat, lon)
+        def fetch():
+            return self.geonames('http://api.geonames.org/timezoneJSON?lat={}&lng={}&username={}'.format(lat, lon, self.geonames_username)).get('timezoneId')
+        return self.cached_lookup('timezone', lat, lon, fetch)
+
+    def closest_city_message(self, name, region, lat, lon, distance):
+        # distance is in km
+        bearing = calcBearing(fsdata.instr['Lat'], fsdata.instr['Long'], lat, lon)
+        bearing =(degrees(bearing) +360) % 360
+        if self.use_metric == False:
+            distance = distance / 1.609
+            units = 'miles'
+        else:
+            units = 'kilometers'
+        return 'Closest city: {} {}. {:.1f} {}. Bearing: {:.0f}. \n'.format(name, region, distance, units, bearing)
+
     # Read data from the simulator
     def getPyuipcData(self, type=0, dt=0):
         try:
             # l.acquire()
-            # read types: 0 - all, 1 - instrumentation, 2 - SimConnect, 3 - attitude    
+            # read types: 0 - all, 1 - instrumentation, 2 - SimConnect, 3 - attitude, 4 - ILS needles
             if type == 0 or type == 1:
                 fsdata.instr = dict(zip(fsdata.InstrOffsets.keys(), pyuipc.read(self.pyuipcOffsets)))
                 # prepare instrumentation variables
@@ -1765,6 +1318,10 @@ class TFM(threading.Thread):
                 fsdata.instr['Lat'] = fsdata.instr['Lat'] *(90.0/(10001750.0 * 65536.0 * 65536.0))
                 fsdata.instr['Long'] = fsdata.instr['Long'] *(360.0/(65536.0 * 65536.0 * 65536.0 * 65536.0))
                 fsdata.instr['Flaps'] = fsdata.instr['Flaps'] / 256
+                fsdata.fuel = fuel.FuelTanks.decode([fsdata.instr['fuel_tanks'], fsdata.instr['fuel_center_tanks']], fsdata.instr['fuel_weight'])
+                fsdata.engines = engines.Engines(fsdata.instr['engine_block'], fsdata.instr['turbine_block'], fsdata.instr['switch_block'], fsdata.instr['fuel_valve_block'], fsdata.instr['num_engines'])
+                # the per engine values are also kept under their own names, such as Eng1Starter, for the announcement rules
+                fsdata.engines.publish(fsdata.instr)
                 fsdata.instr['OnGround'] = bool(fsdata.instr['OnGround'])
                 fsdata.instr['ParkingBrake'] = bool(fsdata.instr['ParkingBrake'])
                 fsdata.instr['Altitude'] = round(fsdata.instr['Altitude'])
@@ -1781,6 +1338,8 @@ class TFM(threading.Thread):
                 fsdata.instr['GroundSpeed'] = round((fsdata.instr['GroundSpeed'] * 3600) /(65536 * 1852))
                 fsdata.instr['NextWPETA'] = time.strftime('%H:%M', time.localtime(fsdata.instr['NextWPETA']))
                 fsdata.instr['NextWPBaring'] = degrees(fsdata.instr['NextWPBaring'])
+                # kept in seconds for the fuel estimate
+                self.destETE = fsdata.instr['DestETE']
                 fsdata.instr['DestETE'] =self.secondsToText(fsdata.instr['DestETE'])
                 fsdata.instr['DestETA'] = time.strftime('%H:%M', time.localtime(fsdata.instr['DestETA']))
                 fsdata.instr['ElevatorTrim'] = degrees(fsdata.instr['ElevatorTrim'])
@@ -1821,10 +1380,6 @@ class TFM(threading.Thread):
                 self.AltQNH = fsdata.instr['Altimeter'] / 16
                 self.AltHPA = floor(self.AltQNH + 0.5)
                 self.AltInches = floor(((100 * self.AltQNH * 29.92) / 1013.2) + 0.5)
-                fsdata.instr['Eng1ITT'] = round(fsdata.instr['Eng1ITT'] / 16384)
-                fsdata.instr['Eng2ITT'] = round(fsdata.instr['Eng2ITT'] / 16384)
-                fsdata.instr['Eng3ITT'] = round(fsdata.instr['Eng3ITT'] / 16384)
-                fsdata.instr['Eng4ITT'] = round(fsdata.instr['Eng4ITT'] / 16384)
                 fsdata.instr['WindDirection'] = fsdata.instr['WindDirection'] *360/65536
                 # prepare A2A aircraft data
                 fsdata.bonanza = dict(zip(fsdata.BonanzaOffsets.keys(), pyuipc.read(self.pyuipcBonanza)))
@@ -1864,6 +1419,8 @@ class TFM(threading.Thread):
                 self.attitude = dict(zip(fsdata.AttitudeOffsets.keys(), pyuipc.read(self.pyuipcAttitude)))
                 self.attitude['Pitch'] = self.attitude['Pitch'] * 360 /(65536 * 65536)
                 self.attitude['Bank'] = self.attitude['Bank'] * 360 /(65536 * 65536)
+            if type == 0 or type == 4:
+                self.ils = dict(zip(fsdata.ILSOffsets.keys(), pyuipc.read(self.pyuipcILS)))
             # l.release()
         except pyuipc.FSUIPCException as e:
             log.exception("error reading from simulator. This could be normal. Exiting.")
@@ -2052,58 +1609,40 @@ class TFM(threading.Thread):
         try:
             # aircraft data is stored in a series of 96 40-byte structures at offset 0xf080
             log.debug ("nearest airborn aircraft")
-            high_alt = fsdata.instr['Altitude'] + 5000
-            low_alt = fsdata.instr['Altitude'] - 5000
-            ac_lat = fsdata.instr['Lat']
-            ac_lon = fsdata.instr['Long']
-            data = pyuipc.read([(0xf080, 3840)])
-            ac_temp = []
-            # read aircraft records from offset
-            with BytesIO(data[0]) as stream:
-                records = [stream.read(40) for _ in range(96)]
-            for record in records:
-                keys = ['id', 'lat', 'lon', 'alt', 'hdg', 'gs', 'vs', 'atc', 'state', 'com']
-                values = struct.unpack("i 3f 2H h 15s B h", record)
-                ac_temp.append(dict(zip(keys, values)))    
-            # filter out anything with an ID of 0
-            ac = [ i for i in ac_temp if i['id'] != 0 and i['state'] != 0x81]
-            # loop through the new list and calculate distances
-            for i, record in enumerate(ac):
-                ac[i]['distance'] = round(gcDistanceNm(ac_lat, ac_lon, ac[i]['lat'], ac[i]['lon']), 1)
-                ac[i]['hdg'] = ac[i]['hdg'] *360/65536
-            # sort the list by distance
-            ac.sort(key=itemgetter('distance'))
+            traffic, ground = self.read_traffic()
+            traffic = traffic.filter(traffic.field('state') != tcas.STATE_SLEEPING)
+            # only report aircraft within 5000 feet of our altitude
+            traffic = traffic.within_altitude(fsdata.instr['Altitude'] - 5000, fsdata.instr['Altitude'] + 5000)
         except Exception as e:
             log.exception("error reading airborn aircraft data")
+            return
             
         try:
             # if the list is empty, then no aircraft are in range
-            if len(ac) == 0:
+            if len(traffic) == 0:
                 self.output("no aircraft")
                 pub.sendMessage('reset', arg1=True)
                 return
-            if len(ac) < 5: 
-                num_ac = len(ac)
-            else:
-                num_ac = 5
-                self.output("closest aircraft: ")
-                for i in range(0, num_ac):
-                    if ac[i]['alt'] >= high_alt or ac[i]['alt'] <= low_alt:
-                        continue
-                    atc = ac[i]['atc'].replace(b'\x00', b'')
-                    atc = atc.decode()
-                    self.output(F"{atc}. ")
-                    self.output(F"{self.ac_state[ac[i]['state']]}. ")
-                    self.output (F"{ac[i]['distance']} nautical miles.  ")
-                    self.output (F"heading: {round(ac[i]['hdg'])}. ")
-                    self.output (F"Altitude: {round(ac[i]['alt'])} feet. ")
+            self.output("closest aircraft: ")
+            for i in range(min(len(traffic), 5)):
+                contact = traffic[i]
+                self.output(F"{contact.atc}. ")
+                self.output(F"{self.ac_state[contact.state]}. ")
+                self.output (F"{contact.distance:.1f} nautical miles.  ")
+                self.output (F"heading: {round(contact.heading)}. ")
+                self.output (F"Altitude: {round(contact['alt'])} feet. ")
+                track = self.airTraffic.tracks.get(contact.id)
+                if track is not None and track.closure_rate >= 10:
+                    self.output (F"closing at {round(track.closure_rate)} knots. ")
             pub.sendMessage('reset', arg1=True)
         except Exception as e:
             log.exception("error processing airborn aircraft info")
         
     def tcas_ground(self, msg=None):
         log.debug ("reading ground traffic")
-        if self.airports_available:
+        if not self.airportDataLoaded.is_set():
+            self.output ("airport data is still loading")
+        elif self.airports_available:
             if config.app['config']['online_mode']:
                 self.read_online_ground()
             else:
@@ -2117,127 +1656,49 @@ class TFM(threading.Thread):
         ac_lon = fsdata.instr['Long']
         ap, ap_name = self.find_nearest_airport(ac_lat, ac_lon)
         log.debug("reading ground AI data from FSUIPC")
-        data = pyuipc.read([
-            (0xe080, 3840),
-            (0XD040, 1920),
-            ])
-        ac = []
-        tcas2 = []
-        # read aircraft records from offset
-        with BytesIO(data[0]) as stream:
-            records = [stream.read(40) for _ in range(96)]
-        for record in records:
-            keys = ['id', 'lat', 'lon', 'alt', 'hdg', 'gs', 'vs', 'atc', 'state', 'com']
-            values = struct.unpack("i 3f 2H h 15s B h", record)
-            ac.append(dict(zip(keys, values)))    
-        # read ADDITIONAL AIRCRAFT DATA records from offset
-        with BytesIO(data[1]) as stream:
-            records = [stream.read(20) for _ in range(96)]
-        for record in records:
-            keys = ['GateName', 'GateType', 'GateNumber', 'Unused', 'Pitch', 'departure', 'arrival', 'Runway', 'RunwayDesignator', 'Bank']
-            values = struct.unpack("2B 2H h 4s 4s 2B h", record)
-            tcas2.append(dict(zip(keys, values)))    
-        
-        # loop through the aircraft list and set properties
-        try:
-            for i, record in enumerate(ac):
-                if ac[i]['id'] != 0:
-                    if tcas2[i]['GateName'] > 0:
-                        ac[i]['GateName'] = fsdata.tcas_gate_name[tcas2[i]['GateName']]
-                    ac[i]['GateType'] = tcas2[i]['GateType']
-                    ac[i]['GateNumber'] = tcas2[i]['GateNumber']
-                    ac[i]['Runway'] = tcas2[i]['Runway']
-                    ac[i]['departure'] = tcas2[i]['departure']
-                    ac[i]['arrival'] = tcas2[i]['arrival']
-                    if tcas2[i]['RunwayDesignator'] > 0:
-                        ac[i]['RunwayDesignator'] = fsdata.tcas_runway_designator[tcas2[i]['RunwayDesignator']]
-                    
-        except Exception as e:
-            log.exception ("error setting ground aircraft properties")
-        
-        ac_sleeping = [ i for i in ac if i['id'] != 0 and i['state'] == 0x81]
-        log.debug (F"{len(ac_sleeping)} sleeping")
-        ac_taxi_prep = [ i for i in ac if i['id'] != 0 and i['state'] == 0x87]
-        log.debug (F"{len(ac_taxi_prep)} taxi prep")
-        ac_taxi_out = [ i for i in ac if i['id'] != 0 and i['state'] == 0x88]
-        log.debug (F"{len(ac_taxi_out)} taxi out")
-        ac_takeoff_prep = [ i for i in ac if i['id'] != 0 and i['state'] == 0x89]
-        log.debug (F"{len(ac_takeoff_prep)} takeoff prep")
-        ac_takeoff = [ i for i in ac if i['id'] != 0 and i['state'] == 0x8a]
-        log.debug (F"{len(ac_takeoff)} take off")
-        ac_taxi_in = [ i for i in ac if i['id'] != 0 and i['state'] == 0x91]
-        log.debug (F"{len(ac_taxi_in)} taxi in")
-        ac_filtered = [ i for i in ac if i['id'] != 0]
-
-        # sort the list by distance
-        # ac_filtered.sort(key=itemgetter('distance'))
+        # the ADDITIONAL AIRCRAFT DATA table at 0xd040 has gate and runway assignments for each ground slot
+        air, traffic = self.read_traffic()
+        # counts by state, departure queues by runway and parked aircraft by gate type
+        summary = tcas.GroundSummary(traffic)
+        log.debug (F"ground aircraft by state: {summary.by_state}")
+
         # if the list is empty, then no aircraft are in range
-        if len(ac_filtered) == 0:
+        if len(traffic) == 0:
             self.output("no ground AI aircraft")
             return
         self.output("ground traffic: ")
-        self.output (F"{len(ac_filtered)} AI aircraft")
-        self.output (F"{len(ac_sleeping)} inactive")
-        log.debug ("reading taxi prep")
-        try:
-            if len(ac_taxi_prep) > 0:
-                for i in range(len(ac_taxi_prep)):
-                    atc = ac_taxi_prep[i]['atc'].replace(b'\x00', b'')
-                    atc = atc.decode()
-                    arrival = ac_taxi_prep[i]['arrival'].replace(b'\x00', b'')
-                    arrival = arrival.decode()
-                    ap_name = self.a_data[self.a_data['id'] == arrival].name.values[0]
-                    self.output(F"{atc} to {arrival}, {ap_name}. Preparing to taxi to Runway {ac_taxi_prep[i]['Runway']} {ac_taxi_prep[i]['RunwayDesignator']}. ")
-        except Exception as e:
-            log.exception("error reading taxi in aircraft")
-
-        try:
-            if len(ac_taxi_out) > 0:
-                for i in range(len(ac_taxi_out)):
-                    atc = ac_taxi_out[i]['atc'].replace(b'\x00', b'')
-                    atc = atc.decode()
-                    arrival = ac_taxi_out[i]['arrival'].replace(b'\x00', b'')
-                    arrival = arrival.decode()
-                    ap_name = self.a_data[self.a_data['id'] == arrival].name.values[0]
-                    self.output(F"{atc} to {arrival}, {ap_name}. Taxiing out to Runway {ac_taxi_out[i]['Runway']} {ac_taxi_out[i]['RunwayDesignator']}. ")
-        
-        except Exception as e:
-            log.exception("error reading taxi out aircraft")
-        try:
-            if len(ac_takeoff_prep) > 0:
-                for i in range(len(ac_takeoff_prep)):
-                    atc = ac_takeoff_prep[i]['atc'].replace(b'\x00', b'')
-                    atc = atc.decode()
-                    arrival = ac_takeoff_prep[i]['arrival'].replace(b'\x00', b'')
-                    arrival = arrival.decode()
-                    ap_name = self.a_data[self.a_data['id'] == arrival].name.values[0]
-                    self.output(F"{atc} to {arrival}, {ap_name}. preparing for takeoff,  Runway {ac_takeoff_prep[i]['Runway']} {ac_takeoff_prep[i]['RunwayDesignator']}. ")
-        except Exception as e:
-            log.exception("error reading takeoff prep aircraft")
+        self.output (F"{len(traffic)} AI aircraft")
+        parked = ", ".join(F"{count} {fsdata.tcas_gate_type[gate_type]}" for gate_type, count in summary.gate_types.items() if gate_type in fsdata.tcas_gate_type)
+        if parked:
+            self.output (F"{summary.count(tcas.STATE_SLEEPING)} inactive: {parked}")
+        else:
+            self.output (F"{summary.count(tcas.STATE_SLEEPING)} inactive")
         try:
-            if len(ac_takeoff) > 0:
-                for i in range(len(ac_takeoff)):
-                    atc = ac_takeoff[i]['atc'].replace(b'\x00', b'')
-                    atc = atc.decode()
-                    arrival = ac_takeoff[i]['arrival'].replace(b'\x00', b'')
-                    arrival = arrival.decode()
-                    ap_name = self.a_data[self.a_data['id'] == arrival].name.values[0]
-                    self.output(F"{atc} to {arrival}, {ap_name}. taking off,  Runway {ac_takeoff[i]['Runway']} {ac_takeoff[i]['RunwayDesignator']}. ")
+            for runway, queue in sorted(summary.departures.items()):
+                contact = queue[0]
+                arrival = tcas.text(contact.extended['arrival'])
+                self.output(F"departure queue for runway {self.tcas_runway(contact)}: {len(queue)}, next is {contact.atc} to {arrival}, {self.airport_name(arrival)}, {self.ac_state[contact.state]}. ")
         except Exception as e:
-            log.exception("error reading taking off aircraft")
+            log.exception("error reading departing aircraft")
 
         try:
-            if len(ac_taxi_in) > 0:
-                for i in range(len(ac_taxi_in)):
-                    atc = ac_taxi_in[i]['atc'].replace(b'\x00', b'')
-                    atc = atc.decode()
-                    departure = ac_taxi_in[i]['departure'].replace(b'\x00', b'')
-                    departure = departure.decode()
-                    ap_name = self.a_data[self.a_data['id'] == departure].name.values[0]
-                    self.output (F"{atc} from {departure}, {ap_name}. taxiing in to gate {ac_taxi_in[i]['GateName']} {ac_taxi_in[i]['GateNumber']}. ")
+            for contact in traffic.in_state(tcas.STATE_TAXI_IN):
+                departure = tcas.text(contact.extended['departure'])
+                ap_name = self.airport_name(departure)
+                self.output (F"{contact.atc} from {departure}, {ap_name}. taxiing in to gate {self.tcas_gate(contact)}. ")
         except Exception as e:
             log.exception("error reading taxi in aircraft")
 
+    def tcas_runway(self, contact):
+        # assigned runway of a ground AI aircraft, such as 27 left
+        # runway numbers above 36 are compass directions for water and unmarked runways
+        ext = contact.extended
+        runway = fsdata.tcas_runway.get(int(ext['Runway']), ext['Runway'])
+        return F"{runway} {fsdata.tcas_runway_designator.get(int(ext['RunwayDesignator']), '')}".strip()
+
+    def tcas_gate(self, contact):
+        ext = contact.extended
+        return F"{fsdata.tcas_gate_name.get(int(ext['GateName']), '')} {ext['GateNumber']}".strip()
         
         
     def read_online_ground(self):
@@ -2245,179 +1706,298 @@ class TFM(threading.Thread):
         ac_lon = fsdata.instr['Long']
         if config.app['config']['use_metric']:
             units = "meters"
+            scale = 1852
         else:
             units = "feet"
-        data = pyuipc.read([
-            (0xe080, 3840),
-            ])
-        ac = []
+            scale = 1852 * 3.28084
         ap, ap_name = self.find_nearest_airport(ac_lat, ac_lon)
         log.debug(F"checking ground traffic for {ap}. ")
-        # read aircraft records from ground data structure
-        with BytesIO(data[0]) as stream:
-            records = [stream.read(40) for _ in range(96)]
-        for record in records:
-            keys = ['id', 'lat', 'lon', 'alt', 'hdg', 'gs', 'vs', 'atc', 'state', 'com']
-            values = struct.unpack("i 3f 2H h 15s B h", record)
-            ac.append(dict(zip(keys, values)))    
-        ac = [ i for i in ac if i['id'] != 0]
-        # loop through the new list and calculate distances
-        for i, record in enumerate(ac):
-            if units == "meters":
-                ac[i]['distance'] = self.calc_distance(ac[i]['lat'], ac[i]['lon'], ac_lat, ac_lon) * 1000
-            else:
-                ac[i]['distance'] = self.calc_distance(ac[i]['lat'], ac[i]['lon'], ac_lat, ac_lon) * 1000 * 3.28084
-        # sort the list by distance
-        ac.sort(key=itemgetter('distance'))
-        for i, record in enumerate(ac):
-            atc = ac[i]['atc'].replace(b'\x00', b'')
-            atc = atc.decode('UTF-8', 'ignore')
-            ng = self.find_nearest_gate(ap, ac[i]['lat'], ac[i]['lon'])
-            if len(ng) > 0:
-                self.output (F"{atc}, gate {ng[0]['gate']}")
+        # aircraft from the ground data structure, nearest first
+        air, traffic = self.read_traffic()
+        # match every aircraft to the gates within 50 metres and runway ends within 100 metres at once
+        lats = traffic.field('lat')
+        lons = traffic.field('lon')
+        gates = runways = [None] * len(traffic)
+        if self.gates_available:
+            gates = self.gate_points.match(ap, lats, lons, 0.05)[0]
+        if self.runways_available:
+            runways = self.runway_points.match(ap, lats, lons, 0.1)[0]
+        for i, contact in enumerate(traffic):
+            atc = contact.atc
+            distance = contact.distance * scale
+            if gates[i] is not None:
+                self.output (F"{atc}, gate {gates[i]}")
                 continue
-            nr = self.find_nearest_runway(ap, ac[i]['lat'], ac[i]['lon'])
-            if len(nr) > 0:
-                self.output (F"{atc}, runway {nr[0]['runway']}")
+            if runways[i] is not None:
+                self.output (F"{atc}, runway {runways[i]}")
                 continue
-            if ac[i]['gs'] > 0:
-                self.output (F"{atc}, {round(ac[i]['distance'])} {units}. speed: {ac[i]['gs']} knotts. ")
+            if contact['gs'] > 0:
+                self.output (F"{atc}, {round(distance)} {units}. speed: {contact['gs']} knotts. ")
             else:
-                self.output (F"{atc}, {round(ac[i]['distance'])} {units}.")
+                self.output (F"{atc}, {round(distance)} {units}.")
 
 
 
         
+    def deferred_startup(self):
+        # second stage of startup, run in its own thread once the simulator connection is up.
+        if self.FFEnabled:
+            # import the network modules now, rather than on the first flight following announcement
+            try:
+                import requests
+                import babel.dates
+            except Exception as e:
+                log.exception("error importing flight following modules")
+        self.load_airport_data()
+        startup.mark("airport data loaded")
+        # the offline lookups are only needed by flight following, so they are imported here rather than at startup
+        import geocoder
+        import timezones
+        import waterbodies
+        if self.FFEnabled and self.offlineCities and os.path.exists('data/cities5000.txt'):
+            try:
+                admin1 = 'data/admin1CodesASCII.txt' if os.path.exists('data/admin1CodesASCII.txt') else None
+                self.geocoder = geocoder.ReverseGeocoder('data/citydb', 'data/cities5000.txt', admin1)
+                startup.mark("cities loaded")
+            except Exception as e:
+                log.exception("error loading cities database")
+        if self.FFEnabled and self.offlineTimezones and os.path.exists('data/combined.json'):
+            try:
+                self.timezones = timezones.TimezoneIndex('data/tzdb', 'data/combined.json')
+                startup.mark("timezones loaded")
+            except Exception as e:
+                log.exception("error loading timezone boundaries")
+        if self.FFEnabled and self.offlineWater and os.path.exists('data/ne_10m_geography_marine_polys.geojson'):
+            try:
+                self.water = waterbodies.WaterIndex('data/waterdb', 'data/ne_10m_geography_marine_polys.geojson')
+                startup.mark("water bodies loaded")
+            except Exception as e:
+                log.exception("error loading water bodies")
+        if self.airports_available:
+            self.output("airport data ready")
+
+    def load_airport_data(self):
+        # The database columns are memory mapped, so only the indexes take memory.
+        import airportdb
+        try:
+            sources = ['data/runways.xml', 'data/g5.csv', 'data/r5.csv']
+            if any(os.path.exists(f) for f in sources) and not airportdb.is_current('data/airportdb', sources):
+                log.debug ("airport database missing or out of date. Building database")
+                self.build_airport_database()
+            self.airport_db = {}
+            if os.path.exists('data/airportdb'):
+                log.debug ("found airport database.")
+                self.airport_db = airportdb.load('data/airportdb')
+            if 'runway_ends' in self.airport_db:
+                self.runway_points = self.group_runways(self.airport_db['runway_ends'])
+                self.runways_available = True
+            else:
+                log.debug("r5.csv file not found in data directory. Functionality of online ground traffic will be limited.")
+            if 'gates' in self.airport_db:
+                self.gate_points = self.group_gates(self.airport_db['gates'])
+                self.gates_available = True
+            else:
+                log.debug("g5.csv file not found in data directory. Functionality of online ground traffic will be limited")
+            if 'airports' in self.airport_db:
+                self.build_airport_index()
+                self.airports_available = True
+            else:
+                log.debug("no airport data found")
+                wx.CallAfter(wx.MessageBox, "Airport data not available. Reading of ground traffic will not function. See instructions in the tfm.html file.", "error", wx.OK | wx.ICON_ERROR)
+        except Exception as e:
+            log.exception("error loading airport data")
+        finally:
+            self.airportDataLoaded.set()
+
+    def build_airport_index(self):
+        airports = self.airport_db['airports']
+        # filter out bogus ICAO codes added by Traffic Global
+        self.airport_rows = np.flatnonzero(~np.char.startswith(airports['id'], "JF"))
+        self.airport_index = geoindex.GridIndex(airports['latitude'][self.airport_rows], airports['longitude'][self.airport_rows])
+        self.airport_ids = {icao: i for i, icao in enumerate(airports['id'])}
+        log.debug(F"indexed {len(self.airport_index)} airports")
+
+    def airport_name(self, icao):
+        i = self.airport_ids.get(icao)
+        if i is None:
+            return ''
+        return str(self.airport_db['airports']['name'][i])
+
+    def nearest_airports(self, lat, lon, k=1, radius=None):
+        # returns the airport table columns for the k nearest airports within radius km, nearest first,
+        # with a distance column in km
+        index, distance = self.airport_index.nearest(lat, lon, k, radius)
+        rows = self.airport_rows[index]
+        airports = {key: values[rows] for key, values in self.airport_db['airports'].items()}
+        airports['distance'] = distance
+        return airports
+
     def find_nearest_airport(self, lat, lon):
-        if self.cached_airport != None:
-            dist = self.calc_distance(fsdata.instr['Lat'], fsdata.instr['Long'], self.cached_airport[0], self.cached_airport[1])
-            if dist < 25:
-                ap = self.cached_airport[2]
-                ap_name = self.cached_airport[3]
-                return ap, ap_name
-        for i, row in self.a_data.iterrows():
-            # filter out bogus ICAO codes added by Traffic Global
-            if row['id'][0:2] == "JF":
-                continue
-            dist = self.calc_distance(lat, lon, row['latitude'], row['longitude'])
-            if dist < 5:
-                
-                ap = row['id']
-                ap_name = row['name']
-        self.cached_airport = [lat, lon, ap, ap_name]
-        self.output(F"airport: {ap}, {ap_name}. ")
+        airports = self.nearest_airports(lat, lon, 1, 5)
+        if len(airports['id']) == 0:
+            self.output("no airport nearby. ")
+            return None, None
+        ap = str(airports['id'][0])
+        ap_name = str(airports['name'][0])
+        if ap != self.cached_airport:
+            self.output(F"airport: {ap}, {ap_name}. ")
+            self.cached_airport = ap
         return ap, ap_name
 
+    def group_gates(self, gates):
+        # gate positions grouped by airport, labelled with the gate name and number
+        named = np.flatnonzero(gates['GateName'] != '')
+        labels = np.char.add(gates['GateName'][named], gates['GateNumber'][named])
+        return geoindex.GroupedPoints(gates['ICAO'][named], gates['Latitude'][named], gates['Longitude'][named], labels)
+
+    def group_runways(self, runways):
+        # runway ends grouped by airport. Rwy is the runway number followed by a designator digit, such as 0271 for 27 left
+        labels = []
+        for rwy in runways['Rwy']:
+            rwy = str(rwy)
+            number = rwy[0:-1].lstrip('0') or rwy[0:-1]
+            designator = fsdata.tcas_runway_designator.get(int(rwy[-1]), '') if rwy[-1:].isdigit() else ''
+            labels.append(F"{number} {designator}".strip())
+        return geoindex.GroupedPoints(runways['ICAO'], runways['Latitude'], runways['Longitude'], labels)
+
     def find_nearest_gate(self, ap, lat, lon):
-        gates = []
-        g_distance = {}
-        # extract data for our airport location
-        g = self.g_data[
-            self.g_data['ICAO'] == ap 
-            ]
-        for i, row in g.iterrows():
-            dist = self.calc_distance(lat, lon, row['Latitude'], row['Longitude']) * 1000
-            if dist < 50:
-                g_distance['distance'] = dist
-                if pd.isna(row['GateName']):
-                    continue
-                else:
-                    g_distance['gate'] = str(row['GateName']) + str(row['GateNumber'])
-                gates.append(g_distance)
-        # gates.sort(key=itemgetter('distance'))
-        return gates
+        # gates within 50 metres
+        if not self.gates_available:
+            return []
+        labels, distance = self.gate_points.match(ap, lat, lon, 0.05)
+        if labels[0] is None:
+            return []
+        return [{'distance': distance[0] * 1000, 'gate': labels[0]}]
 
     def find_nearest_runway(self, ap, lat, lon):
-        runways = []
-        r_distance = {}
-        # extract data for our airport location
-        r = self.r_data[
-            self.r_data['ICAO'] == ap 
-            ]
-        for i, row in r.iterrows():
-            
-            dist = self.calc_distance(lat, lon, row['Latitude'], row['Longitude']) * 1000
-            if dist < 100:
-                rwy = str(row['Rwy'])
-                
-                rwy_no = rwy[0:-1]
-                rwy_des = fsdata.tcas_runway_designator[int(rwy[-1])]
-                r_distance['distance'] = dist
-                r_distance['runway'] = rwy_no + " " + rwy_des
-                runways.append(r_distance)
-        return runways
+        # runway ends within 100 metres
+        if not self.runways_available:
+            return []
+        labels, distance = self.runway_points.match(ap, lat, lon, 0.1)
+        if labels[0] is None:
+            return []
+        return [{'distance': distance[0] * 1000, 'runway': labels[0]}]
 
     def read_ai_air(self):
         try:
-            ac_lat = fsdata.instr['Lat']
-            ac_lon = fsdata.instr['Long']
-            data = pyuipc.read([(0xf080, 3840)])
-            ac_temp = []
-            # read aircraft records from offset
-            with BytesIO(data[0]) as stream:
-                records = [stream.read(40) for _ in range(96)]
-            for record in records:
-                keys = ['id', 'lat', 'lon', 'alt', 'hdg', 'gs', 'vs', 'atc', 'state', 'com']
-                values = struct.unpack("i 3f 2H h 15s B h", record)
-                ac_temp.append(dict(zip(keys, values)))    
-            # filter out anything with an ID of 0
-            ac = [ i for i in ac_temp if i['id'] != 0 ]
-            # loop through the new list and calculate distances
-            for i, record in enumerate(ac):
-                ac[i]['distance'] = round(gcDistanceNm(ac_lat, ac_lon, ac[i]['lat'], ac[i]['lon']), 1)
-                ac[i]['hdg'] = ac[i]['hdg'] *360/65536
-
-            # sort the list by distance
-            ac.sort(key=itemgetter('distance'))
-            return ac
+            # airborne traffic sorted by distance
+            air, ground = self.read_traffic()
+            return air
         except Exception as e:
             log.exception("error reading airborn aircraft")
+
+    def read_traffic(self):
+        # returns the airborne and ground Traffic tables. The tracker's last poll is used
+        # if it is recent, otherwise the tables are read from FSUIPC.
+        now = time.time()
+        max_age = self.trafficInterval * 2
+        if self.trafficInterval > 0 and self.airTraffic.fresh(now, max_age) and self.groundTraffic.fresh(now, max_age):
+            return self.airTraffic.traffic, self.groundTraffic.traffic
+        data = pyuipc.read([
+            (0xf080, 3840),
+            (0xe080, 3840),
+            (0xd040, 1920),
+            ])
+        lat = fsdata.instr['Lat']
+        lon = fsdata.instr['Long']
+        return tcas.Traffic.read(data[0], lat, lon), tcas.Traffic.read(data[1], lat, lon, extended_block=data[2])
+
+    def trackTraffic(self, dt=0):
+        try:
+            data = pyuipc.read([
+                (0xf080, 3840),
+                (0xe080, 3840),
+                (0xd040, 1920),
+                ])
+            lat = fsdata.instr['Lat']
+            lon = fsdata.instr['Long']
+            now = time.time()
+            air = tcas.Traffic.read(data[0], lat, lon)
+            ground = tcas.Traffic.read(data[1], lat, lon, extended_block=data[2])
+            air_events = self.airTraffic.update(air, fsdata.instr['Altitude'], self.headingTrue, now)
+            ground_events = self.groundTraffic.update(ground, fsdata.instr['Altitude'], self.headingTrue, now)
+        except Exception as e:
+            log.exception("error tracking traffic")
+            return
+        if self.trafficAlerts and not fsdata.instr['OnGround']:
+            for event, track in air_events:
+                if event == 'proximity':
+                    self.output(self.traffic_alert(track))
+        if self.trafficGroundStates:
+            for event, track in ground_events:
+                if event == 'state':
+                    self.output(F"{track.atc} {self.ac_state.get(track.state, 'unknown state')}")
+
+    def trackFuel(self, dt=0):
+        tanks = fsdata.fuel
+        if tanks is None:
+            return
+        flow = fsdata.engines.total_fuel_flow
+        burn = self.fuelBurn
+        burn.update(time.time(), tanks.total_weight, flow, fsdata.instr['GroundSpeed'], self.destETE)
+        if not self.fuelAlerts or fsdata.instr['OnGround']:
+            return
+        if burn.endurance is not None:
+            minutes = burn.endurance * 60
+            for threshold, direction in self.enduranceAlert.update(minutes):
+                if direction < 0:
+                    self.output(F"fuel reserve: {round(minutes)} minutes of fuel remaining")
+        if burn.at_destination is not None and burn.burn:
+            minutes = burn.at_destination / burn.burn * 60
+            for threshold, direction in self.destinationAlert.update(minutes):
+                if direction < 0:
+                    self.output(F"fuel at destination below {round(threshold)} minute reserve")
+        if self.fuelImbalance > 0:
+            for threshold, direction in self.imbalanceAlert.update(abs(tanks.imbalance)):
+                if direction > 0:
+                    side = 'left' if tanks.imbalance > 0 else 'right'
+                    self.output(F"fuel imbalance: {round(abs(tanks.imbalance))} pounds heavy {side}")
+
+    def traffic_alert(self, track):
+        # such as: traffic, 2 o'clock, 3 miles, 500 feet above, descending
+        message = F"traffic, {tcas.clock_position(track.relative_bearing)} o'clock, {track.range:.0f} miles, "
+        altitude = round(track.relative_altitude / 100) * 100
+        if altitude > 0:
+            message += F"{altitude} feet above"
+        elif altitude < 0:
+            message += F"{abs(altitude)} feet below"
+        else:
+            message += "same altitude"
+        if track.altitude_trend > 500:
+            message += ", climbing"
+        elif track.altitude_trend < -500:
+            message += ", descending"
+        return message
             
 
 
-    def calc_distance(self, lat1, lon1, lat2, lon2):
-        """
-        Calculate the great circle distance between two points
-        on the earth (specified in decimal degrees)
-        """
-            # convert decimal degrees to radians
-        lon1, lat1, lon2, lat2 = map(np.radians, [lon1, lat1, lon2, lat2])
-        # haversine formula
-        dlon = lon2 - lon1
-        dlat = lat2 - lat1
-        a = (np.sin(dlat/2)**2
-        + np.cos(lat1) * np.cos(lat2) * np.sin(dlon/2)**2)
-        c = 2 * np.arcsin(np.sqrt(a))
-        km = 6367 * c
-        return km
+    def checkWater(self, dt=0):
+        # announce crossing a coastline, or passing from one sea to another, when it happens
+        if self.water is None or fsdata.instr['OnGround']:
+            return
+        try:
+            body = self.water.lookup(fsdata.instr['Lat'], fsdata.instr['Long'])
+        except Exception as e:
+            log.exception("error checking water bodies")
+            return
+        if self.waterChecked and body != self.waterBody:
+            if body is None:
+                self.output(F"crossing the coast, leaving {self.waterBody or 'open water'}")
+            elif self.waterBody is None:
+                self.output(F"crossing the coast, now over {body or 'open water'}")
+            else:
+                self.output(F"now over {body or 'open water'}")
+        self.oceanic = body is not None
+        self.waterBody = body
+        self.waterChecked = True
 
     def build_airport_database(self):
         self.output ("building airport data file.")
-        xtree = et.parse("data/runways.xml")
-        xroot = xtree.getroot()
-        df_cols = ['id', 'name', 'country', 'state', 'city', 'longitude', 'latitude', 'altitude']
-        rows = []
-        for node in xroot:
-            a_id = node.attrib.get("id")
-            a_name = node.find("ICAOName").text if node is not None else None
-            a_country = node.find("Country").text if node is not None else None
-            a_city = node.find("City").text if node is not None else None
-            a_latitude = node.find("Latitude").text if node is not None else None
-            a_longitude = node.find("Longitude").text if node is not None else None
-            a_altitude = node.find("Altitude").text if node is not None else None
-            rows.append({
-                "id": a_id, 
-                "name": a_name,
-                "country": a_country,
-                "city": a_city,
-                "latitude": a_latitude,
-                "longitude": a_longitude,
-                "altitude": a_altitude
-                })
-
-        a_data = pd.DataFrame(rows, columns = df_cols)
-        a_data['latitude'] = a_data['latitude'].astype("float64")
-        a_data['longitude'] = a_data['longitude'].astype("float64")
-        a_data['altitude'] = a_data['altitude'].astype("float64")
-        a_data.to_pickle('data/airports.dat')
+        import airportdb
+        try:
+            airportdb.build('data/airportdb', 'data/runways.xml', 'data/g5.csv', 'data/r5.csv')
+        except Exception as e:
+            log.exception("error building airport database")
+            self.output("error building airport data file. ")
+            return
         self.output("done. ")
\ No newline at end of file
@@ -88,38 +88,11 @@ InstrOffsets = {'Com1Freq': (0x034E,'H'),	# com1freq
         'APUPercentage': (0x0b54, 'F'), # APU rpm percentage
         'APUVoltage': (0x0b5c, 'F'), # apu generator voltage
         'Eng1RPM': (0x2400, 'f'), # engine 1 rpm
-        'Eng1Starter': (0x3b00, 'u'), # engine 1 starter
-        'Eng2Starter': (0x3a40, 'u'), # engine 2 starter
-        'Eng3Starter': (0x3980, 'u'), # engine 3 starter
-        'Eng4Starter': (0x38c0, 'u'), # engine 4 starter
-        'Eng1FuelFlow': (0x2060, 'f'), # Engine 1 fuel flow in pounds per hour
-        'Eng2FuelFlow': (0x2160, 'f'), # Engine 2 fuel flow in pounds per hour
-        'Eng3FuelFlow': (0x2260, 'f'), # Engine 3 fuel flow in pounds per hour
-        'Eng4FuelFlow': (0x2360, 'f'), # Engine 1 fuel flow in pounds per hour
-        'Eng1N1': (0x2010, 'f'), # Engine 1 n1 value
-        'Eng4Generator': (0x393c, 'u'), # Engine 4 generator
-        'Eng3Generator': (0x39fc, 'u'),  # Engine 3 generator
-        'Eng2Generator': (0x3abc, 'u'), # Engine 2 Generator
-        'Eng1Generator': (0x3b7c, 'u'),  # Engine 1 generator
-        'Eng1N2': (0x2018, 'f'), # Engine 1 N2 value
-        'Eng2N1': (0x2110, 'f'), # Engine 2 N1 value
-        'Eng2N2': (0x2118, 'f'), # Engine 2 N2 value
-        'Eng3N1': (0x2210, 'f'), # Engine 3 N1 value
-        'Eng3N2': (0x2218, 'f'), # Engine 3 N2 value
-        'Eng4N1': (0x2310, 'f'), # Engine 4 N1 value
-        'Eng4N2': (0x2318, 'f'), # Engine 4 N2 value
-        'Eng1Combustion': (0x0894, 'H'), # Engine 1 ignition flag
-        'Eng2Combustion': (0x092c, 'H'), # Engine 2 ignition flag
-        'Eng3Combustion': (0x09c4, 'H'), # Engine 3 ignition flag
-        'Eng4Combustion': (0x0a5c, 'H'), # Engine 4 ignition flag
-        'Eng1ITT': (0x08f0, 'u'), # Engine 1 Turbine temperature: degree C *16384 (Helos?) (Turbine engine ITT)
-        'Eng2ITT': (0x0988, 'u'), # Engine 2 Turbine temperature: degree C *16384 (Helos?) (Turbine engine ITT)
-        'Eng3ITT': (0x0a20, 'u'), # Engine 3 Turbine temperature: degree C *16384 (Helos?) (Turbine engine ITT)
-        'Eng4ITT': (0x0ab8, 'u'), # Engine 4 Turbine temperature: degree C *16384 (Helos?) (Turbine engine ITT)
-        'Eng1FuelValve': (0x3590, 'u'), # engine 1 fuel valve
-        'Eng2FuelValve': (0x3594, 'u'), # engine 2 fuel valve
-        'Eng3FuelValve': (0x3598, 'u'), # engine 3 fuel valve
-        'Eng4FuelValve': (0x359c, 'u'), # engine 4 fuel valve
+        # per engine blocks, decoded by engines.Engines
+        'engine_block': (0x088c, 0x260),
+        'turbine_block': (0x2000, 0x400),
+        'switch_block': (0x38c0, 0x300),
+        'fuel_valve_block': (0x3590, 16),
 
 
         'PitotHeat': (0x029c, 'b'), # pitot heat switch
@@ -132,30 +105,11 @@ InstrOffsets = {'Com1Freq': (0x034E,'H'),	# com1freq
         'AircraftName': (0x3d00, -255), # aircraft name
         'TextDisplay': (0x3380, -128), # FSUIPC text display
         'FuelPump': (0x3104, 'b'), # fuel pump
-        'lvl_center': (0x0b74, 'u'),
-        'cap_center': (0x0b78, 'u'),
-        'lvl_center2': (0x1244, 'u'),
-        'cap_center2': (0x1248, 'u'),
-        'lvl_center3': (0x124c, 'u'),
-        'cap_center3': (0x1250, 'u'),
-        'lvl_main_left': (0x0b7c, 'u'),
-        'cap_main_left': (0x0b80, 'u'),
-        'lvl_aux_left': (0x0b84, 'u'),
-        'cap_aux_left': (0x0b88, 'u'),
-        'lvl_tip_left': (0x0b8c, 'u'),
-        'cap_tip_left': (0x0b90, 'u'),
-        'lvl_main_right': (0x0b94, 'u'),
-        'cap_main_right': (0x0b98, 'u'),
-        'lvl_aux_right': (0x0b9c, 'u'),
-        'cap_aux_right': (0x0ba0, 'u'),
-        'lvl_tip_right': (0x0ba4, 'u'),
-        'cap_tip_right': (0x0ba8, 'u'),
+        # fuel tank levels and capacities, decoded by fuel.FuelTanks
+        'fuel_tanks': (0x0b74, 56),
+        'fuel_center_tanks': (0x1244, 16),
         'fuel_weight': (0x0af4, 'H'),
         'num_engines': (0x0aec, 'H'),
-        'eng1_fuel_flow': (0x0918, 'f'),
-        'eng2_fuel_flow': (0x09b0, 'f'),
-        'eng3_fuel_flow': (0x0a48, 'f'),
-        'eng4_fuel_flow': (0x0ae0, 'f'),
         'EngineSelectFlags': (0x0888, 'b'), # engine select flags
         'GyroSuction': (0x0b18, 'f'), # gyro suction gauge
         'OilQuantity': (0x66c9, 'b'),
@@ -225,6 +179,10 @@ C182Offsets = {
 }
 
 a2a_payload = {}
+# fuel.FuelTanks decoded from the fuel tank blocks with each instrument read
+fuel = None
+# engines.Engines decoded from the engine blocks with each instrument read
+engines = None
 
 
 
@@ -240,8 +198,15 @@ SimCOffsets = {'SimCChanged': (0xb000,'u'), # changed indicator (4 bytes)
 # attitude indication offsets, since we need fast access to these
 AttitudeOffsets = {'Pitch': (0x0578,'d'), # Pitch, *360/(65536*65536) for degrees. 0=level, –ve=pitch up, +ve=pitch down[Can be set in slew or pause states]
     'Bank': (0x057c,'d'), # Bank, *360/(65536*65536) for degrees. 0=level, –ve=bank right, +ve=bank left[Can be set in slew or pause states]
+    'FlightDirectorPitch': (0x2ee8, 'f'), # flight director pitch
+    'FlightDirectorBank': (0x2ef0, 'f'), # flight director bank value in degrees. Right negative, left positive
 
 
+}
+# ILS needles and signal strength, read at a high rate for ILS tone mode
+ILSOffsets = {'Nav1LocNeedle': (0x0c48, 'c'), # nav 1 localiser needle: -127 left to 127 right
+    'Nav1GSNeedle': (0x0c49, 'c'), # Nav1 glideslope needle: -119 up to 119 down
+    'Nav1Signal': (0x0c52, 'u'), # Nav 1 signal strength
 }
 # ground aircraft gate name designations
 tcas_gate_name = {
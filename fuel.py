@@ -0,0 +1,150 @@
+# fuel tank model.
+# The level and capacity of every FSUIPC fuel tank lie in two contiguous blocks of 32-bit values,
+# which are read with the rest of the instrumentation and decoded here into arrays, so totals,
+# per tank quantities, weights and the left/right imbalance come from one pass over all tanks.
+import numpy as np
+
+# levels are a fraction of capacity * 128 * 65536. Capacities are in US gallons.
+LEVEL_SCALE = 128 * 65536
+
+# (name, side, level offset, capacity offset), in the order the tank hotkeys number them.
+# side is -1 for left tanks, 1 for right tanks and 0 for centre tanks.
+TANKS = [
+    ('center', 0, 0x0b74, 0x0b78),
+    ('center2', 0, 0x1244, 0x1248),
+    ('center3', 0, 0x124c, 0x1250),
+    ('main left', -1, 0x0b7c, 0x0b80),
+    ('main right', 1, 0x0b94, 0x0b98),
+    ('aux left', -1, 0x0b84, 0x0b88),
+    ('aux right', 1, 0x0b9c, 0x0ba0),
+    ('tip left', -1, 0x0b8c, 0x0b90),
+    ('tip right', 1, 0x0ba4, 0x0ba8),
+]
+
+# (offset, bytes) of the blocks holding the tank offsets. These are the fuel_tanks and
+# fuel_center_tanks entries of fsdata.InstrOffsets.
+BLOCKS = [(0x0b74, 56), (0x1244, 16)]
+
+
+def _index(offset):
+    # position of a 32-bit offset in the blocks joined together
+    base = 0
+    for start, length in BLOCKS:
+        if start <= offset < start + length:
+            return base + (offset - start) // 4
+        base += length // 4
+    raise ValueError(F"offset {offset:#x} is not in a fuel block")
+
+
+NAMES = np.array([t[0] for t in TANKS])
+SIDES = np.array([t[1] for t in TANKS])
+LEVEL_INDEX = np.array([_index(t[2]) for t in TANKS])
+CAPACITY_INDEX = np.array([_index(t[3]) for t in TANKS])
+
+
+class FuelTanks:
+    # the tanks fitted to the aircraft, those with a capacity, in TANKS order
+    def __init__(self, levels, capacities, pounds_per_gallon):
+        present = capacities > 0
+        self.names = NAMES[present].tolist()
+        self.sides = SIDES[present]
+        # gallons, and level as a fraction of capacity
+        self.capacity = capacities[present]
+        self.level = levels[present]
+        self.quantity = self.capacity * self.level
+        # pounds
+        self.weight = self.quantity * pounds_per_gallon
+        self.total_capacity = float(self.capacity.sum())
+        self.total_quantity = float(self.quantity.sum())
+        self.total_weight = float(self.weight.sum())
+        # pounds more in the left tanks than the right ones, negative when the right side is heavier
+        self.imbalance = float(self.weight[self.sides < 0].sum() - self.weight[self.sides > 0].sum())
+
+    @classmethod
+    def decode(cls, blocks, fuel_weight):
+        # blocks are the raw bytes of BLOCKS. fuel_weight is pounds per gallon * 256, from offset 0x0af4.
+        words = np.frombuffer(b''.join(blocks), dtype='<u4').astype(np.float64)
+        return cls(words[LEVEL_INDEX] / LEVEL_SCALE, words[CAPACITY_INDEX], fuel_weight / 256)
+
+    def __len__(self):
+        return len(self.names)
+
+    def find(self, name):
+        # position of the named tank, or None if the aircraft doesn't have it
+        try:
+            return self.names.index(name)
+        except ValueError:
+            return None
+
+
+class BurnEstimator:
+    # smoothed fuel burn from a sliding window of fuel quantity and flow samples.
+    # The samples are kept in a ring buffer with running sums for a least squares fit of quantity
+    # against time, so each sample costs the same however long the window. The burn rate is the
+    # slope of that fit, which follows what is actually leaving the tanks, or the mean fuel flow
+    # until the window covers min_span seconds.
+    def __init__(self, window=300, interval=5, min_span=60, refuel=20):
+        self.size = max(2, int(window / interval) + 1)
+        self.min_span = min_span
+        # pounds. A rise in quantity bigger than this is refuelling, which starts a new window.
+        self.refuel = refuel
+        self.times = np.zeros(self.size)
+        self.quantities = np.zeros(self.size)
+        self.flows = np.zeros(self.size)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+        self.next = 0
+        self.start = None
+        # n, sum t, sum q, sum t*t, sum t*q, sum flow
+        self.sums = [0.0] * 6
+        # pounds per hour, hours, nautical miles and pounds. None until known.
+        self.burn = None
+        self.endurance = None
+        self.range = None
+        self.at_destination = None
+
+    def _sample(self, i):
+        t = self.times[i]
+        q = self.quantities[i]
+        return (1.0, t, q, t * t, t * q, self.flows[i])
+
+    def update(self, timestamp, quantity, flow, ground_speed=0, ete=None):
+        # quantity in pounds, flow in pounds per hour, ground speed in knots, ete in seconds to destination
+        if self.count and quantity > self.quantities[self.next - 1] + self.refuel:
+            self.reset()
+        if self.start is None:
+            self.start = timestamp
+        t = timestamp - self.start
+        if self.count == self.size:
+            old = self._sample(self.next)
+            self.sums = [s - o for s, o in zip(self.sums, old)]
+        else:
+            self.count += 1
+        self.times[self.next] = t
+        self.quantities[self.next] = quantity
+        self.flows[self.next] = flow
+        self.sums = [s + v for s, v in zip(self.sums, self._sample(self.next))]
+        self.next = (self.next + 1) % self.size
+        if self.next == 0:
+            # sum the whole buffer again once per lap, so rounding in the running sums doesn't build up
+            self.sums = [float(v) for v in np.sum([self._sample(i) for i in range(self.count)], axis=0)]
+        n, st, sq, stt, stq, sf = self.sums
+        span = t - self.times[(self.next - self.count) % self.size]
+        denominator = n * stt - st * st
+        if span >= self.min_span and denominator > 0:
+            self.burn = max(0.0, -(n * stq - st * sq) / denominator * 3600)
+        else:
+            self.burn = sf / n
+        if self.burn > 0:
+            self.endurance = quantity / self.burn
+            self.range = self.endurance * ground_speed
+        else:
+            self.endurance = None
+            self.range = None
+        if ete:
+            self.at_destination = quantity - self.burn * ete / 3600
+        else:
+            self.at_destination = None
+        return self.burn
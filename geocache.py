@@ -0,0 +1,105 @@
+# persistent cache of flight following lookups, such as the closest city, ocean and timezone.
+# Results are keyed by the kind of lookup and the geohash of the position, so every position in the
+# same tile (about 5 km across at the default precision) shares one entry. Entries are kept in an
+# sqlite database, so they survive restarts, and expire after ttl seconds. Repeated flights over the
+# same routes are answered from the cache instead of the GeoNames web service.
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+log = logging.getLogger("geocache")
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+
+# GeoNames status code for a lookup that found nothing
+GEONAMES_NO_RESULT = 15
+
+
+class GeoNamesError(Exception):
+    # an error status in a GeoNames reply, such as the hourly limit being reached
+    pass
+
+
+def geonames_result(data):
+    # the decoded JSON reply of a GeoNames web service. GeoNames reports throttling and other errors as a
+    # status in a normal reply, so those are raised, which keeps them out of the cache.
+    if 'status' in data:
+        if data['status'].get('value') == GEONAMES_NO_RESULT:
+            # a real empty result, such as no ocean over land, which is worth caching
+            return {}
+        raise GeoNamesError('GeoNames error {}: {}'.format(data['status'].get('value'), data['status'].get('message')))
+    return data
+
+
+def geohash(lat, lon, precision=5):
+    # standard geohash: bits alternate longitude and latitude halvings, 5 bits to a character
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            r, x = lon_range, lon
+        else:
+            r, x = lat_range, lat
+        mid = (r[0] + r[1]) / 2
+        value <<= 1
+        if x >= mid:
+            value |= 1
+            r[0] = mid
+        else:
+            r[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits = 0
+            value = 0
+    return ''.join(chars)
+
+
+class GeoCache:
+    def __init__(self, path, ttl=30 * 86400, precision=5):
+        self.ttl = ttl
+        self.precision = precision
+        # lookups may come from more than one thread, so the connection is shared under a lock
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        with self.lock, self.db:
+            self.db.execute('CREATE TABLE IF NOT EXISTS lookups (kind TEXT, tile TEXT, value TEXT, time REAL, PRIMARY KEY (kind, tile))')
+            self.db.execute('DELETE FROM lookups WHERE time < ?', (time.time() - ttl,))
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, lat, lon):
+        # returns (found, value). value may be None, which records that there was nothing there.
+        tile = geohash(lat, lon, self.precision)
+        with self.lock:
+            row = self.db.execute('SELECT value, time FROM lookups WHERE kind = ? AND tile = ?', (kind, tile)).fetchone()
+        if row is None or time.time() - row[1] > self.ttl:
+            self.misses += 1
+            return False, None
+        self.hits += 1
+        return True, json.loads(row[0])
+
+    def put(self, kind, lat, lon, value):
+        tile = geohash(lat, lon, self.precision)
+        with self.lock, self.db:
+            self.db.execute('INSERT OR REPLACE INTO lookups VALUES (?, ?, ?, ?)', (kind, tile, json.dumps(value), time.time()))
+
+    def cached(self, kind, lat, lon, fetch):
+        # the cached value for the tile, or fetch() stored for next time. Errors raised by fetch are not cached.
+        found, value = self.get(kind, lat, lon)
+        if found:
+            return value
+        value = fetch()
+        self.put(kind, lat, lon, value)
+        return value
+
+    def close(self):
+        with self.lock:
+            self.db.close()
@@ -0,0 +1,82 @@
+# offline reverse geocoding for flight following.
+# Cities come from a GeoNames cities5000.txt dump in the data folder, with region names from
+# admin1CodesASCII.txt. They are imported once into a memory mapped column store, the same
+# format as the airport database, and indexed with a spatial grid, so finding the closest city
+# takes no network access.
+import csv
+import logging
+import os
+
+import airportdb
+import geoindex
+
+log = logging.getLogger("geocoder")
+
+SCHEMA_VERSION = 1
+
+# columns of the GeoNames geoname table
+CITY_FIELDS = ['geonameid', 'name', 'asciiname', 'alternatenames', 'latitude', 'longitude', 'feature_class', 'feature_code', 'country', 'cc2', 'admin1', 'admin2', 'admin3', 'admin4', 'population', 'elevation', 'dem', 'timezone', 'modified']
+
+
+def read_admin1(path):
+    # CC.code to region name, such as US.CA to California
+    names = {}
+    if path is None or not os.path.exists(path):
+        return names
+    with open(path, newline='', encoding='UTF-8', errors='replace') as f:
+        for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+            if len(row) >= 2:
+                names[row[0]] = row[1]
+    return names
+
+
+def read_cities(path, admin1_path=None):
+    admin1 = read_admin1(admin1_path)
+    cities = {c: [] for c in ['name', 'admin1', 'country', 'latitude', 'longitude', 'population', 'timezone']}
+    with open(path, newline='', encoding='UTF-8', errors='replace') as f:
+        for row in csv.reader(f, delimiter='\t', quoting=csv.QUOTE_NONE):
+            if len(row) < len(CITY_FIELDS):
+                continue
+            city = dict(zip(CITY_FIELDS, row))
+            try:
+                latitude = float(city['latitude'])
+                longitude = float(city['longitude'])
+            except ValueError:
+                continue
+            cities['name'].append(city['name'])
+            cities['admin1'].append(admin1.get(F"{city['country']}.{city['admin1']}", ''))
+            cities['country'].append(city['country'])
+            cities['latitude'].append(latitude)
+            cities['longitude'].append(longitude)
+            cities['population'].append(float(city['population'] or 0))
+            cities['timezone'].append(city['timezone'])
+    return cities
+
+
+class ReverseGeocoder:
+    def __init__(self, path, cities_txt, admin1_txt=None):
+        # path is the folder for the imported database, rebuilt when the dump files change
+        sources = [cities_txt, admin1_txt] if admin1_txt else [cities_txt]
+        if not airportdb.is_current(path, sources, SCHEMA_VERSION):
+            log.debug(F"importing {cities_txt}")
+            airportdb.save(path, {'cities': read_cities(cities_txt, admin1_txt)}, sources, SCHEMA_VERSION)
+        self.cities = airportdb.load(path)['cities']
+        self.index = geoindex.GridIndex(self.cities['latitude'], self.cities['longitude'])
+        log.debug(F"indexed {len(self.index)} cities")
+
+    def nearest_city(self, lat, lon, radius=200):
+        # the closest city within radius km as a dict with name, admin1 (region), country, latitude,
+        # longitude and distance in km. None if there is no city that close.
+        index, distance = self.index.nearest(lat, lon, 1, radius)
+        if len(index) == 0:
+            return None
+        i = index[0]
+        return {
+            'name': str(self.cities['name'][i]),
+            'admin1': str(self.cities['admin1'][i]),
+            'country': str(self.cities['country'][i]),
+            'latitude': float(self.cities['latitude'][i]),
+            'longitude': float(self.cities['longitude'][i]),
+            'timezone': str(self.cities['timezone'][i]),
+            'distance': float(distance[0]),
+        }
@@ -0,0 +1,124 @@
+# spatial index for nearest and radius queries over large sets of lat/lon points, such as airports.
+# Points are bucketed into a grid of cell_size degree cells and sorted by cell, so a query only
+# computes distances for the points in the cells overlapping the search circle.
+import math
+
+import numpy as np
+
+from aviationFormula.aviationFormula import KM_PER_RADIAN, gcDestination, gcDistanceKm
+
+def destination(lat, lon, bearing, distance):
+    # points reached from lat, lon along the great circle with initial true bearing in degrees, for each of an array of distances in km
+    return gcDestination(lat, lon, np.radians(bearing), np.asarray(distance, dtype=np.float64) / KM_PER_RADIAN)
+
+
+class GridIndex:
+    def __init__(self, lats, lons, cell_size=1.0):
+        self.lats = np.asarray(lats, dtype=np.float64)
+        self.lons = np.asarray(lons, dtype=np.float64)
+        self.cell_size = cell_size
+        self.rows = int(math.ceil(180 / cell_size))
+        self.cols = int(math.ceil(360 / cell_size))
+        keys = self._row(self.lats) * self.cols + self._col(self.lons)
+        # point numbers sorted by cell, and the cell of each. A cell's points are found with searchsorted.
+        self.order = np.argsort(keys, kind='stable')
+        self.keys = keys[self.order]
+
+    def __len__(self):
+        return len(self.lats)
+
+    def _row(self, lat):
+        return np.clip(((np.asarray(lat) + 90) // self.cell_size).astype(np.int64), 0, self.rows - 1)
+
+    def _col(self, lon):
+        return ((np.asarray(lon) + 180) // self.cell_size).astype(np.int64) % self.cols
+
+    def _candidates(self, lat, lon, radius):
+        # point numbers in all cells overlapping the circle of radius km around lat, lon
+        dlat = math.degrees(radius / KM_PER_RADIAN)
+        row0 = int(self._row(lat - dlat))
+        row1 = int(self._row(lat + dlat))
+        # the circle is widest in longitude at its edge nearest the pole
+        edge = min(abs(lat) + dlat, 90.0)
+        if edge >= 89.0:
+            dlon = 180.0
+        else:
+            dlon = dlat / math.cos(math.radians(edge))
+        ranges = []
+        # once the span covers the whole ring, both ends can wrap onto the same column
+        if 2 * dlon >= 360.0 - self.cell_size:
+            ranges.append((0, self.cols - 1))
+        else:
+            col0 = int(self._col(lon - dlon))
+            col1 = int(self._col(lon + dlon))
+            if col0 <= col1:
+                ranges.append((col0, col1))
+            else:
+                # the circle crosses the antimeridian
+                ranges.append((col0, self.cols - 1))
+                ranges.append((0, col1))
+        slices = []
+        for row in range(row0, row1 + 1):
+            for col0, col1 in ranges:
+                lo = np.searchsorted(self.keys, row * self.cols + col0, side='left')
+                hi = np.searchsorted(self.keys, row * self.cols + col1, side='right')
+                if hi > lo:
+                    slices.append(self.order[lo:hi])
+        if not slices:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate(slices)
+
+    def within(self, lat, lon, radius):
+        # returns (point numbers, distances in km) of every point within radius km, nearest first
+        index = self._candidates(lat, lon, radius)
+        distance = gcDistanceKm(lat, lon, self.lats[index], self.lons[index])
+        mask = distance <= radius
+        index = index[mask]
+        distance = distance[mask]
+        order = np.argsort(distance, kind='stable')
+        return index[order], distance[order]
+
+    def nearest(self, lat, lon, k=1, max_distance=None):
+        # returns (point numbers, distances in km) of the k nearest points, nearest first.
+        # Fewer are returned if there are not enough points within max_distance km.
+        limit = math.pi * KM_PER_RADIAN
+        if max_distance is not None:
+            limit = min(limit, max_distance)
+        radius = min(limit, self.cell_size * 111.0)
+        while True:
+            index, distance = self.within(lat, lon, radius)
+            if len(index) >= k or radius >= limit:
+                return index[:k], distance[:k]
+            radius = min(limit, radius * 4)
+
+
+class GroupedPoints:
+    # points such as gates or runway ends, grouped by airport ICAO code into contiguous arrays.
+    # Each airport's points are a slice of the arrays, so no table scan is needed per lookup.
+    def __init__(self, icao, lats, lons, labels):
+        icao = np.asarray(icao, dtype=object).astype(str)
+        order = np.argsort(icao, kind='stable')
+        icao = icao[order]
+        self.lats = np.asarray(lats, dtype=np.float64)[order]
+        self.lons = np.asarray(lons, dtype=np.float64)[order]
+        self.labels = np.asarray(labels, dtype=object)[order]
+        codes, starts = np.unique(icao, return_index=True)
+        ends = np.append(starts[1:], len(icao))
+        self.slices = {code: slice(start, end) for code, start, end in zip(codes, starts, ends)}
+
+    def __contains__(self, ap):
+        return ap in self.slices
+
+    def match(self, ap, lats, lons, max_distance):
+        # for each point, the label of the nearest point at airport ap within max_distance km, or None,
+        # and the distance to it. All points are matched with one distance matrix.
+        lats = np.atleast_1d(np.asarray(lats, dtype=np.float64))
+        lons = np.atleast_1d(np.asarray(lons, dtype=np.float64))
+        s = self.slices.get(ap)
+        if s is None or len(lats) == 0:
+            return [None] * len(lats), np.full(len(lats), np.inf)
+        distance = gcDistanceKm(lats[:, None], lons[:, None], self.lats[s][None, :], self.lons[s][None, :])
+        nearest = np.argmin(distance, axis=1)
+        distance = distance[np.arange(len(lats)), nearest]
+        labels = self.labels[s][nearest]
+        return [label if d <= max_distance else None for label, d in zip(labels, distance)], distance
@@ -62,6 +62,7 @@ class settingsController(object):
         self.dialog.set_value("hotkeys", "mute_simconnect_key", config.app['hotkeys']['mute_simconnect_key'])
         self.dialog.set_value("hotkeys", "toggle_gpws_key", config.app['hotkeys']['toggle_gpws_key'])
         self.dialog.set_value("hotkeys", "toggle_ils_key", config.app['hotkeys']['toggle_ils_key'])
+        self.dialog.set_value("hotkeys", "ils_tones_key", config.app['hotkeys']['ils_tones_key'])
         self.dialog.set_value("hotkeys", "toggle_flaps_key", config.app['hotkeys']['toggle_flaps_key'])
         self.dialog.set_value("hotkeys", "autopilot_key", config.app['hotkeys']['autopilot_key'])
         self.dialog.set_value("hotkeys", "wind_key", config.app['hotkeys']['wind_key'])
@@ -0,0 +1,127 @@
+# procedural tone generation for attitude, flight director and runway guidance modes.
+# Tones are synthesized block by block as the audio driver asks for data, so frequency
+# and panning changes glide smoothly instead of restarting a looping player.
+import numpy as np
+import pyglet
+from pyglet.media.codecs.base import AudioData, AudioFormat
+
+
+class ToneMap:
+    # continuous mapping from the magnitude of a flight value (pitch, bank, heading deviation, ...)
+    # to a tone pitch multiplier. Values outside the range are clamped to the nearest end.
+    # Curves: linear steps the multiplier evenly, exponential steps it by equal musical intervals.
+    def __init__(self, low_value, high_value, low_tone, high_tone, curve='linear'):
+        self.low_value = float(low_value)
+        self.span = float(high_value) - float(low_value)
+        self.low_tone = float(low_tone)
+        self.high_tone = float(high_tone)
+        self.curve = curve
+        self.ratio = self.high_tone / self.low_tone
+
+    def __call__(self, value):
+        t = (abs(value) - self.low_value) / self.span
+        if t < 0.0:
+            t = 0.0
+        elif t > 1.0:
+            t = 1.0
+        if self.curve == 'exponential':
+            return self.low_tone * self.ratio ** t
+        return self.low_tone + (self.high_tone - self.low_tone) * t
+
+
+class Voice:
+    # a single tone within the generator. Frequency is given as a multiplier of the base
+    # frequency, the same way the old players used their pitch property.
+    def __init__(self, waveform='sine', base_frequency=440.0, pulse=None, volume=0.3):
+        self.waveform = waveform
+        self.base_frequency = base_frequency
+        # length of a repeating decaying blip in seconds. None gives a continuous tone.
+        self.pulse = pulse
+        self.volume = volume
+        # target values, set from the TFM thread
+        self.frequency = base_frequency
+        self.amplitude = 0.0
+        self.pan = 0.0
+        # values reached at the end of the last rendered block
+        self._frequency = base_frequency
+        self._amplitude = 0.0
+        self._pan = 0.0
+        self._phase = 0.0
+        self._pulse_pos = 0.0
+
+    def play(self, pitch, pan=0.0):
+        # pan: -1 is full left, 1 is full right
+        self.frequency = self.base_frequency * pitch
+        self.pan = pan
+        self.amplitude = self.volume
+
+    def stop(self):
+        self.amplitude = 0.0
+
+    def render(self, frames, rate):
+        target_frequency = self.frequency
+        target_amplitude = self.amplitude
+        target_pan = self.pan
+        if target_amplitude == 0.0 and self._amplitude == 0.0:
+            # nothing to hear. Keep the frequency in step so the next tone starts where it should
+            self._frequency = target_frequency
+            self._pan = target_pan
+            return None
+        # glide the frequency across the block and integrate it into phase so there are no jumps.
+        freq = np.linspace(self._frequency, target_frequency, frames, endpoint=False)
+        phase = self._phase + np.cumsum(freq) / rate
+        self._phase = phase[-1] % 1.0
+        if self.waveform == 'triangle':
+            wave = 2.0 * np.abs(2.0 * (phase % 1.0) - 1.0) - 1.0
+        else:
+            wave = np.sin(2.0 * np.pi * phase)
+        wave *= np.linspace(self._amplitude, target_amplitude, frames, endpoint=False)
+        if self.pulse:
+            t = self._pulse_pos + np.arange(frames) / rate
+            wave *= 1.0 - (t % self.pulse) / self.pulse
+            self._pulse_pos = (self._pulse_pos + frames / rate) % self.pulse
+        # constant power panning
+        angle = (np.linspace(self._pan, target_pan, frames, endpoint=False) + 1.0) * np.pi / 4
+        self._frequency = target_frequency
+        self._amplitude = target_amplitude
+        self._pan = target_pan
+        return wave * np.cos(angle), wave * np.sin(angle)
+
+
+class ToneGenerator(pyglet.media.StreamingSource):
+    # endless stereo source mixing the pitch up, pitch down and bank voices.
+    def __init__(self, sample_rate=44100):
+        self.audio_format = AudioFormat(channels=2, sample_size=16, sample_rate=sample_rate)
+        self._duration = None
+        self._timestamp = 0.0
+        self.sample_rate = sample_rate
+        # the values below match the synthesis sources previously used by the sonification players.
+        self.pitch_up = Voice('triangle', 440.0)
+        self.pitch_down = Voice('sine', 440.0)
+        self.bank = Voice('triangle', 200.0, pulse=0.3)
+        # ILS tone mode. Pulsed so it can be told apart from the attitude tones.
+        self.ils = Voice('sine', 440.0, pulse=0.15)
+        self.voices = [self.pitch_up, self.pitch_down, self.bank, self.ils]
+
+    def silence(self):
+        for voice in self.voices:
+            voice.stop()
+
+    def get_audio_data(self, num_bytes, compensation_time=0.0):
+        frames = num_bytes // self.audio_format.bytes_per_sample
+        if frames <= 0:
+            return None
+        mix = np.zeros((frames, 2))
+        for voice in self.voices:
+            block = voice.render(frames, self.sample_rate)
+            if block is not None:
+                mix[:, 0] += block[0]
+                mix[:, 1] += block[1]
+        data = (np.clip(mix, -1.0, 1.0) * 32767).astype('<i2').tobytes()
+        duration = frames / self.sample_rate
+        audio_data = AudioData(data, len(data), self._timestamp, duration, [])
+        self._timestamp += duration
+        return audio_data
+
+    def seek(self, timestamp):
+        self._timestamp = timestamp
@@ -0,0 +1,64 @@
+# startup timing.
+# Each stage of startup is logged with the seconds since TFM was launched, so startup time can be
+# tracked from the log. With the TFM_PROFILE_IMPORTS environment variable set, the time spent
+# importing each module directly imported by TFM is also recorded and logged with the first stage
+# after imports finish.
+import builtins
+import logging
+import os
+import sys
+import threading
+import time
+
+START = time.perf_counter()
+
+log = logging.getLogger("startup")
+
+# (stage, seconds since launch)
+stages = []
+# top level module name: seconds spent importing it, including the modules it imports
+import_times = {}
+
+_original_import = builtins.__import__
+_depth = threading.local()
+
+
+def _timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    depth = getattr(_depth, 'value', 0)
+    _depth.value = depth + 1
+    start = time.perf_counter()
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        _depth.value = depth
+        if depth == 0:
+            import_times[name] = import_times.get(name, 0.0) + time.perf_counter() - start
+
+
+def profile_imports():
+    builtins.__import__ = _timed_import
+
+
+def stop_profiling_imports():
+    builtins.__import__ = _original_import
+
+
+def mark(stage):
+    elapsed = time.perf_counter() - START
+    stages.append((stage, elapsed))
+    log.info(F"startup: {stage} after {elapsed:.3f} seconds")
+    if import_times and builtins.__import__ is _timed_import:
+        stop_profiling_imports()
+        report_imports()
+
+
+def report_imports(count=15):
+    slowest = sorted(import_times.items(), key=lambda i: i[1], reverse=True)[:count]
+    for name, seconds in slowest:
+        log.info(F"import {name}: {seconds:.3f} seconds")
+
+
+if os.environ.get('TFM_PROFILE_IMPORTS'):
+    profile_imports()
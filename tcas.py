@@ -0,0 +1,289 @@
+# decoder for the FSUIPC TCAS tables of AI and multiplayer traffic.
+# The airborne (0xF080) and ground (0xE080) tables each hold 96 40-byte records, and 0xD040 holds
+# a 20-byte extended record (gate, runway and route) for each slot of the ground table.
+# The blocks are mapped straight onto NumPy structured arrays, so filtering by id and state,
+# distance, bearing and sorting are done for the whole table at once.
+import numpy as np
+
+from aviationFormula.aviationFormula import calcBearing, gcDistanceNm
+from callouts import AlphaBetaFilter
+
+TCAS_SLOTS = 96
+
+# struct "i 3f 2H h 15s B h"
+TCAS_RECORD = np.dtype([
+    ('id', '<i4'),
+    ('lat', '<f4'),
+    ('lon', '<f4'),
+    ('alt', '<f4'),
+    ('hdg', '<u2'),
+    ('gs', '<u2'),
+    ('vs', '<i2'),
+    ('atc', 'S15'),
+    ('state', 'u1'),
+    ('com', '<i2'),
+])
+
+# struct "2B 2H h 4s 4s 2B h"
+TCAS_EXTENDED_RECORD = np.dtype([
+    ('GateName', 'u1'),
+    ('GateType', 'u1'),
+    ('GateNumber', '<u2'),
+    ('Unused', '<u2'),
+    ('Pitch', '<i2'),
+    ('departure', 'S4'),
+    ('arrival', 'S4'),
+    ('Runway', 'u1'),
+    ('RunwayDesignator', 'u1'),
+    ('Bank', '<i2'),
+])
+
+# aircraft state for sleeping AI, which is parked and not going anywhere
+STATE_SLEEPING = 0x81
+STATE_TAXI_IN = 0x91
+# states of departing ground aircraft, in the order they pass through them
+DEPARTURE_STATES = (0x87, 0x88, 0x89, 0x8A)
+
+
+def decode(block, extended_block=None):
+    # map the raw tables without copying. Returns (records, extended), extended is None if not given.
+    records = np.frombuffer(block, dtype=TCAS_RECORD, count=TCAS_SLOTS)
+    extended = None
+    if extended_block is not None:
+        extended = np.frombuffer(extended_block, dtype=TCAS_EXTENDED_RECORD, count=TCAS_SLOTS)
+    return records, extended
+
+
+def distance_bearing(lat, lon, lats, lons):
+    # great circle distance in nautical miles and initial bearing in degrees from one point to many.
+    lats = lats.astype(np.float64)
+    lons = lons.astype(np.float64)
+    return gcDistanceNm(lat, lon, lats, lons), np.degrees(calcBearing(lat, lon, lats, lons)) % 360
+
+
+class Traffic:
+    # the traffic in one TCAS table, filtered and sorted by distance.
+    # Indexing and iteration give Contact views, nothing is copied out of the table until a field is read.
+    def __init__(self, records, index, distance, bearing, extended=None):
+        self.records = records
+        self.extended = extended
+        self.index = index
+        self.distance = distance
+        self.bearing = bearing
+
+    @classmethod
+    def read(cls, block, lat, lon, extended_block=None, exclude_states=()):
+        records, extended = decode(block, extended_block)
+        mask = records['id'] != 0
+        for state in exclude_states:
+            mask &= records['state'] != state
+        index = np.flatnonzero(mask)
+        distance, bearing = distance_bearing(lat, lon, records['lat'][index], records['lon'][index])
+        order = np.argsort(distance, kind='stable')
+        return cls(records, index[order], distance[order], bearing[order], extended)
+
+    def filter(self, mask):
+        # mask is a boolean array with one entry per contact
+        return Traffic(self.records, self.index[mask], self.distance[mask], self.bearing[mask], self.extended)
+
+    def take(self, order):
+        # the contacts at the positions in order, in that order
+        return Traffic(self.records, self.index[order], self.distance[order], self.bearing[order], self.extended)
+
+    def extended_field(self, name):
+        # one column of the extended table for every contact, in order
+        return self.extended[name][self.index]
+
+    def field(self, name):
+        # one column of the table for every contact, in order
+        return self.records[name][self.index]
+
+    def in_state(self, *states):
+        return self.filter(np.isin(self.field('state'), states))
+
+    def within_altitude(self, low, high):
+        alt = self.field('alt')
+        return self.filter((alt > low) & (alt < high))
+
+    def __len__(self):
+        return len(self.index)
+
+    def __getitem__(self, i):
+        return Contact(self, i)
+
+    def __iter__(self):
+        for i in range(len(self.index)):
+            yield Contact(self, i)
+
+
+class Contact:
+    # view of a single aircraft in a Traffic table
+    __slots__ = ('traffic', 'i', 'record')
+
+    def __init__(self, traffic, i):
+        self.traffic = traffic
+        self.i = i
+        self.record = traffic.records[traffic.index[i]]
+
+    def __getitem__(self, name):
+        return self.record[name]
+
+    @property
+    def id(self):
+        return int(self.record['id'])
+
+    @property
+    def atc(self):
+        return text(self.record['atc'])
+
+    @property
+    def state(self):
+        return int(self.record['state'])
+
+    @property
+    def heading(self):
+        return int(self.record['hdg']) * 360 / 65536
+
+    @property
+    def distance(self):
+        return float(self.traffic.distance[self.i])
+
+    @property
+    def bearing(self):
+        return float(self.traffic.bearing[self.i])
+
+    @property
+    def extended(self):
+        if self.traffic.extended is None:
+            return None
+        return self.traffic.extended[self.traffic.index[self.i]]
+
+
+def text(value):
+    # fixed length fields are padded with nulls
+    return value.replace(b'\x00', b'').decode('UTF-8', 'ignore')
+
+
+class GroundSummary:
+    # ground traffic grouped by state, by departure runway and by gate type, computed from the table columns at once.
+    def __init__(self, traffic):
+        self.traffic = traffic
+        states = traffic.field('state')
+        codes, counts = np.unique(states, return_counts=True)
+        # state: number of aircraft
+        self.by_state = dict(zip(codes.tolist(), counts.tolist()))
+        # (runway, designator): Traffic of the aircraft departing from it, the one nearest takeoff first
+        self.departures = {}
+        # gate type: number of inactive aircraft parked at that type of gate
+        self.gate_types = {}
+        if traffic.extended is None or len(traffic) == 0:
+            return
+        runway = traffic.extended_field('Runway').astype(np.int64)
+        designator = traffic.extended_field('RunwayDesignator').astype(np.int64)
+        # how far along the departure each aircraft is. -1 for aircraft not departing
+        progress = np.full(256, -1)
+        progress[list(DEPARTURE_STATES)] = np.arange(len(DEPARTURE_STATES))
+        progress = progress[states]
+        departing = (progress >= 0) & (runway > 0)
+        keys = runway * 256 + designator
+        for key in np.unique(keys[departing]).tolist():
+            positions = np.flatnonzero(departing & (keys == key))
+            order = positions[np.argsort(-progress[positions], kind='stable')]
+            self.departures[(key // 256, key % 256)] = traffic.take(order)
+        sleeping = states == STATE_SLEEPING
+        codes, counts = np.unique(traffic.extended_field('GateType')[sleeping], return_counts=True)
+        self.gate_types = dict(zip(codes.tolist(), counts.tolist()))
+
+    def count(self, *states):
+        return sum(self.by_state.get(state, 0) for state in states)
+
+
+class Track:
+    # one aircraft followed across polls of a TCAS table
+    def __init__(self, id):
+        self.id = id
+        self.atc = ''
+        self.state = None
+        self.previous_state = None
+        # nautical miles and degrees true from our aircraft
+        self.range = None
+        self.bearing = None
+        # degrees clockwise from our nose
+        self.relative_bearing = None
+        # feet above (positive) or below us
+        self.relative_altitude = None
+        # knots, positive while the range is shrinking
+        self.closure_rate = 0.0
+        # feet per minute change in relative altitude
+        self.altitude_trend = 0.0
+        self.range_filter = AlphaBetaFilter()
+        self.altitude_filter = AlphaBetaFilter()
+        # a proximity alert has been given and not yet cleared
+        self.alerted = False
+
+    @property
+    def closing(self):
+        return self.closure_rate > 0
+
+
+class TrafficTracker:
+    # keeps per aircraft state between polls of one TCAS table, keyed by id.
+    # update returns the events found in that poll as (event, track) pairs:
+    # 'state' when an aircraft changes state, such as taxiing out to taking off,
+    # 'proximity' when a closing aircraft comes within the alert range and altitude band.
+    def __init__(self, alert_range=3.0, alert_altitude=1000, rearm=1.5):
+        self.alert_range = alert_range
+        self.alert_altitude = alert_altitude
+        # an alert is given again only after the aircraft has gone this many times the alert range away
+        self.rearm = rearm
+        self.tracks = {}
+        # the Traffic read by the last poll and when it was taken
+        self.traffic = None
+        self.timestamp = None
+
+    def update(self, traffic, altitude, heading, timestamp):
+        events = []
+        tracks = {}
+        relative_altitude = traffic.field('alt') - altitude
+        relative_bearing = (traffic.bearing - heading) % 360
+        for i, contact in enumerate(traffic):
+            id = contact.id
+            track = self.tracks.get(id)
+            if track is None:
+                track = Track(id)
+            tracks[id] = track
+            track.atc = contact.atc
+            state = contact.state
+            if track.state is not None and state != track.state:
+                track.previous_state = track.state
+                events.append(('state', track))
+            track.state = state
+            track.range = contact.distance
+            track.bearing = contact.bearing
+            track.relative_bearing = float(relative_bearing[i])
+            track.relative_altitude = float(relative_altitude[i])
+            track.closure_rate = -track.range_filter.update(track.range, timestamp)[1] * 3600
+            track.altitude_trend = track.altitude_filter.update(track.relative_altitude, timestamp)[1] * 60
+            if state == STATE_SLEEPING:
+                continue
+            inside = track.range <= self.alert_range and abs(track.relative_altitude) <= self.alert_altitude
+            if inside and track.closing and not track.alerted:
+                track.alerted = True
+                events.append(('proximity', track))
+            elif track.alerted and (track.range > self.alert_range * self.rearm or abs(track.relative_altitude) > self.alert_altitude * self.rearm):
+                track.alerted = False
+        # aircraft no longer in the table are forgotten
+        self.tracks = tracks
+        self.traffic = traffic
+        self.timestamp = timestamp
+        return events
+
+    def fresh(self, timestamp, max_age):
+        # the last poll is recent enough to answer a traffic report from
+        return self.timestamp is not None and timestamp - self.timestamp <= max_age
+
+
+def clock_position(relative_bearing):
+    # relative bearing in degrees to a clock position, 12 o'clock being straight ahead
+    hour = round(relative_bearing / 30) % 12
+    return 12 if hour == 0 else hour
@@ -0,0 +1,106 @@
+import announcements
+
+RULES = """
+[Gear]
+priority = 10
+    [[values]]
+    0 = Gear up.
+    16383 = Gear down.
+
+[ApHeading]
+message = {value} degrees
+requires = autopilot
+
+[Eng2Starter]
+on = Number 2 starter engaged.
+off = Number 2 starter off
+min_engines = 2
+exclude_aircraft = Bonanza, C172
+
+[BatterySwitch]
+on = battery active.
+off = battery off
+aircraft = Bonanza, C172
+
+[Pump]
+field = FuelPump
+on = Fuel pump active.
+off = Fuel pump off
+"""
+
+
+def rule_set(tmp_path, user=None):
+    default = tmp_path / 'announcements.ini'
+    default.write_text(RULES, encoding='UTF-8')
+    paths = [str(default)]
+    if user is not None:
+        path = tmp_path / 'user.ini'
+        path.write_text(user, encoding='UTF-8')
+        paths.append(str(path))
+    return announcements.RuleSet(*paths)
+
+
+def fields(rules):
+    return sorted(rules.index)
+
+
+def test_aircraft_and_engine_filters(tmp_path):
+    rules = rule_set(tmp_path)
+    rules.select('Boeing 737-800', 2)
+    assert fields(rules) == ['ApHeading', 'Eng2Starter', 'FuelPump', 'Gear']
+    rules.select('Boeing 737-800', 1)
+    assert 'Eng2Starter' not in rules.index
+    rules.select('A2A C172', 2)
+    assert fields(rules) == ['ApHeading', 'BatterySwitch', 'FuelPump', 'Gear']
+
+
+def test_values_on_off_and_message(tmp_path):
+    rules = rule_set(tmp_path)
+    rules.select('Boeing 737-800', 2)
+    assert rules.evaluate({'Gear': 0}, {'Gear': 16383}, {}) == ['Gear down.']
+    # values without a message are not announced
+    assert rules.evaluate({'Gear': 0}, {'Gear': 8000}, {}) == []
+    assert rules.evaluate({'FuelPump': 0}, {'FuelPump': 1}, {}) == ['Fuel pump active.']
+    assert rules.evaluate({'FuelPump': 1}, {'FuelPump': 0}, {}) == ['Fuel pump off']
+    # unchanged and missing fields are ignored
+    assert rules.evaluate({'FuelPump': 1, 'Gear': 0}, {'FuelPump': 1}, {}) == []
+
+
+def test_requires_switches(tmp_path):
+    rules = rule_set(tmp_path)
+    rules.select('Boeing 737-800', 2)
+    assert rules.evaluate({'ApHeading': 90}, {'ApHeading': 95}, {}) == []
+    assert rules.evaluate({'ApHeading': 90}, {'ApHeading': 95}, {'autopilot': False}) == []
+    assert rules.evaluate({'ApHeading': 90}, {'ApHeading': 95}, {'autopilot': True}) == ['95 degrees']
+
+
+def test_priority_order(tmp_path):
+    rules = rule_set(tmp_path)
+    rules.select('Boeing 737-800', 2)
+    old = {'FuelPump': 0, 'Gear': 0}
+    new = {'FuelPump': 1, 'Gear': 16383}
+    assert rules.evaluate(old, new, {}) == ['Gear down.', 'Fuel pump active.']
+
+
+def test_user_copy_replaces_rules_by_name(tmp_path):
+    user = """
+[Gear]
+message = gear {value}
+
+[Pump]
+enabled = false
+
+[Door1]
+on = door open
+"""
+    rules = rule_set(tmp_path, user)
+    rules.select('Boeing 737-800', 2)
+    assert 'FuelPump' not in rules.index
+    assert rules.evaluate({'Gear': 0, 'Door1': 0}, {'Gear': 16383, 'Door1': 1}, {}) == ['gear 16383', 'door open']
+
+
+def test_bad_rule_is_skipped(tmp_path):
+    rules = rule_set(tmp_path, "[Broken]\npriority = high\n")
+    rules.select('Boeing 737-800', 2)
+    assert 'Broken' not in rules.index
+    assert 'Gear' in rules.index
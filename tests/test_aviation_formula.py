@@ -0,0 +1,96 @@
+import math
+
+import numpy as np
+import pytest
+
+from aviationFormula.aviationFormula import *
+
+
+def dms(degrees, minutes, seconds):
+    return math.copysign(abs(degrees) + minutes / 60 + seconds / 3600, degrees)
+
+
+def test_vincenty_reference_geodesics():
+    # Flinders Peak to Buninyong, the worked example in Vincenty's paper
+    distance = vincentyDistance(dms(-37, 57, 3.72030), dms(144, 25, 29.52440), dms(-37, 39, 10.15610), dms(143, 55, 35.38390))
+    assert distance == pytest.approx(54972.271, abs=0.001)
+    # one degree along the equator, and the meridian quadrant
+    assert vincentyDistance(0, 0, 0, 1) == pytest.approx(111319.491, abs=0.001)
+    assert vincentyDistance(0, 0, 90, 0) == pytest.approx(10001965.729, abs=0.001)
+    assert vincentyDistance(10, 20, 10, 20) == 0
+    # nearly antipodal points don't converge
+    assert math.isnan(vincentyDistance(0, 0, 0.5, 179.7))
+
+
+def test_great_circle_known_values():
+    assert gcDistanceNm(0, 0, 1, 0) == pytest.approx(60)
+    assert gcDistance(0, 0, 0, 180) == pytest.approx(math.pi)
+    assert calcBearing(0, 0, 10, 0) == pytest.approx(0)
+    assert calcBearing(0, 0, 0, 10) == pytest.approx(math.pi / 2)
+    assert gcIntermediatePoint(0, 0, 0, 90) == pytest.approx([0, 45])
+    assert gcDestination(0, 0, math.pi / 2, math.pi / 2) == pytest.approx([0, 90], abs=1e-12)
+    # destination wraps across the antimeridian
+    assert gcDestination(0, 170, math.pi / 2, math.radians(20)) == pytest.approx([0, -170], abs=1e-12)
+
+
+def test_track_distances():
+    # (1, 5) is one degree left of the path east along the equator, five degrees along it
+    assert crossTrackDistance(0, 0, 0, 10, 1, 5) == pytest.approx(-math.radians(1))
+    assert crossTrackDistance(0, 0, 0, 10, -1, 5) == pytest.approx(math.radians(1))
+    assert alongTrackDistance(0, 0, 0, 10, 1, 5) == pytest.approx(math.radians(5))
+    assert alongTrackDistance(0, 0, 0, 10, 1, -5) == pytest.approx(-math.radians(5))
+
+
+def test_intersection():
+    lat, lon = gcIntersection(0, 0, math.radians(45), 0, 10, math.radians(315))
+    assert lon == pytest.approx(5)
+    assert lat == pytest.approx(4.981069, abs=1e-6)
+    # one path heads north of the line between the points and the other south, so they don't meet ahead of both
+    lat, lon = gcIntersection(0, 0, math.radians(45), 0, 10, math.radians(135))
+    assert math.isnan(lat) and math.isnan(lon)
+
+
+def test_rhumb_line():
+    assert rhumbDistance(0, 0, 10, 0) == pytest.approx(math.radians(10))
+    assert rhumbDistance(0, 0, 0, 10) == pytest.approx(math.radians(10))
+    assert rhumbBearing(0, 0, 10, 0) == pytest.approx(0)
+    assert rhumbBearing(0, 0, 0, -10) == pytest.approx(-math.pi / 2)
+    lat, lon = rhumbDestination(10, 20, 0.7, 0.1)
+    assert rhumbBearing(10, 20, lat, lon) == pytest.approx(0.7)
+    assert rhumbDistance(10, 20, lat, lon) == pytest.approx(0.1)
+    # the rhumb line is never shorter than the great circle
+    assert rhumbDistance(50, -5, 40, -74) > gcDistance(50, -5, 40, -74)
+
+
+def random_points(count, seed):
+    rng = np.random.default_rng(seed)
+    return rng.uniform(-80, 80, count), rng.uniform(-180, 180, count)
+
+
+@pytest.mark.parametrize('function', [gcDistance, gcDistanceNm, gcDistanceKm, calcBearing, rhumbDistance, rhumbBearing, vincentyDistance])
+def test_scalar_and_array_inputs_agree(function):
+    lats, lons = random_points(200, 1)
+    array = function(51.47, -0.46, lats, lons)
+    scalar = [function(51.47, -0.46, lat, lon) for lat, lon in zip(lats.tolist(), lons.tolist())]
+    # Vincenty iterates all points until the slowest converges, so a single point may stop a little earlier
+    assert np.allclose(array, scalar, rtol=1e-12, atol=1e-5, equal_nan=True)
+    assert isinstance(function(51.47, -0.46, 40.64, -73.78), float)
+
+
+@pytest.mark.parametrize('function', [gcDestination, rhumbDestination])
+def test_scalar_and_array_destinations_agree(function):
+    rng = np.random.default_rng(2)
+    bearings = rng.uniform(-math.pi, math.pi, 100)
+    distances = rng.uniform(0, 1, 100)
+    lats, lons = function(20.0, 30.0, bearings, distances)
+    for lat, lon, bearing, distance in zip(lats, lons, bearings.tolist(), distances.tolist()):
+        assert function(20.0, 30.0, bearing, distance) == pytest.approx([lat, lon], abs=1e-9)
+
+
+def test_scalar_and_array_track_distances_agree():
+    lats, lons = random_points(100, 3)
+    cross = crossTrackDistance(51.47, -0.46, 40.64, -73.78, lats, lons)
+    along = alongTrackDistance(51.47, -0.46, 40.64, -73.78, lats, lons)
+    for i, (lat, lon) in enumerate(zip(lats.tolist(), lons.tolist())):
+        assert crossTrackDistance(51.47, -0.46, 40.64, -73.78, lat, lon) == pytest.approx(cross[i])
+        assert alongTrackDistance(51.47, -0.46, 40.64, -73.78, lat, lon) == pytest.approx(along[i])
@@ -0,0 +1,85 @@
+import callouts
+
+GPWS = [2500, 1000, 500, 400, 300, 200, 100, 50, 40, 30, 20, 10]
+
+
+def test_reversal_within_hysteresis_reports_lower_thresholds():
+    # bounce or go around: climbing to 150 and descending again. Only the thresholds at least
+    # the hysteresis below 150 are armed again.
+    detector = callouts.CrossingDetector(range(10, 301, 10), hysteresis=100)
+    assert detector.update(500) == []
+    assert len(detector.update(0)) == 30
+    assert detector.update(150) == []
+    assert detector.update(60) == []
+    assert detector.update(25) == [(50, -1), (40, -1), (30, -1)]
+    assert detector.update(5) == [(20, -1), (10, -1)]
+
+
+def test_hovering_around_threshold_is_reported_once():
+    detector = callouts.CrossingDetector([100], hysteresis=20)
+    detector.update(90)
+    assert detector.update(101) == [(100, 1)]
+    assert detector.update(99) == []
+    assert detector.update(101) == []
+    assert detector.update(99) == []
+    # 121 is hysteresis above, which arms the downward crossing again
+    assert detector.update(121) == []
+    assert detector.update(99) == [(100, -1)]
+    assert detector.update(101) == []
+    assert detector.update(79) == []
+    assert detector.update(101) == [(100, 1)]
+
+
+def test_climb_less_than_hysteresis_does_not_rearm():
+    detector = callouts.CrossingDetector(GPWS, hysteresis=100)
+    detector.update(3000)
+    assert [t for t, d in detector.update(2)] == sorted(GPWS, reverse=True)
+    detector.update(30)
+    detector.update(45)
+    assert detector.update(2) == []
+
+
+def test_climb_more_than_hysteresis_rearms_thresholds_below():
+    detector = callouts.CrossingDetector(GPWS, hysteresis=100)
+    detector.update(3000)
+    detector.update(2)
+    detector.update(145)
+    # 145 is at least 100 above 40, 30, 20 and 10, but not 50 or 100
+    assert detector.update(2) == [(40, -1), (30, -1), (20, -1), (10, -1)]
+
+
+def descend(predictor, start, end, time, step=1, rate=10):
+    # samples every step seconds at rate feet per second. Returns the callouts made and the time reached.
+    called = []
+    altitude = start
+    while altitude > end:
+        altitude = max(end, altitude - rate * step)
+        called += [t for t, delay in predictor.update(altitude, time, step)]
+        time += step
+    return called, time
+
+
+def climb(predictor, start, end, time, step=1, rate=10):
+    altitude = start
+    while altitude < end:
+        altitude = min(end, altitude + rate * step)
+        assert predictor.update(altitude, time, step) == []
+        time += step
+    return time
+
+
+def test_predictor_calls_each_callout_once_after_a_bounce():
+    predictor = callouts.CalloutPredictor(GPWS, latency=0)
+    called, time = descend(predictor, 600, 2, 0)
+    assert sorted(called, reverse=True) == [500, 400, 300, 200, 100, 50, 40, 30, 20, 10]
+    time = climb(predictor, 2, 45, time)
+    called, time = descend(predictor, 45, 2, time)
+    assert called == []
+
+
+def test_predictor_rearms_after_go_around():
+    predictor = callouts.CalloutPredictor(GPWS, latency=0)
+    called, time = descend(predictor, 600, 2, 0)
+    time = climb(predictor, 2, 145, time)
+    called, time = descend(predictor, 145, 2, time)
+    assert sorted(called, reverse=True) == [40, 30, 20, 10]
@@ -0,0 +1,75 @@
+import struct
+
+import engines
+
+
+def blocks(values):
+    # raw engine blocks with values[engine][field] set, engines numbered from 1
+    engine = bytearray(engines.ENGINE_BLOCK[1])
+    turbine = bytearray(engines.TURBINE_BLOCK[1])
+    switches = bytearray(engines.SWITCH_BLOCK[1])
+    valves = bytearray(engines.FUEL_VALVE_BLOCK[1])
+    for number, fields in values.items():
+        i = number - 1
+        # the switch block starts with engine 4
+        s = (engines.MAX_ENGINES - number) * 0xc0
+        struct.pack_into('<H', engine, i * 0x98 + 0x08, fields.get('Combustion', 0))
+        struct.pack_into('<I', engine, i * 0x98 + 0x64, int(fields.get('ITT', 0) * 16384))
+        struct.pack_into('<d', engine, i * 0x98 + 0x8c, fields.get('fuel_flow', 0))
+        struct.pack_into('<ddd', turbine, i * 0x100 + 0x10, fields.get('N1', 0), fields.get('N2', 0), 0)
+        struct.pack_into('<d', turbine, i * 0x100 + 0x60, fields.get('FuelFlow', 0))
+        struct.pack_into('<I', switches, s, fields.get('Starter', 0))
+        struct.pack_into('<I', switches, s + 0x7c, fields.get('Generator', 0))
+        struct.pack_into('<I', valves, i * 4, fields.get('FuelValve', 0))
+    return bytes(engine), bytes(turbine), bytes(switches), bytes(valves)
+
+
+def test_block_offsets():
+    assert engines.ENGINE_BLOCK == (0x088c, 0x260)
+    assert engines.TURBINE_BLOCK == (0x2000, 0x400)
+    assert engines.SWITCH_BLOCK == (0x38c0, 0x300)
+    # engine 1 starter is 0x3b00 and generator 0x3b7c
+    assert 0x38c0 + (engines.MAX_ENGINES - 1) * 0xc0 == 0x3b00
+
+
+def test_decode_and_publish():
+    raw = blocks({
+        1: {'Combustion': 1, 'ITT': 650, 'fuel_flow': 1200.0, 'N1': 85.5, 'N2': 92.0, 'FuelFlow': 1150.0, 'Starter': 0, 'Generator': 1, 'FuelValve': 1},
+        2: {'Combustion': 1, 'ITT': 640, 'fuel_flow': 1100.0, 'N1': 84.0, 'N2': 91.0, 'FuelFlow': 1050.0, 'Starter': 1, 'Generator': 0, 'FuelValve': 1},
+        4: {'N1': 50.0, 'fuel_flow': 999.0, 'Starter': 1},
+    })
+    decoded = engines.Engines(*raw, count=2)
+    assert decoded.count == 2
+    assert decoded['N1'].tolist() == [85.5, 84.0]
+    assert decoded['ITT'].tolist() == [650, 640]
+    assert decoded['Starter'].tolist() == [0, 1]
+    assert decoded['Generator'].tolist() == [1, 0]
+    # engines the aircraft doesn't have are left out of the total
+    assert decoded.total_fuel_flow == 2300.0
+    instr = {}
+    decoded.publish(instr)
+    assert instr['Eng1Generator'] == 1
+    assert instr['Eng2Starter'] == 1
+    assert instr['Eng4Starter'] == 1
+    assert instr['eng1_fuel_flow'] == 1200.0
+    assert instr['Eng2FuelValve'] == 1
+    assert instr['Eng1ITT'] == 650
+
+
+def test_start_milestones_in_order_and_rearmed_after_shutdown():
+    monitor = engines.StartMonitor()
+    starting = blocks({1: {'Starter': 1, 'N2': 20.0}, 2: {'Starter': 1, 'N2': 6.0}})
+    assert monitor.update(engines.Engines(*starting, count=2)) == ['number 1, 5 percent N2', 'number 2, 5 percent N2']
+    running = blocks({1: {'Starter': 1, 'N2': 25.0, 'N1': 8.0, 'FuelFlow': 300.0}, 2: {'Starter': 1, 'N2': 8.0}})
+    assert monitor.update(engines.Engines(*running, count=2)) == ['number 1, 5 percent N1', 'Number 1 fuel flow']
+    assert monitor.update(engines.Engines(*running, count=2)) == []
+    # engine 1 shut down and started again
+    monitor.update(engines.Engines(*blocks({2: {'Starter': 1, 'N2': 8.0}}), count=2))
+    assert monitor.update(engines.Engines(*running, count=2)) == ['number 1, 5 percent N2', 'number 1, 5 percent N1', 'Number 1 fuel flow']
+
+
+def test_start_milestones_need_starter_and_engine():
+    monitor = engines.StartMonitor()
+    # no starter on engine 1, and engine 3 is beyond the engine count
+    raw = blocks({1: {'N2': 50.0}, 3: {'Starter': 1, 'N2': 50.0}})
+    assert monitor.update(engines.Engines(*raw, count=2)) == []
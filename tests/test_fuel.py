@@ -0,0 +1,85 @@
+import struct
+
+import pytest
+
+import fuel
+
+
+def blocks(tanks):
+    # raw fuel blocks with tanks set by name to (level fraction, capacity in gallons)
+    data = {start: bytearray(length) for start, length in fuel.BLOCKS}
+    for name, side, level_offset, capacity_offset in fuel.TANKS:
+        level, capacity = tanks.get(name, (0, 0))
+        for offset, value in ((level_offset, int(level * fuel.LEVEL_SCALE)), (capacity_offset, capacity)):
+            for start, length in fuel.BLOCKS:
+                if start <= offset < start + length:
+                    struct.pack_into('<I', data[start], offset - start, value)
+    return [bytes(data[start]) for start, length in fuel.BLOCKS]
+
+
+def test_decode_tanks():
+    raw = blocks({'center': (0.5, 100), 'main left': (1.0, 50), 'main right': (0.8, 50), 'center2': (0.25, 40)})
+    tanks = fuel.FuelTanks.decode(raw, 6 * 256)
+    # tanks without a capacity are left out, the rest keep their TANKS order
+    assert tanks.names == ['center', 'center2', 'main left', 'main right']
+    assert len(tanks) == 4
+    assert tanks.level.tolist() == pytest.approx([0.5, 0.25, 1.0, 0.8])
+    assert tanks.quantity.tolist() == pytest.approx([50, 10, 50, 40])
+    assert tanks.weight.tolist() == pytest.approx([300, 60, 300, 240])
+    assert tanks.total_capacity == 240
+    assert tanks.total_quantity == pytest.approx(150)
+    assert tanks.total_weight == pytest.approx(900)
+    # left is 60 pounds heavier
+    assert tanks.imbalance == pytest.approx(60)
+    assert tanks.find('main right') == 3
+    assert tanks.find('tip left') is None
+
+
+def test_decode_right_heavy():
+    tanks = fuel.FuelTanks.decode(blocks({'tip left': (0.1, 20), 'tip right': (0.6, 20)}), 6 * 256)
+    assert tanks.imbalance == pytest.approx(-60)
+
+
+def burn_series(estimator, start, seconds, rate, flow, quantity=1000.0, interval=5, **kwargs):
+    # feeds a steady burn of rate pounds per hour. Returns the time and quantity reached.
+    t = start
+    while t < start + seconds:
+        estimator.update(t, quantity, flow, **kwargs)
+        t += interval
+        quantity -= rate * interval / 3600
+    return t, quantity + rate * interval / 3600
+
+
+def test_burn_uses_fuel_flow_until_min_span():
+    estimator = fuel.BurnEstimator(window=300, interval=5, min_span=60)
+    burn_series(estimator, 0, 30, 600, 550)
+    assert estimator.burn == pytest.approx(550)
+
+
+def test_burn_is_slope_of_linear_series():
+    estimator = fuel.BurnEstimator(window=300, interval=5, min_span=60)
+    # long enough for the ring buffer to wrap several times
+    t, quantity = burn_series(estimator, 1000, 2000, 600, 550, ground_speed=240, ete=1800)
+    assert estimator.burn == pytest.approx(600)
+    assert estimator.endurance == pytest.approx(quantity / 600)
+    assert estimator.range == pytest.approx(quantity / 600 * 240)
+    assert estimator.at_destination == pytest.approx(quantity - 300)
+
+
+def test_refuel_starts_a_new_window():
+    estimator = fuel.BurnEstimator(window=300, interval=5, min_span=60)
+    t, quantity = burn_series(estimator, 0, 600, 600, 550)
+    estimator.update(t, quantity + 500, 400)
+    assert estimator.count == 1
+    assert estimator.burn == pytest.approx(400)
+    burn_series(estimator, t + 5, 600, 900, 800, quantity=quantity + 500)
+    assert estimator.burn == pytest.approx(900)
+
+
+def test_no_burn_has_no_endurance():
+    estimator = fuel.BurnEstimator()
+    estimator.update(0, 1000, 0, ground_speed=0)
+    assert estimator.burn == 0
+    assert estimator.endurance is None
+    assert estimator.range is None
+    assert estimator.at_destination is None
@@ -0,0 +1,64 @@
+import pytest
+
+import geocache
+
+
+def test_geohash():
+    # the example from the geohash article
+    assert geocache.geohash(57.64911, 10.40744, 11) == 'u4pruydqqvj'
+    assert geocache.geohash(57.64911, 10.40744) == 'u4pru'
+
+
+def test_hit_and_tile_sharing(tmp_path):
+    cache = geocache.GeoCache(str(tmp_path / 'cache.db'))
+    assert cache.get('city', 51.47, -0.46) == (False, None)
+    cache.put('city', 51.47, -0.46, {'name': 'Hounslow'})
+    assert cache.get('city', 51.47, -0.46) == (True, {'name': 'Hounslow'})
+    # a nearby point in the same tile shares the entry, a different kind of lookup doesn't
+    assert cache.get('city', 51.471, -0.461) == (True, {'name': 'Hounslow'})
+    assert cache.get('ocean', 51.47, -0.46) == (False, None)
+    assert cache.hits == 2
+    assert cache.misses == 2
+    cache.close()
+    # kept across restarts
+    cache = geocache.GeoCache(str(tmp_path / 'cache.db'))
+    assert cache.get('city', 51.47, -0.46) == (True, {'name': 'Hounslow'})
+
+
+def test_expiry(tmp_path, monkeypatch):
+    now = [1000000.0]
+    monkeypatch.setattr(geocache.time, 'time', lambda: now[0])
+    cache = geocache.GeoCache(str(tmp_path / 'cache.db'), ttl=60)
+    cache.put('timezone', 0, 0, 'Africa/Abidjan')
+    now[0] += 59
+    assert cache.get('timezone', 0, 0) == (True, 'Africa/Abidjan')
+    now[0] += 2
+    assert cache.get('timezone', 0, 0) == (False, None)
+    # expired entries are deleted when the cache is opened
+    cache.close()
+    cache = geocache.GeoCache(str(tmp_path / 'cache.db'), ttl=60)
+    assert cache.db.execute('SELECT COUNT(*) FROM lookups').fetchone()[0] == 0
+
+
+def test_cached_stores_empty_results_but_not_errors(tmp_path):
+    cache = geocache.GeoCache(str(tmp_path / 'cache.db'))
+    calls = []
+
+    def fetch(reply):
+        def f():
+            calls.append(reply)
+            data = geocache.geonames_result(reply)
+            return data['ocean']['name'] if 'ocean' in data else None
+        return f
+
+    throttled = {'status': {'message': 'the hourly limit of 1000 credits has been exceeded', 'value': 19}}
+    with pytest.raises(geocache.GeoNamesError):
+        cache.cached('ocean', 10, 10, fetch(throttled))
+    assert cache.get('ocean', 10, 10) == (False, None)
+    # over land GeoNames answers with status 15, which is a real answer
+    land = {'status': {'message': 'we are afraid we could not find an ocean', 'value': 15}}
+    assert cache.cached('ocean', 10, 10, fetch(land)) is None
+    assert cache.cached('ocean', 10, 10, fetch(throttled)) is None
+    assert len(calls) == 2
+    assert cache.cached('ocean', 0, -30, fetch({'ocean': {'name': 'North Atlantic Ocean'}})) == 'North Atlantic Ocean'
+    assert cache.get('ocean', 0, -30) == (True, 'North Atlantic Ocean')
@@ -0,0 +1,87 @@
+import numpy as np
+
+import geoindex
+from aviationFormula.aviationFormula import gcDistanceKm
+
+
+def random_points(count, seed):
+    rng = np.random.default_rng(seed)
+    # uniform on the sphere, so the poles get their share of points
+    lats = np.degrees(np.arcsin(rng.uniform(-1, 1, count)))
+    lons = rng.uniform(-180, 180, count)
+    return lats, lons
+
+
+def brute_within(lats, lons, lat, lon, radius):
+    distance = gcDistanceKm(lat, lon, lats, lons)
+    return set(np.flatnonzero(distance <= radius).tolist())
+
+
+def test_within_wide_span_near_pole():
+    lats, lons = random_points(20000, 1)
+    index = geoindex.GridIndex(lats, lons)
+    found, distance = index.within(-79.318, 107.737, 900.1)
+    assert set(found.tolist()) == brute_within(lats, lons, -79.318, 107.737, 900.1)
+    assert np.all(np.diff(distance) >= 0)
+
+
+def test_within_matches_brute_force():
+    lats, lons = random_points(5000, 2)
+    index = geoindex.GridIndex(lats, lons)
+    rng = np.random.default_rng(3)
+    # near the poles, near the antimeridian and anywhere
+    queries = [(rng.uniform(75, 90) * rng.choice([-1, 1]), rng.uniform(-180, 180)) for i in range(40)]
+    queries += [(rng.uniform(-80, 80), rng.choice([-1, 1]) * rng.uniform(175, 180)) for i in range(40)]
+    queries += [(rng.uniform(-90, 90), rng.uniform(-180, 180)) for i in range(40)]
+    for lat, lon in queries:
+        radius = rng.uniform(10, 3000)
+        found, distance = index.within(lat, lon, radius)
+        assert set(found.tolist()) == brute_within(lats, lons, lat, lon, radius), (lat, lon, radius)
+
+
+def test_nearest_matches_brute_force():
+    lats, lons = random_points(3000, 4)
+    index = geoindex.GridIndex(lats, lons)
+    rng = np.random.default_rng(5)
+    for i in range(100):
+        lat = rng.uniform(-90, 90) if i % 2 else rng.choice([-1, 1]) * rng.uniform(80, 90)
+        lon = rng.uniform(-180, 180)
+        found, distance = index.nearest(lat, lon, k=3)
+        expected = np.sort(gcDistanceKm(lat, lon, lats, lons))[:3]
+        assert np.allclose(distance, expected), (lat, lon)
+
+
+def test_nearest_respects_max_distance():
+    index = geoindex.GridIndex([0.0, 10.0], [0.0, 0.0])
+    found, distance = index.nearest(0.5, 0.0, k=2, max_distance=200)
+    assert found.tolist() == [0]
+
+
+def test_grouped_points_match_brute_force():
+    rng = np.random.default_rng(6)
+    icao = rng.choice(['EGLL', 'KJFK', 'NZAA'], 300)
+    centre = {'EGLL': (51.47, -0.46), 'KJFK': (40.64, -73.78), 'NZAA': (-37.01, 174.79)}
+    lats = np.array([centre[c][0] for c in icao]) + rng.uniform(-0.02, 0.02, 300)
+    lons = np.array([centre[c][1] for c in icao]) + rng.uniform(-0.02, 0.02, 300)
+    labels = ['gate {}'.format(i) for i in range(300)]
+    points = geoindex.GroupedPoints(icao, lats, lons, labels)
+    assert 'KJFK' in points
+    assert 'LFPG' not in points
+    at = np.flatnonzero(icao == 'KJFK')
+    queries_lat = 40.64 + rng.uniform(-0.03, 0.03, 50)
+    queries_lon = -73.78 + rng.uniform(-0.03, 0.03, 50)
+    matched, distance = points.match('KJFK', queries_lat, queries_lon, 0.5)
+    for lat, lon, label, d in zip(queries_lat, queries_lon, matched, distance):
+        all_distance = gcDistanceKm(lat, lon, lats[at], lons[at])
+        nearest = at[np.argmin(all_distance)]
+        assert np.isclose(d, all_distance.min())
+        assert label == (labels[nearest] if d <= 0.5 else None)
+
+
+def test_grouped_points_unknown_airport():
+    points = geoindex.GroupedPoints(['EGLL'], [51.47], [-0.46], ['gate 1'])
+    matched, distance = points.match('KJFK', [40.64, 40.65], [-73.78, -73.78], 1)
+    assert matched == [None, None]
+    assert np.all(np.isinf(distance))
+    matched, distance = points.match('EGLL', 51.47, -0.46, 1)
+    assert matched == ['gate 1']
@@ -0,0 +1,141 @@
+import struct
+
+import numpy as np
+import pytest
+
+import tcas
+
+
+def table(aircraft):
+    # raw 96 slot table. aircraft maps slot to a dict of record fields.
+    block = bytearray(tcas.TCAS_SLOTS * 40)
+    for slot, a in aircraft.items():
+        struct.pack_into('<i3f2Hh15sBh', block, slot * 40, a['id'], a['lat'], a['lon'], a.get('alt', 0), a.get('hdg', 0), a.get('gs', 0), a.get('vs', 0), a.get('atc', b''), a.get('state', 0), a.get('com', 0))
+    return bytes(block)
+
+
+def extended_table(aircraft):
+    block = bytearray(tcas.TCAS_SLOTS * 20)
+    for slot, a in aircraft.items():
+        struct.pack_into('<2B2Hh4s4s2Bh', block, slot * 20, a.get('GateName', 0), a.get('GateType', 0), a.get('GateNumber', 0), 0, 0, a.get('departure', b''), a.get('arrival', b''), a.get('Runway', 0), a.get('RunwayDesignator', 0), 0)
+    return bytes(block)
+
+
+def test_record_sizes():
+    assert tcas.TCAS_RECORD.itemsize == 40
+    assert tcas.TCAS_EXTENDED_RECORD.itemsize == 20
+
+
+def test_read_filters_and_sorts_by_distance():
+    block = table({
+        0: {'id': 1, 'lat': 51.0, 'lon': 1.0, 'atc': b'FAR', 'state': 0x85},
+        3: {'id': 2, 'lat': 51.0, 'lon': 0.1, 'atc': b'NEAR', 'state': 0x85, 'hdg': 16384},
+        5: {'id': 3, 'lat': 51.0, 'lon': 0.2, 'atc': b'ASLEEP', 'state': tcas.STATE_SLEEPING},
+        # an empty slot has id 0, whatever else it holds
+        7: {'id': 0, 'lat': 51.0, 'lon': 0.0},
+    })
+    traffic = tcas.Traffic.read(block, 51.0, 0.0, exclude_states=(tcas.STATE_SLEEPING,))
+    assert [c.atc for c in traffic] == ['NEAR', 'FAR']
+    near = traffic[0]
+    assert near.id == 2
+    assert near.heading == 90
+    assert near.distance == pytest.approx(0.1 * 60 * np.cos(np.radians(51)), rel=1e-3)
+    assert near.bearing == pytest.approx(90, abs=0.1)
+    assert len(tcas.Traffic.read(block, 51.0, 0.0)) == 3
+    assert [c.atc for c in traffic.in_state(0x85)] == ['NEAR', 'FAR']
+
+
+def test_within_altitude():
+    block = table({0: {'id': 1, 'lat': 0, 'lon': 0.1, 'alt': 5000}, 1: {'id': 2, 'lat': 0, 'lon': 0.2, 'alt': 9000}})
+    traffic = tcas.Traffic.read(block, 0.0, 0.0)
+    assert [c.id for c in traffic.within_altitude(4000, 6000)] == [1]
+
+
+def test_extended_records_follow_contacts():
+    block = table({2: {'id': 1, 'lat': 0, 'lon': 0.5}, 9: {'id': 2, 'lat': 0, 'lon': 0.1}})
+    extended = extended_table({2: {'departure': b'EGLL'}, 9: {'departure': b'KJFK'}})
+    traffic = tcas.Traffic.read(block, 0.0, 0.0, extended)
+    assert [tcas.text(c.extended['departure']) for c in traffic] == ['KJFK', 'EGLL']
+    assert traffic.extended_field('departure').tolist() == [b'KJFK', b'EGLL']
+
+
+def poll(tracker, timestamp, range_nm, alt=5000, state=0x85):
+    # one contact due east of us at range_nm
+    block = table({0: {'id': 7, 'lat': 0.0, 'lon': range_nm / 60, 'alt': alt, 'atc': b'TEST', 'state': state}})
+    return [event for event, track in tracker.update(tcas.Traffic.read(block, 0.0, 0.0), 5000, 0, timestamp)]
+
+
+def fly(tracker, timestamp, ranges, **kwargs):
+    events = []
+    for range_nm in ranges:
+        events += poll(tracker, timestamp, range_nm, **kwargs)
+        timestamp += 10
+    return events, timestamp
+
+
+def test_proximity_alert_rearms_only_past_rearm_range():
+    tracker = tcas.TrafficTracker(alert_range=3.0, alert_altitude=1000, rearm=1.5)
+    events, t = fly(tracker, 0, [6, 5.5, 5, 4.5, 4, 3.5, 3, 2.5])
+    assert events == ['proximity']
+    track = tracker.tracks[7]
+    assert track.alerted and track.closing
+    assert track.relative_bearing == pytest.approx(90, abs=0.1)
+    # out to 4 nm, less than 1.5 times the alert range, and back in
+    events, t = fly(tracker, t, [3, 3.5, 4, 3.5, 3, 2.5, 2])
+    assert events == []
+    # out past 4.5 nm and back in
+    events, t = fly(tracker, t, [3, 4, 5, 4.5, 4, 3.5, 3, 2.5])
+    assert events == ['proximity']
+
+
+def test_no_alert_outside_altitude_band_or_asleep():
+    tracker = tcas.TrafficTracker()
+    events, t = fly(tracker, 0, [5, 4, 3, 2, 1], alt=7000)
+    assert events == []
+    tracker = tcas.TrafficTracker()
+    events, t = fly(tracker, 0, [5, 4, 3, 2, 1], state=tcas.STATE_SLEEPING)
+    assert events == []
+
+
+def test_state_change_and_forgotten_tracks():
+    tracker = tcas.TrafficTracker()
+    assert poll(tracker, 0, 20, state=0x87) == []
+    assert poll(tracker, 10, 20, state=0x88) == ['state']
+    assert tracker.tracks[7].previous_state == 0x87
+    tracker.update(tcas.Traffic.read(table({}), 0.0, 0.0), 5000, 0, 20)
+    assert tracker.tracks == {}
+    assert tracker.fresh(25, 10)
+    assert not tracker.fresh(40, 10)
+
+
+def test_ground_summary():
+    aircraft = {
+        0: ({'id': 1, 'lat': 0, 'lon': 0.01, 'state': 0x87}, {'Runway': 27, 'RunwayDesignator': 1}),
+        1: ({'id': 2, 'lat': 0, 'lon': 0.02, 'state': 0x8A}, {'Runway': 27, 'RunwayDesignator': 1}),
+        2: ({'id': 3, 'lat': 0, 'lon': 0.03, 'state': 0x88}, {'Runway': 27, 'RunwayDesignator': 1}),
+        3: ({'id': 4, 'lat': 0, 'lon': 0.04, 'state': 0x89}, {'Runway': 9, 'RunwayDesignator': 0}),
+        # departing state but no runway assigned
+        4: ({'id': 5, 'lat': 0, 'lon': 0.05, 'state': 0x87}, {}),
+        5: ({'id': 6, 'lat': 0, 'lon': 0.06, 'state': tcas.STATE_SLEEPING}, {'GateType': 4}),
+        6: ({'id': 7, 'lat': 0, 'lon': 0.07, 'state': tcas.STATE_SLEEPING}, {'GateType': 4}),
+        7: ({'id': 8, 'lat': 0, 'lon': 0.08, 'state': tcas.STATE_SLEEPING}, {'GateType': 7}),
+        8: ({'id': 9, 'lat': 0, 'lon': 0.09, 'state': tcas.STATE_TAXI_IN}, {'GateType': 7}),
+    }
+    block = table({slot: record for slot, (record, extended) in aircraft.items()})
+    extended = extended_table({slot: extended for slot, (record, extended) in aircraft.items()})
+    summary = tcas.GroundSummary(tcas.Traffic.read(block, 0.0, 0.0, extended))
+    assert summary.by_state == {0x87: 2, 0x88: 1, 0x89: 1, 0x8A: 1, tcas.STATE_SLEEPING: 3, tcas.STATE_TAXI_IN: 1}
+    assert summary.count(*tcas.DEPARTURE_STATES) == 5
+    assert sorted(summary.departures) == [(9, 0), (27, 1)]
+    # nearest takeoff first
+    assert [c.id for c in summary.departures[(27, 1)]] == [2, 3, 1]
+    assert [c.id for c in summary.departures[(9, 0)]] == [4]
+    # only sleeping aircraft count as parked
+    assert summary.gate_types == {4: 2, 7: 1}
+
+
+def test_ground_summary_without_extended_table():
+    summary = tcas.GroundSummary(tcas.Traffic.read(table({0: {'id': 1, 'lat': 0, 'lon': 0.01, 'state': 0x87}}), 0.0, 0.0))
+    assert summary.by_state == {0x87: 1}
+    assert summary.departures == {}
+    assert summary.gate_types == {}
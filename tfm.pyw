@@ -21,6 +21,9 @@
 
 
 # Import built-ins
+# startup is imported first so startup times are measured from launch
+import startup
+import functools
 import logging
 import os
 import sys
@@ -68,6 +71,7 @@ from accessible_output2.outputs import sapi5
 from accessible_output2.outputs import auto
 from pubsub import pub
 import widgetUtils
+startup.mark("modules imported")
 # Import own packages.
 
 # initialize the log settings
@@ -136,28 +140,29 @@ def commandMode():
             config.app['hotkeys']['mute_simconnect_key']: tfm.toggleMuteSimconnect,
             config.app['hotkeys']['toggle_gpws_key']: tfm.toggleGPWS,
             config.app['hotkeys']['toggle_ils_key']:tfm.toggleILS,
+            config.app['hotkeys']['ils_tones_key']: tfm.toggleILSTones,
             config.app['hotkeys']['toggle_flaps_key']: tfm.toggleFlaps,
             config.app['hotkeys']['autopilot_key']: tfm.toggleAutoPilot,
             config.app['hotkeys']['wind_key']: tfm.readWind,
             config.app['hotkeys']['runway_guidance_key']: tfm.runway_guidance_mode,
             config.app['hotkeys']['fuel_report_key']: tfm.fuel_report,
             config.app['hotkeys']['fuel_flow_key']: tfm.fuel_flow_report,
-            config.app['hotkeys']['tank1_key']: tfm.fuel_t1,
-            config.app['hotkeys']['tank2_key']: tfm.fuel_t2,
-            config.app['hotkeys']['tank3_key']: tfm.fuel_t3,
-            config.app['hotkeys']['tank4_key']: tfm.fuel_t4,
-            config.app['hotkeys']['tank5_key']: tfm.fuel_t5,
-            config.app['hotkeys']['tank6_key']: tfm.fuel_t6,
-            config.app['hotkeys']['tank7_key']: tfm.fuel_t7,
-            config.app['hotkeys']['tank8_key']: tfm.fuel_t8,
-            config.app['hotkeys']['tank9_key']: tfm.fuel_t9,
-            config.app['hotkeys']['tank10_key']: tfm.fuel_t10,
+            config.app['hotkeys']['tank1_key']: functools.partial(tfm.fuel_tank, 1),
+            config.app['hotkeys']['tank2_key']: functools.partial(tfm.fuel_tank, 2),
+            config.app['hotkeys']['tank3_key']: functools.partial(tfm.fuel_tank, 3),
+            config.app['hotkeys']['tank4_key']: functools.partial(tfm.fuel_tank, 4),
+            config.app['hotkeys']['tank5_key']: functools.partial(tfm.fuel_tank, 5),
+            config.app['hotkeys']['tank6_key']: functools.partial(tfm.fuel_tank, 6),
+            config.app['hotkeys']['tank7_key']: functools.partial(tfm.fuel_tank, 7),
+            config.app['hotkeys']['tank8_key']: functools.partial(tfm.fuel_tank, 8),
+            config.app['hotkeys']['tank9_key']: functools.partial(tfm.fuel_tank, 9),
+            config.app['hotkeys']['tank10_key']: functools.partial(tfm.fuel_tank, 10),
             config.app['hotkeys']['tcas_air_key']: tfm.tcas_air,
             config.app['hotkeys']['tcas_ground_key']: tcas_ground,
-            config.app['hotkeys']['eng1_key']: tfm.read_eng1,
-            config.app['hotkeys']['eng2_key']: tfm.read_eng2,
-            config.app['hotkeys']['eng3_key']: tfm.read_eng3,
-            config.app['hotkeys']['eng4_key']: tfm.read_eng4,
+            config.app['hotkeys']['eng1_key']: functools.partial(tfm.read_engine, 1),
+            config.app['hotkeys']['eng2_key']: functools.partial(tfm.read_engine, 2),
+            config.app['hotkeys']['eng3_key']: functools.partial(tfm.read_engine, 3),
+            config.app['hotkeys']['eng4_key']: functools.partial(tfm.read_engine, 4),
             "e": tfm.ReadSimulationRate,
 
 
@@ -578,6 +583,7 @@ if __name__ == '__main__':
     tfm.daemon=True
     tfm.start()
     frame.Show()
+    startup.mark("window shown")
     app.MainLoop()    
 
 
@@ -7,6 +7,7 @@ added_files = [
     ('changelog.txt', '.'), 
     ('sounds/*.wav', 'sounds'), 
     ('tfm.defaults', '.'), 
+    ('announcements.ini', '.'), 
     ('scripts/*.*', 'scripts'), 
     ('checklists', 'checklists'), 
     ('data', 'data'),
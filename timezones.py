@@ -0,0 +1,108 @@
+# offline timezone lookup for flight following.
+# Zone boundaries come from the timezone-boundary-builder combined.json GeoJSON file in the data folder.
+# They are imported once into the memory mapped column store used by the airport database: one
+# row per polygon with its zone and bounding box, one per ring and one per vertex. A lookup first
+# tests the polygon that matched last time, since aircraft stay in one zone for hours, then only
+# the polygons whose bounding box contains the point.
+import json
+import logging
+
+import numpy as np
+
+import airportdb
+
+log = logging.getLogger("timezones")
+
+SCHEMA_VERSION = 1
+
+
+def read_geojson(path):
+    with open(path, encoding='UTF-8') as f:
+        data = json.load(f)
+    zones = []
+    polygons = {c: [] for c in ['zone', 'first_ring', 'rings', 'min_lon', 'min_lat', 'max_lon', 'max_lat']}
+    ring_starts = []
+    ring_lengths = []
+    lons = []
+    lats = []
+    vertices = 0
+    for feature in data['features']:
+        geometry = feature['geometry']
+        if geometry['type'] == 'Polygon':
+            shapes = [geometry['coordinates']]
+        elif geometry['type'] == 'MultiPolygon':
+            shapes = geometry['coordinates']
+        else:
+            continue
+        zone = len(zones)
+        zones.append(feature['properties']['tzid'])
+        for rings in shapes:
+            polygons['zone'].append(zone)
+            polygons['first_ring'].append(len(ring_starts))
+            polygons['rings'].append(len(rings))
+            # the outer ring bounds the polygon
+            outer = np.array(rings[0], dtype=np.float64)
+            polygons['min_lon'].append(outer[:, 0].min())
+            polygons['min_lat'].append(outer[:, 1].min())
+            polygons['max_lon'].append(outer[:, 0].max())
+            polygons['max_lat'].append(outer[:, 1].max())
+            for ring in rings:
+                ring = np.array(ring, dtype=np.float64)
+                ring_starts.append(vertices)
+                ring_lengths.append(len(ring))
+                lons.append(ring[:, 0])
+                lats.append(ring[:, 1])
+                vertices += len(ring)
+        # free the coordinates of this zone as we go
+        geometry.clear()
+    return {
+        'zones': {'name': zones},
+        'polygons': {key: np.array(values) for key, values in polygons.items()},
+        'rings': {'start': np.array(ring_starts, dtype=np.int64), 'length': np.array(ring_lengths, dtype=np.int64)},
+        'vertices': {'lon': np.concatenate(lons).astype(np.float32), 'lat': np.concatenate(lats).astype(np.float32)},
+    }
+
+
+class TimezoneIndex:
+    def __init__(self, path, geojson):
+        # path is the folder for the imported boundaries, rebuilt when the GeoJSON file changes
+        if not airportdb.is_current(path, [geojson], SCHEMA_VERSION):
+            log.debug(F"importing {geojson}")
+            airportdb.save(path, read_geojson(geojson), [geojson], SCHEMA_VERSION)
+        tables = airportdb.load(path)
+        self.zones = tables['zones']['name']
+        self.polygons = tables['polygons']
+        self.rings = tables['rings']
+        self.vertices = tables['vertices']
+        # the polygon which contained the last point looked up
+        self.last = None
+        log.debug(F"loaded {len(self.polygons['zone'])} polygons in {len(self.zones)} timezones")
+
+    def contains(self, polygon, lat, lon):
+        # even-odd ray casting over all rings of the polygon, so holes are excluded
+        inside = False
+        first = int(self.polygons['first_ring'][polygon])
+        for ring in range(first, first + int(self.polygons['rings'][polygon])):
+            start = int(self.rings['start'][ring])
+            end = start + int(self.rings['length'][ring])
+            x = self.vertices['lon'][start:end]
+            y = self.vertices['lat'][start:end]
+            x0, y0, x1, y1 = x[:-1], y[:-1], x[1:], y[1:]
+            spans = (y0 > lat) != (y1 > lat)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                crossings = spans & (lon < (x1 - x0) * (lat - y0) / (y1 - y0) + x0)
+            if np.count_nonzero(crossings) % 2:
+                inside = not inside
+        return inside
+
+    def lookup(self, lat, lon):
+        # returns the tz database name for the point, such as Europe/London, or None
+        if self.last is not None and self.contains(self.last, lat, lon):
+            return str(self.zones[self.polygons['zone'][self.last]])
+        p = self.polygons
+        candidates = np.flatnonzero((p['min_lon'] <= lon) & (lon <= p['max_lon']) & (p['min_lat'] <= lat) & (lat <= p['max_lat']))
+        for polygon in candidates.tolist():
+            if polygon != self.last and self.contains(polygon, lat, lon):
+                self.last = polygon
+                return str(self.zones[p['zone'][polygon]])
+        return None
@@ -0,0 +1,124 @@
+# offline detection of the sea or ocean under the aircraft for flight following.
+# Water bodies come from the Natural Earth ne_10m_geography_marine_polys.geojson file in the data
+# folder. They are imported once into the memory mapped column store used by the airport database,
+# simplified by snapping vertices to a grid of tolerance degrees, and stored as polygon edges tiled
+# into bands of latitude. A lookup only reads the edges in the aircraft's band, so only those pages
+# of the edge columns are loaded from disk, and finds every body containing the point with one ray
+# cast over them. That is cheap enough to check every few seconds and announce coastline crossings
+# as they happen.
+import json
+import logging
+
+import numpy as np
+
+import airportdb
+
+log = logging.getLogger("waterbodies")
+
+SCHEMA_VERSION = 1
+
+# degrees of latitude covered by each band of edges
+BAND_SIZE = 0.5
+BANDS = int(180 / BAND_SIZE)
+
+
+def simplify(ring, tolerance):
+    # snap the vertices to the grid and drop the ones that land on the same point as the one before
+    ring = np.round(ring / tolerance) * tolerance
+    keep = np.ones(len(ring), dtype=bool)
+    keep[1:] = np.any(ring[1:] != ring[:-1], axis=1)
+    return ring[keep]
+
+
+def band(lat):
+    return np.clip(((np.asarray(lat) + 90) // BAND_SIZE).astype(np.int64), 0, BANDS - 1)
+
+
+def read_geojson(path, tolerance=0.01):
+    with open(path, encoding='UTF-8') as f:
+        data = json.load(f)
+    names = []
+    areas = []
+    edges = {c: [] for c in ['x0', 'y0', 'x1', 'y1', 'body']}
+    for feature in data['features']:
+        geometry = feature['geometry']
+        if geometry is None:
+            continue
+        if geometry['type'] == 'Polygon':
+            shapes = [geometry['coordinates']]
+        elif geometry['type'] == 'MultiPolygon':
+            shapes = geometry['coordinates']
+        else:
+            continue
+        body = len(names)
+        names.append(feature['properties'].get('name') or '')
+        low = np.array([180.0, 90.0])
+        high = np.array([-180.0, -90.0])
+        # the parts of a body don't overlap, so the even-odd rule works over all their rings together
+        for rings in shapes:
+            for ring in rings:
+                ring = simplify(np.array(ring, dtype=np.float64)[:, :2], tolerance)
+                if len(ring) < 4:
+                    continue
+                low = np.minimum(low, ring.min(axis=0))
+                high = np.maximum(high, ring.max(axis=0))
+                edges['x0'].append(ring[:-1, 0])
+                edges['y0'].append(ring[:-1, 1])
+                edges['x1'].append(ring[1:, 0])
+                edges['y1'].append(ring[1:, 1])
+                edges['body'].append(np.full(len(ring) - 1, body))
+        # bounding box area, used to prefer a bay over the ocean it opens onto
+        areas.append(float(np.prod(np.maximum(high - low, 0))))
+        geometry.clear()
+    edges = {key: np.concatenate(values) for key, values in edges.items()}
+    # horizontal edges never cross the ray
+    sloped = edges['y0'] != edges['y1']
+    edges = {key: values[sloped] for key, values in edges.items()}
+    # repeat each edge in every band it spans, then sort by band
+    first = band(np.minimum(edges['y0'], edges['y1']))
+    last = band(np.maximum(edges['y0'], edges['y1']))
+    counts = last - first + 1
+    index = np.repeat(np.arange(len(first)), counts)
+    bands = np.repeat(first, counts) + np.arange(len(index)) - np.repeat(np.cumsum(counts) - counts, counts)
+    order = np.argsort(bands, kind='stable')
+    index = index[order]
+    bands = bands[order]
+    tiled = {key: edges[key][index].astype(np.float32) for key in ['x0', 'y0', 'x1', 'y1']}
+    tiled['body'] = edges['body'][index].astype(np.int32)
+    return {
+        'bodies': {'name': names, 'area': areas},
+        'edges': tiled,
+        # edges of band b are offset[b] to offset[b + 1]
+        'bands': {'offset': np.searchsorted(bands, np.arange(BANDS + 1)).astype(np.int64)},
+    }
+
+
+class WaterIndex:
+    def __init__(self, path, geojson):
+        # path is the folder for the imported water bodies, rebuilt when the GeoJSON file changes
+        if not airportdb.is_current(path, [geojson], SCHEMA_VERSION):
+            log.debug(F"importing {geojson}")
+            airportdb.save(path, read_geojson(geojson), [geojson], SCHEMA_VERSION)
+        tables = airportdb.load(path)
+        self.names = tables['bodies']['name']
+        self.areas = tables['bodies']['area']
+        self.edges = tables['edges']
+        self.offset = tables['bands']['offset']
+        log.debug(F"loaded {len(self.names)} water bodies, {len(self.edges['body'])} edges")
+
+    def lookup(self, lat, lon):
+        # returns the name of the body of water at the point, the smallest if several contain it, or None over land
+        b = int(band(lat))
+        s = slice(int(self.offset[b]), int(self.offset[b + 1]))
+        x0 = self.edges['x0'][s]
+        y0 = self.edges['y0'][s]
+        x1 = self.edges['x1'][s]
+        y1 = self.edges['y1'][s]
+        spans = (y0 > lat) != (y1 > lat)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossings = spans & (lon < (x1 - x0) * (lat - y0) / (y1 - y0) + x0)
+        counts = np.bincount(self.edges['body'][s][crossings], minlength=len(self.names))
+        inside = np.flatnonzero(counts % 2)
+        if len(inside) == 0:
+            return None
+        return str(self.names[inside[np.argmin(self.areas[inside])]])